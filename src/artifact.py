@@ -0,0 +1,146 @@
+"""Contains the .uslc format: a compiled program, which runs without the tokenizer or the compiler
+
+    header: magic, format version, size, mtime and sha256 of the source, the program was compiled from
+    body: marshalled tuple of the bytecode arrays, registers, constant pools, links and the std input schema
+
+A stale artifact is rejected: if its source is next to it and was changed since,
+the one read of the artifact is followed by hashing the source, only when size or mtime differ
+"""
+
+import os, sys, struct, marshal, hashlib
+from array import array
+
+from src.rules import Type
+from src.errors import ArtifactException, ARTIFACT_ERR
+from src.compiler import Program
+
+
+__all__ = [
+    'ARTIFACT_SUFFIX',
+    'ARTIFACT_MAGIC',
+    'ARTIFACT_VERSION',
+    'SourceStamp',
+    'stamp_source',
+    'write_artifact',
+    'read_artifact',
+    'source_of',
+]
+
+
+ARTIFACT_SUFFIX = ".uslc"
+ARTIFACT_MAGIC = b"USLC"
+
+# bump it whenever the layout of the body or the meaning of the bytecode changes
+ARTIFACT_VERSION = 3
+
+# magic, version, source size, source mtime in ns, sha256 of the source
+_HEADER: struct.Struct = struct.Struct("<4sHQq32s")
+
+
+class SourceStamp:
+    """What an artifact remembers about its source"""
+    __slots__ = ('size', 'mtime_ns', 'digest')
+
+    def __init__(self, size: int, mtime_ns: int, digest: bytes) -> None:
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self.digest: bytes = digest
+
+
+def stamp_source(file_name: str) -> SourceStamp:
+    with open(file_name, "rb") as file:
+        digest: bytes = hashlib.file_digest(file, "sha256").digest()
+        stat: os.stat_result = os.fstat(file.fileno())
+    return SourceStamp(stat.st_size, stat.st_mtime_ns, digest)
+
+def source_of(artifact_name: str) -> str:
+    """The .usl file an artifact is compiled from, by its name"""
+    return artifact_name.removesuffix(ARTIFACT_SUFFIX) + ".usl"
+
+
+def _array_bytes(values: array) -> bytes:
+    """Arrays are kept little-endian"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _bytes_array(typecode: str, data: bytes) -> array:
+    values: array = array(typecode, data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def write_artifact(program: Program, file_name: str, stamp: SourceStamp) -> None:
+    """Writes the artifact at once, through a temporary file next to it"""
+    body: tuple = (
+        _array_bytes(program.ops),
+        _array_bytes(program.arg_a),
+        _array_bytes(program.arg_b),
+        _array_bytes(program.arg_c),
+        _array_bytes(array('q', program.lines)),
+        program.sources,
+        _array_bytes(program.scalars),
+        [_array_bytes(values) for values in program.int_arrays],
+        program.char_arrays,
+        program.strings,
+        program.spaces,
+        program.space_entries,
+        program.links,
+        [(slot, slot_type.value) for slot, slot_type in program.stdin],
+        program.stdin_refs,
+    )
+    header: bytes = _HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, stamp.size, stamp.mtime_ns, stamp.digest)
+    temp_name: str = file_name + ".tmp"
+    with open(temp_name, "wb") as file:
+        file.write(header)
+        marshal.dump(body, file)
+    os.replace(temp_name, file_name)
+
+def read_artifact(file_name: str) -> Program:
+    """Reads the program with a single read of the file
+
+    Raises
+        `ARTIFACT_ERR`
+        * Not an artifact, or of another version
+        * The source next to it has changed since it was compiled
+        `FileNotFoundError`
+        * If the file does not exist
+    """
+    with open(file_name, "rb") as file:
+        data: bytes = file.read()
+
+    if len(data) < _HEADER.size or data[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC:
+        raise ArtifactException(ARTIFACT_ERR, f"Not a compiled program: {file_name}")
+    magic, version, size, mtime_ns, digest = _HEADER.unpack_from(data)
+    if version != ARTIFACT_VERSION:
+        raise ArtifactException(ARTIFACT_ERR, f"{file_name} is of version {version}, expected {ARTIFACT_VERSION}, compile it again")
+
+    source_name: str = source_of(file_name)
+    if os.path.exists(source_name):
+        stat: os.stat_result = os.stat(source_name)
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns) and stamp_source(source_name).digest != digest:
+            raise ArtifactException(ARTIFACT_ERR, f"{source_name} has changed since {file_name} was compiled, compile it again")
+
+    try:
+        body: tuple = marshal.loads(memoryview(data)[_HEADER.size:])
+    except (EOFError, ValueError, TypeError) as exc:
+        raise ArtifactException(ARTIFACT_ERR, f"{file_name} is damaged") from exc
+
+    program: Program = Program()
+    program.ops = _bytes_array('B', body[0])
+    program.arg_a = _bytes_array('q', body[1])
+    program.arg_b = _bytes_array('q', body[2])
+    program.arg_c = _bytes_array('q', body[3])
+    program.lines = array('l', _bytes_array('q', body[4]))
+    program.sources = body[5]
+    program.scalars = _bytes_array('q', body[6])
+    program.int_arrays = [_bytes_array('q', values) for values in body[7]]
+    program.char_arrays = body[8]
+    program.strings = body[9]
+    program.spaces = body[10]
+    program.space_entries = body[11]
+    program.links = body[12]
+    program.stdin = [(slot, Type(type_value)) for slot, type_value in body[13]]
+    program.stdin_refs = body[14]
+    return program
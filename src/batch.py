@@ -0,0 +1,101 @@
+"""Checks whole directory trees of .usl files at once
+
+Files are tokenized by a pool of worker processes, each of them keeps a single `Session`,
+so the interpreter starts once per worker instead of once per file
+"""
+
+import os, time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.errors import LANGUAGE_EXCEPTIONS
+from src.tokens.session import Session
+from src.tokens.cache import TokenCache, CACHE_DIR_NAME
+
+
+__all__ = [
+    'FileReport',
+    'BatchReport',
+    'find_sources',
+    'check_file',
+    'check_directory',
+]
+
+
+# files are handed to workers in batches of that size
+CHUNK_FILES = 16
+
+
+class FileReport:
+    """`error` holds args of the raised exception (kind, message, code line, highlight),
+    or None if the file is fine
+    """
+    __slots__ = ('file_name', 'error', 'seconds')
+
+    def __init__(self, file_name: str, error: tuple[str, ...] | None, seconds: float) -> None:
+        self.file_name: str = file_name
+        self.error: tuple[str, ...] | None = error
+        self.seconds: float = seconds
+
+
+class BatchReport:
+    def __init__(self, reports: list[FileReport], seconds: float) -> None:
+        # always in the order of `find_sources`, no matter which worker finished first
+        self.reports: list[FileReport] = reports
+        self.seconds: float = seconds
+
+    @property
+    def failed(self) -> list[FileReport]:
+        return [report for report in self.reports if report.error is not None]
+
+    @property
+    def cpu_seconds(self) -> float:
+        """Time spent on the files themselves, summed over all workers"""
+        return sum(report.seconds for report in self.reports)
+
+
+_session: Session | None = None
+
+
+def _start_worker() -> None:
+    global _session
+    cache_dir: str | None = os.environ.get("USL_CACHE_DIR")
+    _session = Session(TokenCache(cache_dir) if cache_dir else None)
+
+def find_sources(root: str) -> list[str]:
+    """All .usl files under `root`, sorted, so that the order is stable between runs"""
+    sources: list[str] = []
+    for directory, directories, file_names in os.walk(root):
+        directories[:] = sorted(name for name in directories if name != CACHE_DIR_NAME)
+        sources.extend(os.path.join(directory, name) for name in sorted(file_names) if name.endswith(".usl"))
+    return sources
+
+def check_file(file_name: str) -> FileReport:
+    """Tokenizes a single file with the worker's session, whatever it raises becomes the error of its report"""
+    if _session is None:
+        _start_worker()
+    start: float = time.perf_counter()
+    error: tuple[str, ...] | None = None
+    try:
+        _session.tokenize_file(file_name) # type: ignore
+    except LANGUAGE_EXCEPTIONS as exc:
+        error = tuple(str(arg) for arg in exc.args)
+    except OSError as exc:
+        error = (type(exc).__name__, str(exc.strerror), "", "")
+    except Exception as exc:
+        # e.g. a file, that is not utf-8, it is reported as any other one, so the rest of the tree is still checked
+        error = (type(exc).__name__, str(exc), "", "")
+    return FileReport(file_name, error, time.perf_counter() - start)
+
+def check_directory(root: str, jobs: int = 1) -> BatchReport:
+    """Checks every .usl file under `root` with `jobs` worker processes"""
+    start: float = time.perf_counter()
+    sources: list[str] = find_sources(root)
+
+    reports: list[FileReport] = []
+    if jobs <= 1:
+        reports = [check_file(file_name) for file_name in sources]
+    else:
+        with ProcessPoolExecutor(jobs, initializer=_start_worker) as executor:
+            reports = list(executor.map(check_file, sources, chunksize=CHUNK_FILES))
+
+    return BatchReport(reports, time.perf_counter() - start)
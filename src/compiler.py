@@ -0,0 +1,596 @@
+"""Compiles tokens into a flat bytecode, which is executed by src/vm.py
+
+Every instruction is an opcode with three integer operands (a, b, c), kept in parallel arrays.
+Operands are register slots, jump targets or indexes of the string pool:
+integer literals are given read-only slots of their own, so every operand is a slot
+
+Int, bool and char slots live in one preallocated array('q'), int[] and char[] slots in side tables.
+A reference is resolved to the offset inside the table of its type right here,
+so the machine never looks a reference up.
+Spaces, that no call reaches from _main, and variables, that nothing uses, are checked as any other, but get no code and no slots
+"""
+
+import re
+from array import array
+from enum import IntEnum, auto
+
+from src.rules import (
+    ReservedSpace, Keyword, Type,
+    GLOBAL_OWNER, MAX_VAR, CHAR_ESCAPES,
+    get_str_from_reserved_space, get_str_from_keyword, get_str_from_space,
+)
+from src.errors import (
+    SyntaxException, SYNTAX_ERR,
+    OwnershipException, OWNERSHIP_ERR,
+    DuplicationException, DUPLICATION_ERR,
+    RulesBreak, RULES_BREAK,
+    UNUSED_WARN,
+)
+from src.errorutils import put_errored_code_line
+from src.tokens.tokenclass import Token
+from src.resolution import (
+    Definition, LinkUse,
+    resolve_references, resolve_links,
+    reachable_spaces, used_references,
+)
+
+
+__all__ = [
+    'Opcode',
+    'Program',
+    'Variable',
+    'Compiler',
+    'compile_tokens',
+    'BOOL_VALUES',
+    'BOOL_NAMES',
+    'decode_escapes',
+    'INT_MIN',
+    'INT_MAX',
+    'SCALAR_TYPE_VALUES',
+    'COMPARISON_OPCODES',
+    'FUSED_OPCODES',
+    'COUNT_OPCODES',
+    'NEXT_OPCODES',
+    'JUMP_OPCODES',
+]
+
+
+class Opcode(IntEnum):
+    HALT = 0 # stops the program
+    JUMP = auto() # pc = a
+    JUMP_IF_FALSE = auto() # if registers[a] is not True: pc = b
+    INC = auto() # registers[a] += registers[b]
+    DEC = auto() # registers[a] -= registers[b]
+    LT = auto() # registers[a] = registers[b] < registers[c]
+    GT = auto() # registers[a] = registers[b] > registers[c]
+    LE = auto() # registers[a] = registers[b] <= registers[c]
+    GE = auto() # registers[a] = registers[b] >= registers[c]
+    EQ = auto() # registers[a] = registers[b] == registers[c]
+    NE = auto() # registers[a] = registers[b] != registers[c]
+    STDOUT = auto() # writes registers[a] as a value of Type(b)
+    DESC = auto() # writes strings[b], then reads registers[a] as a value of Type(c)
+    CALL = auto() # calls the space number b, which starts at a
+    RET = auto() # returns from a space
+    # superinstructions of the optimizer: a compare fused with the jump of its if
+    JUMP_UNLESS_LT = auto() # if not registers[a] < registers[b]: pc = c
+    JUMP_UNLESS_GT = auto() # if not registers[a] > registers[b]: pc = c
+    JUMP_UNLESS_LE = auto() # if not registers[a] <= registers[b]: pc = c
+    JUMP_UNLESS_GE = auto() # if not registers[a] >= registers[b]: pc = c
+    JUMP_UNLESS_EQ = auto() # if not registers[a] == registers[b]: pc = c
+    JUMP_UNLESS_NE = auto() # if not registers[a] != registers[b]: pc = c
+    # counted loops of the optimizer, registers[c] is the step, negative for > and >=
+    COUNT_LT = auto() # while registers[a] < registers[b]: registers[a] += registers[c], in a single step
+    COUNT_GT = auto() # while registers[a] > registers[b]: registers[a] += registers[c], in a single step
+    COUNT_LE = auto() # while registers[a] <= registers[b]: registers[a] += registers[c], in a single step
+    COUNT_GE = auto() # while registers[a] >= registers[b]: registers[a] += registers[c], in a single step
+    # the end of a counted loop, whose body does something
+    NEXT_LT = auto() # registers[a] += 1; if registers[a] < registers[b]: pc = c
+    NEXT_GT = auto() # registers[a] -= 1; if registers[a] > registers[b]: pc = c
+    NEXT_LE = auto() # registers[a] += 1; if registers[a] <= registers[b]: pc = c
+    NEXT_GE = auto() # registers[a] -= 1; if registers[a] >= registers[b]: pc = c
+
+COMPARISONS: dict[str, Opcode] = {
+    "<": Opcode.LT,
+    ">": Opcode.GT,
+    "<=": Opcode.LE,
+    ">=": Opcode.GE,
+    "==": Opcode.EQ,
+    "!=": Opcode.NE,
+}
+
+# bools are four-valued and are kept as integers in registers
+BOOL_VALUES: dict[str, int] = {
+    "False": 0,
+    "True": 1,
+    "Null": 2,
+    "Vague": 3,
+}
+BOOL_NAMES: list[str] = list(BOOL_VALUES)
+
+SCALAR_TYPES: tuple[Type, ...] = (Type.Int, Type.Char, Type.Bool)
+SCALAR_TYPE_VALUES: tuple[int, ...] = tuple(scalar_type.value for scalar_type in SCALAR_TYPES)
+
+COMPARISON_OPCODES: tuple[Opcode, ...] = tuple(COMPARISONS.values())
+# compare -> the superinstruction, that compares and jumps unless the result is true
+FUSED_OPCODES: dict[Opcode, Opcode] = {
+    Opcode.LT: Opcode.JUMP_UNLESS_LT,
+    Opcode.GT: Opcode.JUMP_UNLESS_GT,
+    Opcode.LE: Opcode.JUMP_UNLESS_LE,
+    Opcode.GE: Opcode.JUMP_UNLESS_GE,
+    Opcode.EQ: Opcode.JUMP_UNLESS_EQ,
+    Opcode.NE: Opcode.JUMP_UNLESS_NE,
+}
+# compare -> the counted loop, that runs while the result is true
+COUNT_OPCODES: dict[Opcode, Opcode] = {
+    Opcode.LT: Opcode.COUNT_LT,
+    Opcode.GT: Opcode.COUNT_GT,
+    Opcode.LE: Opcode.COUNT_LE,
+    Opcode.GE: Opcode.COUNT_GE,
+}
+NEXT_OPCODES: dict[Opcode, Opcode] = {
+    Opcode.LT: Opcode.NEXT_LT,
+    Opcode.GT: Opcode.NEXT_GT,
+    Opcode.LE: Opcode.NEXT_LE,
+    Opcode.GE: Opcode.NEXT_GE,
+}
+# opcode -> the operand, which holds its jump target
+JUMP_OPCODES: dict[Opcode, int] = {
+    Opcode.JUMP: 0,
+    Opcode.JUMP_IF_FALSE: 1,
+    **{fused: 2 for fused in FUSED_OPCODES.values()},
+    **{next_op: 2 for next_op in NEXT_OPCODES.values()},
+}
+
+# ints are stored as 64-bit signed integers
+INT_MIN: int = -2**63
+INT_MAX: int = 2**63 - 1
+
+# offset of links and gotos in spaces, that are left out
+LEFT_OUT: int = -1
+
+_ESCAPE: re.Pattern[str] = re.compile(r"\\(.)")
+
+
+def decode_escapes(text: str) -> str:
+    """Turns \\n, \\t, \\0, \\\\, \\" and \\' into the chars they stand for, other escapes are kept as they are"""
+    return _ESCAPE.sub(lambda match: CHAR_ESCAPES.get(match.group(1), match.group(0)), text)
+
+
+class Variable:
+    """A variable of _consts, _pre or _stdin"""
+    __slots__ = ('ref', 'type', 'owner', 'space', 'token', 'slot')
+
+    def __init__(self, ref: int, var_type: Type, owner: str | ReservedSpace, space: ReservedSpace, token: Token, slot: int) -> None:
+        self.ref: int = ref
+        self.type: Type = var_type
+        self.owner: str | ReservedSpace = owner
+        self.space: ReservedSpace = space
+        self.token: Token = token
+        self.slot: int = slot
+
+
+class Program:
+    """Compiled program: bytecode, initial registers and everything needed to report errors"""
+    def __init__(self) -> None:
+        self.ops: array[int] = array('B')
+        self.arg_a: array[int] = array('q')
+        self.arg_b: array[int] = array('q')
+        self.arg_c: array[int] = array('q')
+        # index of the code line, which every instruction comes from
+        self.lines: array[int] = array('l')
+        self.sources: dict[int, str] = {}
+
+        # initial values of the register file
+        self.scalars: array[int] = array('q')
+        self.int_arrays: list[array[int]] = []
+        self.char_arrays: list[str] = []
+        self.strings: list[str] = []
+
+        # _main is always the space number 0
+        self.spaces: list[str] = []
+        self.space_entries: list[int] = []
+        self.links: dict[str, int] = {}
+        # slots and types of std input variables, which _main takes
+        self.stdin: list[tuple[int, Type]] = []
+        self.stdin_refs: list[int] = []
+        # arguments of warnings, the same as of language exceptions
+        self.warnings: list[tuple[str, ...]] = []
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def emit(self, opcode: Opcode, a: int = 0, b: int = 0, c: int = 0, token: Token | None = None) -> int:
+        """Appends an instruction, returns its offset"""
+        self.ops.append(opcode)
+        self.arg_a.append(a)
+        self.arg_b.append(b)
+        self.arg_c.append(c)
+        if token is not None:
+            self.lines.append(token.line_index)
+            self.sources[token.line_index] = token.line
+        else:
+            self.lines.append(self.lines[-1] if self.lines else 0)
+        return len(self.ops) - 1
+
+    def table_of(self, slot_type: Type) -> array[int] | list:
+        """Table, which keeps slots of the type"""
+        if slot_type == Type.IntArray:
+            return self.int_arrays
+        if slot_type == Type.String:
+            return self.char_arrays
+        return self.scalars
+
+    def add_slot(self, slot_type: Type, value: int | str | list[int]) -> int:
+        """Returns the offset of the new slot inside the table of its type"""
+        table: array[int] | list = self.table_of(slot_type)
+        table.append(array('q', value) if slot_type == Type.IntArray else value) # type: ignore
+        return len(table) - 1
+
+    def add_string(self, string: str) -> int:
+        self.strings.append(string)
+        return len(self.strings) - 1
+
+    def scalar_usage(self) -> tuple[set[int], set[int]]:
+        """Scalar slots, that are written by any instruction or bound to std input,
+        and slots, that are written only by compares and read only by the jump right after them
+        """
+        written: set[int] = {slot for slot, slot_type in self.stdin if slot_type in SCALAR_TYPES}
+        compared: set[int] = set()
+        read: set[int] = set()
+        for pc in range(len(self)):
+            op: int = self.ops[pc]
+            a: int = self.arg_a[pc]
+            if op in (Opcode.INC, Opcode.DEC):
+                written.add(a)
+                read.update((a, self.arg_b[pc]))
+            elif op in COMPARISON_OPCODES:
+                compared.add(a)
+                read.update((self.arg_b[pc], self.arg_c[pc]))
+            elif Opcode.JUMP_UNLESS_LT <= op <= Opcode.JUMP_UNLESS_NE:
+                read.update((a, self.arg_b[pc]))
+            elif Opcode.COUNT_LT <= op <= Opcode.COUNT_GE:
+                written.add(a)
+                read.update((a, self.arg_b[pc], self.arg_c[pc]))
+            elif Opcode.NEXT_LT <= op <= Opcode.NEXT_GE:
+                written.add(a)
+                read.update((a, self.arg_b[pc]))
+            elif op == Opcode.DESC and self.arg_c[pc] in SCALAR_TYPE_VALUES:
+                written.add(a)
+            elif op == Opcode.STDOUT and self.arg_b[pc] in SCALAR_TYPE_VALUES:
+                read.add(a)
+        return (written | compared, compared - written - read)
+
+    def disassemble(self) -> list[str]:
+        """A line per instruction: offset, opcode, operands and the code line it comes from\n
+        Starts of spaces and placed links are written above their instructions
+        """
+        labels: dict[int, list[str]] = {}
+        for name, entry in zip(self.spaces, self.space_entries):
+            labels.setdefault(entry, []).append(f"{name}:")
+        for link, offset in self.links.items():
+            labels.setdefault(offset, []).append(f"<{link}>")
+
+        lines: list[str] = []
+        for pc in range(len(self)):
+            lines.extend(labels.get(pc, []))
+            source: str = self.sources.get(self.lines[pc], "").strip()
+            lines.append(f"{pc:6} {Opcode(self.ops[pc]).name:<15} {self.arg_a[pc]:>6} {self.arg_b[pc]:>6} {self.arg_c[pc]:>6}   ; {self.lines[pc]}| {source}")
+        return lines
+
+
+class Compiler:
+    def __init__(self, tokens: list[Token]) -> None:
+        self.spaces: dict[str | ReservedSpace, Token] = {}
+        for token in tokens:
+            self.spaces[token.arguments[0]] = token # type: ignore
+
+        self.program: Program = Program()
+        self.variables: dict[int, Variable] = {}
+        self.literal_slots: dict[int, int] = {}
+        self.declared_links: list[Token] = []
+        self.link_placements: list[LinkUse] = []
+        self.scratch_slot: int | None = None
+        # name -> index in program.spaces, calls look their callees up here
+        self.space_indexes: dict[str, int] = {}
+        # what is left in the program, found by `__shake`
+        self.reached: set[str | ReservedSpace] = set()
+        self.used_refs: set[int] = set()
+
+        # instructions, which are patched once every space and link is placed
+        self.call_fixups: list[tuple[int, str, Token]] = []
+        self.goto_fixups: list[LinkUse] = []
+
+    def compile(self) -> Program:
+        self.__shake()
+        self.__collect_variables()
+        self.__collect_links()
+        self.__bind_stdin()
+
+        custom_spaces: list[str] = [key for key in self.spaces if isinstance(key, str) and key in self.reached]
+        self.program.spaces = [get_str_from_reserved_space(ReservedSpace.Main)] + custom_spaces
+        self.space_indexes = {name: index for index, name in enumerate(self.program.spaces)}
+
+        self.program.space_entries.append(len(self.program))
+        if ReservedSpace.Main in self.spaces:
+            self.__compile_body(self.spaces[ReservedSpace.Main].subtokens, ReservedSpace.Main)
+        self.program.emit(Opcode.HALT)
+
+        for space_name in custom_spaces:
+            self.program.space_entries.append(len(self.program))
+            self.__compile_body(self.spaces[space_name].subtokens, space_name)
+            self.program.emit(Opcode.RET)
+        self.__check_left_out([name for name in self.spaces if isinstance(name, str) and name not in self.reached])
+
+        self.__patch_calls()
+        self.__patch_gotos()
+        return self.program
+
+    # reachability
+
+    def __shake(self) -> None:
+        """Finds spaces, that calls reach from _main, and references, that their instructions use\n
+        Everything else is left out of the program with a warning
+        """
+        self.reached = reachable_spaces(self.spaces)
+        self.used_refs = used_references(
+            token for space_name in self.reached if space_name in self.spaces for token in self.spaces[space_name].subtokens
+        )
+        if ReservedSpace.Main in self.spaces:
+            # std input variables are bound whether or not they are used
+            self.used_refs.update(argument[1] for argument in self.spaces[ReservedSpace.Main].arguments[1:]) # type: ignore
+        for space_name, token in self.spaces.items():
+            if isinstance(space_name, str) and space_name not in self.reached:
+                self.program.warnings.append((UNUSED_WARN, f"Space {space_name} is never called, it is left out", *put_errored_code_line(token.line, token.line_index, space_name, 0)))
+
+    def __check_left_out(self, space_names: list[str]) -> None:
+        """Spaces, that are left out, are compiled into a single throwaway program, so they are checked as any other ones\n
+        Their links are still resolved, but get no offsets
+        """
+        if not space_names:
+            return
+        program: Program = self.program
+        literal_slots, scratch_slot, space_indexes = dict(self.literal_slots), self.scratch_slot, self.space_indexes
+        placed, gone_to, called = len(self.link_placements), len(self.goto_fixups), len(self.call_fixups)
+        self.program = Program()
+        self.program.spaces = program.spaces + space_names
+        self.program.stdin = program.stdin
+        self.space_indexes = {name: index for index, name in enumerate(self.program.spaces)}
+        try:
+            for space_name in space_names:
+                self.__compile_body(self.spaces[space_name].subtokens, space_name)
+        finally:
+            self.program = program
+            self.literal_slots, self.scratch_slot, self.space_indexes = literal_slots, scratch_slot, space_indexes
+        for use in self.link_placements[placed:] + self.goto_fixups[gone_to:]:
+            use.offset = LEFT_OUT
+        del self.call_fixups[called:]
+
+    # variables
+
+    def __collect_variables(self) -> None:
+        """Gives a slot to every variable of _consts, _pre and _stdin and computes initial values\n
+        Chains of references are folded here, so every slot starts with a literal value
+
+        Raises
+            `DUPLICATION_ERR`
+            * Same reference defined twice
+            `RULES_BREAK`
+            * Reference above `rules.MAX_VAR`
+        """
+        definitions: dict[int, Definition] = {}
+        for space in (ReservedSpace.Consts, ReservedSpace.Pre, ReservedSpace.Stdin):
+            if space not in self.spaces:
+                continue
+            for token in self.spaces[space].subtokens:
+                definition: tuple = token.arguments[0] # type: ignore
+                ref: int = definition[0]
+                if ref > MAX_VAR:
+                    raise RulesBreak(RULES_BREAK, f"Reference is above {MAX_VAR}: {ref}", *put_errored_code_line(token.line, token.line_index, str(ref), 0))
+                if ref in definitions:
+                    raise DuplicationException(DUPLICATION_ERR, f"Reference ~{ref} is already defined at {definitions[ref].token.line_index}", *put_errored_code_line(token.line, token.line_index, str(ref), 0))
+                definitions[ref] = Definition(ref, definition[1], space, token, definition[2] if len(definition) > 2 else None)
+
+        roots: dict[int, Definition] = resolve_references(definitions)
+        values: dict[int, int | str | list[int]] = {}
+        for ref, definition in definitions.items():
+            value: int | str | list[int]
+            if definition.space == ReservedSpace.Stdin:
+                # _stdin variables are only read later
+                value = "" if definition.type == Type.String else [] if definition.type == Type.IntArray else 0
+            else:
+                root: Definition = roots[ref]
+                if root.ref not in values:
+                    values[root.ref] = self.__literal_value(root)
+                value = values[root.ref]
+            # a variable, that nothing reached uses, is still checked wherever it is used
+            slot: int = LEFT_OUT
+            if ref in self.used_refs:
+                slot = self.program.add_slot(definition.type, value)
+            else:
+                token: Token = definition.token
+                self.program.warnings.append((UNUSED_WARN, f"~{ref} is never used, it is left out", *put_errored_code_line(token.line, token.line_index, str(ref), 0)))
+            self.variables[ref] = Variable(ref, definition.type, definition.token.owner, definition.space, definition.token, slot)
+
+    def __literal_value(self, definition: Definition) -> int | str | list[int]:
+        token: Token = definition.token
+        value: str = definition.value # type: ignore
+        match definition.type:
+            case Type.Int:
+                return self.__int_in_range(token, value)
+            case Type.Bool:
+                return BOOL_VALUES[value]
+            case Type.Char:
+                char: str = decode_escapes(value[1:-1])
+                if len(char) != 1:
+                    raise SyntaxException(SYNTAX_ERR, f"Invalid char declaration: {value}", *put_errored_code_line(token.line, token.line_index, value, -1))
+                return ord(char)
+            case Type.String:
+                return decode_escapes(value)
+            case Type.IntArray:
+                return [self.__int_in_range(token, item) for item in value[1:-1].split(',')]
+
+    def __int_in_range(self, token: Token, literal: str) -> int:
+        """Raises
+            `RULES_BREAK`
+            * Int does not fit into 64 bits
+        """
+        value: int = int(literal)
+        if not INT_MIN <= value <= INT_MAX:
+            raise RulesBreak(RULES_BREAK, f"Int does not fit into 64 bits: {literal}", *put_errored_code_line(token.line, token.line_index, literal, 0))
+        return value
+
+    def __literal_slot(self, token: Token, literal: str) -> int:
+        """Read-only slot holding an integer literal, shared by all its uses"""
+        value: int = self.__int_in_range(token, literal)
+        if value not in self.literal_slots:
+            self.literal_slots[value] = self.program.add_slot(Type.Int, value)
+        return self.literal_slots[value]
+
+    def __scratch(self) -> int:
+        """Slot for results of ifs, which are not set to any variable"""
+        if self.scratch_slot is None:
+            self.scratch_slot = self.program.add_slot(Type.Bool, 0)
+        return self.scratch_slot
+
+    def __variable(self, token: Token, ref: int, space: str | ReservedSpace, write: bool = False) -> Variable:
+        """Finds the variable, which an instruction of the space refers to
+
+        Raises
+            `SYNTAX_ERR`
+            * Reference is not defined
+            `OWNERSHIP_ERR`
+            * Variable belongs to another space
+            `RULES_BREAK`
+            * Writing to a const
+        """
+        # ->N is highlighted by its last occurrence
+        word, occur = (f"~{ref}", 0) if f"~{ref}" in token.line else (str(ref), -1)
+        if ref not in self.variables:
+            raise SyntaxException(SYNTAX_ERR, f"Reference ~{ref} is not defined", *put_errored_code_line(token.line, token.line_index, word, occur))
+        variable: Variable = self.variables[ref]
+        if variable.owner not in (GLOBAL_OWNER, space):
+            raise OwnershipException(OWNERSHIP_ERR, f"{get_str_from_space(space)} cannot use ~{ref}, it belongs to {get_str_from_space(variable.owner)}", *put_errored_code_line(token.line, token.line_index, word, occur))
+        if write and variable.space == ReservedSpace.Consts:
+            raise RulesBreak(RULES_BREAK, f"Cannot change a const: ~{ref}", *put_errored_code_line(token.line, token.line_index, word, occur))
+        return variable
+
+    def __operand(self, token: Token, operand: str | tuple, space: str | ReservedSpace) -> tuple[int, Type]:
+        """Slot and type of an operand, which is either ~N or an integer literal"""
+        if isinstance(operand, str):
+            return (self.__literal_slot(token, operand), Type.Int)
+        variable: Variable = self.__variable(token, operand[1], space)
+        if variable.type not in SCALAR_TYPES:
+            raise RulesBreak(RULES_BREAK, f"Expected int, char or bool, ~{variable.ref} is {variable.type.name}", *put_errored_code_line(token.line, token.line_index, f"~{variable.ref}", 0))
+        return (variable.slot, variable.type)
+
+    # links and std input
+
+    def __collect_links(self) -> None:
+        if ReservedSpace.Links in self.spaces:
+            self.declared_links = self.spaces[ReservedSpace.Links].subtokens
+
+    def __bind_stdin(self) -> None:
+        """Std input variables, that _main takes with %, must be defined in _stdin"""
+        if ReservedSpace.Main not in self.spaces:
+            return
+        main: Token = self.spaces[ReservedSpace.Main]
+        for argument in main.arguments[1:]:
+            ref: int = argument[1] # type: ignore
+            if ref not in self.variables or self.variables[ref].space != ReservedSpace.Stdin:
+                raise SyntaxException(SYNTAX_ERR, f"&{ref} is not defined in _stdin", *put_errored_code_line(main.line, main.line_index, f"&{ref}", 0))
+            self.program.stdin.append((self.variables[ref].slot, self.variables[ref].type))
+            self.program.stdin_refs.append(ref)
+
+    # instructions
+
+    def __compile_body(self, tokens: list[Token], space: str | ReservedSpace) -> None:
+        for token in tokens:
+            self.__compile_instruction(token, space)
+
+    def __compile_instruction(self, token: Token, space: str | ReservedSpace) -> None:
+        if token.link is not None:
+            self.link_placements.append(LinkUse(token.link, len(self.program), space, token))
+
+        match token.keyword:
+            case Keyword.PrintOut:
+                variable: Variable = self.__variable(token, token.arguments[0][1], space) # type: ignore
+                self.program.emit(Opcode.STDOUT, variable.slot, variable.type.value, 0, token)
+
+            case Keyword.Increase | Keyword.Decrease:
+                target: Variable = self.__variable(token, token.arguments[0][1], space, write=True) # type: ignore
+                if target.type not in (Type.Int, Type.Char):
+                    raise RulesBreak(RULES_BREAK, f"Cannot {get_str_from_keyword(token.keyword)} {target.type.name}", *put_errored_code_line(token.line, token.line_index, f"~{target.ref}", 0))
+                amount_slot, _ = self.__operand(token, token.arguments[1], space) # type: ignore
+                self.program.emit(Opcode.INC if token.keyword == Keyword.Increase else Opcode.DEC, target.slot, amount_slot, 0, token)
+
+            case Keyword.Call:
+                callee_name: str = token.arguments[0] # type: ignore
+                self.__check_call(token, callee_name, space)
+                offset: int = self.program.emit(Opcode.CALL, 0, self.space_indexes[callee_name], 0, token)
+                self.call_fixups.append((offset, callee_name, token))
+
+            case Keyword.Goto:
+                offset = self.program.emit(Opcode.JUMP, 0, 0, 0, token)
+                self.goto_fixups.append(LinkUse(token.arguments[0], offset, space, token)) # type: ignore
+
+            case Keyword.IfStatement:
+                self.__compile_if(token, space)
+
+            case Keyword.Describe:
+                self.__compile_desc(token, space)
+
+    def __compile_if(self, token: Token, space: str | ReservedSpace) -> None:
+        left_slot, _ = self.__operand(token, token.arguments[0], space) # type: ignore
+        right_slot, _ = self.__operand(token, token.arguments[2], space) # type: ignore
+
+        result_slot: int = self.__scratch()
+        if len(token.arguments) > 3:
+            result: Variable = self.__variable(token, token.arguments[3][1], space, write=True) # type: ignore
+            if result.type != Type.Bool:
+                raise RulesBreak(RULES_BREAK, f"Result of if must be set to bool, ~{result.ref} is {result.type.name}", *put_errored_code_line(token.line, token.line_index, str(result.ref), -1))
+            result_slot = result.slot
+
+        self.program.emit(COMPARISONS[token.arguments[1]], result_slot, left_slot, right_slot, token) # type: ignore
+        branch: int = self.program.emit(Opcode.JUMP_IF_FALSE, result_slot, 0, 0, token)
+        self.__compile_body(token.subtokens, space)
+        self.program.arg_b[branch] = len(self.program)
+
+    def __compile_desc(self, token: Token, space: str | ReservedSpace) -> None:
+        ref: int = token.arguments[1][1] # type: ignore
+        variable: Variable = self.__variable(token, ref, space, write=True)
+        if (variable.slot, variable.type) not in self.program.stdin:
+            raise SyntaxException(SYNTAX_ERR, f"~{ref} is not a std input variable taken by _main", *put_errored_code_line(token.line, token.line_index, str(ref), -1))
+        prompt: int = self.program.add_string(decode_escapes(token.arguments[0])) # type: ignore
+        self.program.emit(Opcode.DESC, variable.slot, prompt, variable.type.value, token)
+
+    def __check_call(self, token: Token, callee_name: str, space: str | ReservedSpace) -> None:
+        """A space can be called by its owner and by itself, spaces owned by std can be called by anyone
+
+        Raises
+            `SYNTAX_ERR`
+            * No such custom space
+            `OWNERSHIP_ERR`
+            * The caller does not own the space
+        """
+        if callee_name not in self.spaces:
+            raise SyntaxException(SYNTAX_ERR, f"Unknown space: {callee_name}", *put_errored_code_line(token.line, token.line_index, callee_name, 0))
+        owner: str | ReservedSpace = self.spaces[callee_name].owner
+        if owner not in (GLOBAL_OWNER, space) and callee_name != space:
+            raise OwnershipException(OWNERSHIP_ERR, f"{get_str_from_space(space)} cannot call {callee_name}, it belongs to {get_str_from_space(owner)}", *put_errored_code_line(token.line, token.line_index, callee_name, 0))
+
+    def __patch_calls(self) -> None:
+        for offset, callee_name, _ in self.call_fixups:
+            self.program.arg_a[offset] = self.program.space_entries[self.space_indexes[callee_name]]
+
+    def __patch_gotos(self) -> None:
+        """Every goto becomes a jump to the offset from the jump table of links"""
+        links, warnings = resolve_links(self.declared_links, self.link_placements, self.goto_fixups)
+        self.program.links = {name: offset for name, offset in links.items() if offset != LEFT_OUT}
+        self.program.warnings.extend(warnings)
+        for goto in self.goto_fixups:
+            if goto.offset != LEFT_OUT:
+                self.program.arg_a[goto.offset] = self.program.links[goto.name]
+
+
+def compile_tokens(tokens: list[Token]) -> Program:
+    return Compiler(tokens).compile()
@@ -30,4 +30,29 @@ class OwnershipException(Exception):
     def __init__(self, *args: object) -> None:
         super().__init__(*args)
 
-OWNERSHIP_ERR = "Ownership error"
\ No newline at end of file
+OWNERSHIP_ERR = "Ownership error"
+
+class ExecutionException(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+EXECUTION_ERR = "Execution error"
+
+class ArtifactException(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+ARTIFACT_ERR = "Artifact error"
+
+# not an error: the program still runs, but something in it is never used
+UNUSED_WARN = "Unused"
+
+# errors, that are caused by the .usl source itself, not by the interpreter
+LANGUAGE_EXCEPTIONS: tuple[type[Exception], ...] = (
+    SyntaxException,
+    OwnershipException,
+    DuplicationException,
+    TokenizerException,
+    RulesBreak,
+    ExecutionException,
+)
@@ -7,6 +7,7 @@ from src.errors import (
 
 __all__ = [
     'put_errored_code_line',
+    'put_errored_code_column',
     'format_code_line',
 ]
 
@@ -47,10 +48,24 @@ def highlight_errored_word(line: str, line_index: int, match_word: str, occur_in
     
     return " "*(matched[occur_index] + 2 + len(str(line_index))) + "^"*len(match_word)   
 
+def highlight_errored_column(line_index: int, column: int, length: int) -> str:
+    """Highlights code line with a line of ^'s, \n
+    starting straight at the known column, without searching for the word
+    """
+    return " "*(column + 2 + len(str(line_index))) + "^"*length
+
 def put_errored_code_line(line: str, line_index: int, match_word: str, occur_index: int = 0) -> tuple[str, str]:
     """Combines `format_code_line` and `highlight_errored_word`
     """
     return (
         format_code_line(line, line_index),
         highlight_errored_word(line, line_index, match_word, occur_index)
+    )
+
+def put_errored_code_column(line: str, line_index: int, column: int, length: int = 1) -> tuple[str, str]:
+    """Combines `format_code_line` and `highlight_errored_column`
+    """
+    return (
+        format_code_line(line, line_index),
+        highlight_errored_column(line_index, column, length)
     )
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Contains memoization of pure custom spaces
+
+A space is pure, when neither it nor any space it calls writes to the output or reads std input.
+Such a call only turns the values of registers it reads into the values of registers it writes,
+so it can be looked up in a cache keyed by the values it reads and writes (slots, that are never written, are left out of the key)
+"""
+
+from collections import OrderedDict
+
+from src.compiler import Opcode, Program, COMPARISON_OPCODES
+
+
+__all__ = [
+    'LRUCache',
+    'MemoSpace',
+    'find_pure_spaces',
+    'DEFAULT_MEMO_SIZE',
+]
+
+
+# entries kept for every pure space
+DEFAULT_MEMO_SIZE = 1024
+
+
+class LRUCache:
+    """Bounded cache, the entry used longest ago goes first"""
+    __slots__ = ('size', 'entries', 'hits', 'misses', 'evictions')
+
+    def __init__(self, size: int = DEFAULT_MEMO_SIZE) -> None:
+        self.size: int = size
+        self.entries: OrderedDict[tuple[int, ...], tuple[int, ...]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, key: tuple[int, ...]) -> tuple[int, ...] | None:
+        value: tuple[int, ...] | None = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple[int, ...], value: tuple[int, ...]) -> None:
+        self.entries[key] = value
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class MemoSpace:
+    """A pure space: registers its calls read and write, and the cache of their results"""
+    __slots__ = ('name', 'inputs', 'outputs', 'cache')
+
+    def __init__(self, name: str, inputs: list[int], outputs: list[int], size: int = DEFAULT_MEMO_SIZE) -> None:
+        self.name: str = name
+        self.inputs: list[int] = inputs
+        self.outputs: list[int] = outputs
+        self.cache: LRUCache = LRUCache(size)
+
+
+def space_effects(program: Program, start: int, end: int) -> tuple[set[int], set[int], set[int], bool]:
+    """Slots, that instructions in [start, end) read and write, spaces they call, and whether they are pure by themselves"""
+    read: set[int] = set()
+    written: set[int] = set()
+    called: set[int] = set()
+    for pc in range(start, end):
+        op: int = program.ops[pc]
+        a, b, c = program.arg_a[pc], program.arg_b[pc], program.arg_c[pc]
+        if op in (Opcode.STDOUT, Opcode.DESC, Opcode.HALT):
+            return (read, written, called, False)
+        if op in (Opcode.INC, Opcode.DEC):
+            read.update((a, b))
+            written.add(a)
+        elif op in COMPARISON_OPCODES:
+            read.update((b, c))
+            written.add(a)
+        elif op == Opcode.JUMP_IF_FALSE:
+            read.add(a)
+        elif Opcode.JUMP_UNLESS_LT <= op <= Opcode.JUMP_UNLESS_NE:
+            read.update((a, b))
+        elif Opcode.COUNT_LT <= op <= Opcode.COUNT_GE:
+            read.update((a, b, c))
+            written.add(a)
+        elif Opcode.NEXT_LT <= op <= Opcode.NEXT_GE:
+            read.update((a, b))
+            written.add(a)
+        elif op == Opcode.CALL:
+            called.add(b)
+    return (read, written, called, True)
+
+def find_pure_spaces(program: Program) -> dict[int, tuple[list[int], list[int]]]:
+    """Index of every pure custom space -> slots of the key of its calls, and slots, that they write"""
+    written_anywhere, scratch = program.scalar_usage()
+    entries: list[int] = program.space_entries + [len(program)]
+    effects: list[tuple[set[int], set[int], set[int], bool]] = [
+        space_effects(program, entries[index], entries[index + 1]) for index in range(len(program.space_entries))
+    ]
+
+    # a space is impure, when it calls an impure one
+    pure: set[int] = {index for index in range(1, len(effects)) if effects[index][3]}
+    changed: bool = True
+    while changed:
+        changed = False
+        for index in list(pure):
+            if not effects[index][2] <= pure:
+                pure.discard(index)
+                changed = True
+
+    spaces: dict[int, tuple[list[int], list[int]]] = {}
+    for index in pure:
+        read: set[int] = set()
+        written: set[int] = set()
+        seen: set[int] = set()
+        stack: list[int] = [index]
+        while stack:
+            current: int = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            read |= effects[current][0]
+            written |= effects[current][1]
+            stack.extend(effects[current][2])
+        # constants cannot change, results of ifs are read right after they are set, neither is a part of the key.
+        # a slot might be written on some paths only, then it keeps its value from before the call,
+        # so every slot, that is written back, is a part of the key as well
+        outputs: set[int] = written - scratch
+        spaces[index] = (sorted(((read & written_anywhere) - scratch) | outputs), sorted(outputs))
+    return spaces
@@ -0,0 +1,489 @@
+"""Contains a peephole optimizer, which rewrites the bytecode of a compiled program in place
+
+    -O0  nothing
+    -O1  folds compares of constants, merges neighbouring inc/dec of the same slot, threads jumps to jumps
+    -O2  also inlines calls of small spaces, which do not call themselves,
+         fuses a compare with the jump of its if into a superinstruction (JUMP_UNLESS_*)
+         and lowers counted loops to COUNT_* (nothing but the counter changes) or NEXT_*
+
+Instructions are removed by marking them and compacting the program at the end,
+every jump target, space entry and link is moved to the new offsets then
+"""
+
+import operator
+from collections.abc import Callable
+
+from src.rules import Type
+from src.compiler import Opcode, Program, COMPARISON_OPCODES, FUSED_OPCODES, COUNT_OPCODES, NEXT_OPCODES, JUMP_OPCODES, SCALAR_TYPE_VALUES, INT_MAX
+
+
+__all__ = [
+    'optimize',
+    'OPTIMIZATION_LEVELS',
+    'DEFAULT_OPTIMIZATION_LEVEL',
+    'INLINE_THRESHOLD',
+]
+
+
+OPTIMIZATION_LEVELS: tuple[int, ...] = (0, 1, 2)
+DEFAULT_OPTIMIZATION_LEVEL = 2
+
+# spaces of up to that many instructions (without RET) are inlined
+INLINE_THRESHOLD = 8
+
+COMPARE_FUNCTIONS: dict[int, Callable[[int, int], bool]] = {
+    Opcode.LT: operator.lt,
+    Opcode.GT: operator.gt,
+    Opcode.LE: operator.le,
+    Opcode.GE: operator.ge,
+    Opcode.EQ: operator.eq,
+    Opcode.NE: operator.ne,
+}
+
+UNFUSED_OPCODES: dict[Opcode, Opcode] = {fused: op for op, fused in FUSED_OPCODES.items()}
+
+# instruction as a mutable list: opcode, a, b, c, line index
+type Instruction = list[int]
+
+
+def jump_target_index(op: int) -> int | None:
+    """Index of the operand, which holds the jump target of an instruction"""
+    operand: int | None = JUMP_OPCODES.get(op) # type: ignore
+    return operand + 1 if operand is not None else None
+
+def written_slot(instruction: Instruction) -> int | None:
+    """The scalar slot, that the instruction writes"""
+    op: int = instruction[0]
+    if op in (Opcode.INC, Opcode.DEC) or op in COMPARISON_OPCODES or op >= Opcode.COUNT_LT:
+        return instruction[1]
+    if op == Opcode.DESC and instruction[3] in SCALAR_TYPE_VALUES:
+        return instruction[1]
+    return None
+
+
+class Optimizer:
+    def __init__(self, program: Program, inline_threshold: int = INLINE_THRESHOLD) -> None:
+        self.program: Program = program
+        self.inline_threshold: int = inline_threshold
+        self.code: list[Instruction | None] = [
+            [program.ops[pc], program.arg_a[pc], program.arg_b[pc], program.arg_c[pc], program.lines[pc]]
+            for pc in range(len(program))
+        ]
+        written, self.scratch = program.scalar_usage()
+        # scalar slots, that are never written, keep their initial values
+        self.constants: dict[int, int] = {slot: value for slot, value in enumerate(program.scalars) if slot not in written}
+        self.constant_slots: dict[int, int] = {}
+        for slot, value in self.constants.items():
+            self.constant_slots.setdefault(value, slot)
+        self.fired: dict[str, int] = {}
+
+    def count(self, name: str) -> None:
+        self.fired[name] = self.fired.get(name, 0) + 1
+
+    def targets(self, skip: range = range(0)) -> set[int]:
+        """Offsets, that are jumped to, called or gone to from outside, nothing can be merged into them\n
+        Jumps of instructions in `skip` are not counted
+        """
+        found: set[int] = set(self.program.space_entries) | set(self.program.links.values())
+        for pc, instruction in enumerate(self.code):
+            if instruction is None or pc in skip:
+                continue
+            index: int | None = jump_target_index(instruction[0])
+            if index is not None:
+                found.add(instruction[index])
+            elif instruction[0] == Opcode.CALL:
+                found.add(instruction[1])
+        return found
+
+    def next_alive(self, pc: int) -> int:
+        while pc < len(self.code) and self.code[pc] is None:
+            pc += 1
+        return pc
+
+    def constant_slot(self, value: int) -> int:
+        if value not in self.constant_slots:
+            slot: int = self.program.add_slot(Type.Int, value)
+            self.constants[slot] = value
+            self.constant_slots[value] = slot
+        return self.constant_slots[value]
+
+    # passes, each returns whether anything changed
+
+    def fold_compares(self) -> bool:
+        """A compare of constants followed by its jump: the if either always runs its body, or never does"""
+        changed: bool = False
+        targets: set[int] = self.targets()
+        for pc, instruction in enumerate(self.code):
+            if instruction is None or instruction[0] not in COMPARISON_OPCODES:
+                continue
+            op, result, left, right, _ = instruction
+            if left not in self.constants or right not in self.constants:
+                continue
+            jump_pc: int = self.next_alive(pc + 1)
+            jump: Instruction | None = self.code[jump_pc] if jump_pc < len(self.code) else None
+            if jump is None or jump[0] != Opcode.JUMP_IF_FALSE or jump[1] != result or jump_pc in targets:
+                continue
+
+            holds: bool = COMPARE_FUNCTIONS[op](self.constants[left], self.constants[right])
+            if holds:
+                self.code[jump_pc] = None
+                self.count("if always true")
+            else:
+                # the body is dropped too, unless anything outside of it jumps into it
+                end: int = jump[2]
+                body: range = range(jump_pc + 1, end)
+                if any(target in body for target in self.targets(body)):
+                    self.code[jump_pc] = [Opcode.JUMP, end, 0, 0, jump[4]]
+                else:
+                    for body_pc in range(jump_pc, end):
+                        self.code[body_pc] = None
+                self.count("if always false")
+            # the result is still set, if anyone reads it
+            if result in self.scratch:
+                self.code[pc] = None
+            changed = True
+        return changed
+
+    def merge_increments(self) -> bool:
+        """inc/dec of the same slot by constants right after each other become one, or nothing"""
+        changed: bool = False
+        targets: set[int] = self.targets()
+        pc: int = 0
+        while pc < len(self.code):
+            first: Instruction | None = self.code[pc]
+            if first is None or first[0] not in (Opcode.INC, Opcode.DEC) or first[2] not in self.constants:
+                pc += 1
+                continue
+            amount: int = self.constants[first[2]] if first[0] == Opcode.INC else -self.constants[first[2]]
+            merged: list[int] = [pc]
+            next_pc: int = self.next_alive(pc + 1)
+            while next_pc < len(self.code) and next_pc not in targets:
+                second: Instruction = self.code[next_pc] # type: ignore
+                if second[0] not in (Opcode.INC, Opcode.DEC) or second[1] != first[1] or second[2] not in self.constants:
+                    break
+                amount += self.constants[second[2]] if second[0] == Opcode.INC else -self.constants[second[2]]
+                merged.append(next_pc)
+                next_pc = self.next_alive(next_pc + 1)
+
+            if (len(merged) > 1 or amount == 0) and abs(amount) <= INT_MAX:
+                for merged_pc in merged[1:]:
+                    self.code[merged_pc] = None
+                if amount == 0:
+                    self.code[pc] = None
+                else:
+                    self.code[pc] = [Opcode.INC if amount > 0 else Opcode.DEC, first[1], self.constant_slot(abs(amount)), 0, first[4]]
+                self.count("inc/dec merged")
+                changed = True
+            pc = next_pc
+        return changed
+
+    def thread_jumps(self) -> bool:
+        """A jump to a jump goes straight to the final target, a jump to the next instruction is dropped\n
+        Jumps of ifs are threaded only forward, so an if stays an if for the transpiler
+        """
+        changed: bool = False
+        for pc, instruction in enumerate(self.code):
+            if instruction is None:
+                continue
+            index: int | None = jump_target_index(instruction[0])
+            if index is None:
+                continue
+            target: int = instruction[index]
+            seen: set[int] = {pc}
+            while True:
+                alive: int = self.next_alive(target)
+                if alive >= len(self.code) or self.code[alive][0] != Opcode.JUMP or alive in seen: # type: ignore
+                    break
+                seen.add(alive)
+                target = self.code[alive][1] # type: ignore
+            if index != 1 and target <= pc:
+                target = instruction[index]
+            if target != instruction[index] and self.next_alive(target) != self.next_alive(instruction[index]):
+                instruction[index] = target
+                self.count("jump threaded")
+                changed = True
+            if instruction[0] == Opcode.JUMP and self.next_alive(pc + 1) == self.next_alive(instruction[1]):
+                self.code[pc] = None
+                self.count("jump to next dropped")
+                changed = True
+        return changed
+
+    def fuse_compares(self) -> bool:
+        """A compare, whose result only its if reads, and the jump of the if become one instruction"""
+        changed: bool = False
+        targets: set[int] = self.targets()
+        for pc, instruction in enumerate(self.code):
+            if instruction is None or instruction[0] not in COMPARISON_OPCODES or instruction[1] not in self.scratch:
+                continue
+            jump_pc: int = self.next_alive(pc + 1)
+            jump: Instruction | None = self.code[jump_pc] if jump_pc < len(self.code) else None
+            if jump is None or jump[0] != Opcode.JUMP_IF_FALSE or jump[1] != instruction[1] or jump_pc in targets:
+                continue
+            self.code[pc] = [FUSED_OPCODES[instruction[0]], instruction[2], instruction[3], jump[2], instruction[4]] # type: ignore
+            self.code[jump_pc] = None
+            self.count("compare fused")
+            changed = True
+        return changed
+
+    def space_calls(self) -> list[set[int]]:
+        """Spaces, that every space calls, directly or through other spaces"""
+        entries: list[int] = self.program.space_entries + [len(self.code)]
+        calls: list[set[int]] = [
+            {instruction[2] for instruction in self.code[entries[index]:entries[index + 1]] if instruction is not None and instruction[0] == Opcode.CALL}
+            for index in range(len(self.program.space_entries))
+        ]
+        changed: bool = True
+        while changed:
+            changed = False
+            for called in calls:
+                for callee in list(called):
+                    if not calls[callee] <= called:
+                        called |= calls[callee]
+                        changed = True
+        return calls
+
+    def inline_calls(self) -> bool:
+        """Calls of small spaces, that never get back to themselves, become copies of their bodies\n
+        Ownership is checked by the compiler in the space, that the body is written in,
+        so a copy may use variables, that the caller could not name. Jumps of a copy are moved to it,
+        a jump to the RET of the space goes right after the copy
+        """
+        program: Program = self.program
+        entries: list[int] = program.space_entries + [len(self.code)]
+        calls: list[set[int]] = self.space_calls()
+        bodies: dict[int, list[Instruction]] = {}
+        for index in range(1, len(program.space_entries)):
+            body: list[Instruction] = self.code[entries[index]:entries[index + 1] - 1] # type: ignore
+            if index not in calls[index] and len(body) <= self.inline_threshold and all(instruction[0] not in (Opcode.RET, Opcode.HALT) for instruction in body):
+                bodies[index] = body
+
+        code: list[Instruction] = []
+        new_offsets: list[int] = []
+        copied: set[int] = set()
+        inlined: bool = False
+        for instruction in self.code:
+            new_offsets.append(len(code))
+            if instruction[0] != Opcode.CALL or instruction[2] not in bodies: # type: ignore
+                code.append(list(instruction)) # type: ignore
+                continue
+            entry: int = entries[instruction[2]] # type: ignore
+            base: int = len(code)
+            for body_instruction in bodies[instruction[2]]: # type: ignore
+                copy: Instruction = list(body_instruction)
+                index: int | None = jump_target_index(copy[0])
+                if index is not None:
+                    copy[index] = base + copy[index] - entry
+                copied.add(len(code))
+                code.append(copy)
+            inlined = True
+            self.count("call inlined")
+        new_offsets.append(len(code))
+        if not inlined:
+            return False
+
+        for position, instruction in enumerate(code):
+            index = jump_target_index(instruction[0])
+            # jumps of copies are moved already, calls in them still point at old entries
+            if index is not None and position not in copied:
+                instruction[index] = new_offsets[instruction[index]]
+            elif instruction[0] == Opcode.CALL:
+                instruction[1] = new_offsets[instruction[1]]
+        program.space_entries = [new_offsets[entry] for entry in program.space_entries]
+        program.links = {link: new_offsets[offset] for link, offset in program.links.items()}
+        self.code = code # type: ignore
+        return True
+
+    def drop_uncalled_spaces(self) -> None:
+        """Spaces, that are not called any more, since every call was inlined, are removed with their links"""
+        program: Program = self.program
+        entries: list[int] = program.space_entries + [len(self.code)]
+        called: set[int] = {0} | {instruction[2] for instruction in self.code if instruction is not None and instruction[0] == Opcode.CALL}
+        if len(called) == len(program.space_entries):
+            return
+        for index in range(len(program.space_entries)):
+            if index in called:
+                continue
+            for pc in range(entries[index], entries[index + 1]):
+                self.code[pc] = None
+            program.links = {link: offset for link, offset in program.links.items() if not entries[index] <= offset < entries[index + 1]}
+            self.count("space dropped")
+        kept: list[int] = sorted(called)
+        new_indexes: dict[int, int] = {index: position for position, index in enumerate(kept)}
+        for instruction in self.code:
+            if instruction is not None and instruction[0] == Opcode.CALL:
+                instruction[2] = new_indexes[instruction[2]]
+        program.spaces = [program.spaces[index] for index in kept]
+        program.space_entries = [program.space_entries[index] for index in kept]
+
+    def space_writes(self) -> list[set[int]]:
+        """Scalar slots, that every space writes, together with spaces it calls"""
+        entries: list[int] = self.program.space_entries + [len(self.code)]
+        writes: list[set[int]] = []
+        calls: list[set[int]] = []
+        for index in range(len(self.program.space_entries)):
+            writes.append(set())
+            calls.append(set())
+            for instruction in self.code[entries[index]:entries[index + 1]]:
+                if instruction is None:
+                    continue
+                slot: int | None = written_slot(instruction)
+                if slot is not None:
+                    writes[index].add(slot)
+                elif instruction[0] == Opcode.CALL:
+                    calls[index].add(instruction[2])
+        changed: bool = True
+        while changed:
+            changed = False
+            for index, called in enumerate(calls):
+                for callee in called:
+                    if not writes[callee] <= writes[index]:
+                        writes[index] |= writes[callee]
+                        changed = True
+        return writes
+
+    def counted_loop(self, header: int, back: int, writes: list[set[int]]) -> tuple[int, int, int] | None:
+        """Offsets of the exit test and of the step of the loop [header, back], if it is counted, e.g.
+
+            <lop> if 2 (~1 < ~2)        or      <lop> ...
+            ...                                 inc ~1 1
+            inc ~1 1                            if 1 (~1 < ~2)
+            goto <lop>                          goto <lop>
+
+        the counter is changed only by the step, the bound is not changed at all, the test is the only way out,
+        and nothing jumps into the loop from outside. The third offset is where the body starts
+        """
+        code: list[Instruction | None] = self.code
+        region: list[int] = [pc for pc in range(header, back) if code[pc] is not None]
+        if len(region) < 2:
+            return None
+        first: Instruction = code[region[0]] # type: ignore
+        last: Instruction = code[region[-1]] # type: ignore
+        if first[0] in UNFUSED_OPCODES and first[3] == back + 1:
+            test, step, body_start = region[0], region[-1], region[0] + 1
+        elif last[0] in UNFUSED_OPCODES and last[3] == back + 1:
+            test, step, body_start = region[-1], region[-2], region[0]
+        else:
+            return None
+
+        counter, bound = code[test][1], code[test][2] # type: ignore
+        stepping: Instruction = code[step] # type: ignore
+        if stepping[0] not in (Opcode.INC, Opcode.DEC) or stepping[1] != counter or counter == bound:
+            return None
+        if stepping[2] not in self.constants or self.constants[stepping[2]] == 0:
+            return None
+
+        for pc, instruction in enumerate(code):
+            if instruction is None or pc in (test, step, back):
+                continue
+            index: int | None = jump_target_index(instruction[0])
+            target: int | None = instruction[index] if index is not None else None
+            if not header <= pc < back:
+                if target is not None and header < target <= back:
+                    return None
+                continue
+            # jumps of the body stay inside the body
+            if target is not None and not body_start <= target <= step:
+                return None
+            slots: set[int] = writes[instruction[2]] if instruction[0] == Opcode.CALL else {written_slot(instruction)} # type: ignore
+            if counter in slots or bound in slots:
+                return None
+        return (test, step, body_start)
+
+    def lower_counted_loops(self) -> bool:
+        """Loops, that count up to a bound or down to it, become COUNT_* when nothing but the counter changes,
+        which runs the whole loop at once, or end with NEXT_* when the counter is stepped by 1
+        """
+        changed: bool = False
+        writes: list[set[int]] = self.space_writes()
+        for back, instruction in enumerate(self.code):
+            if instruction is None or instruction[0] != Opcode.JUMP or instruction[1] >= back:
+                continue
+            header: int = instruction[1]
+            found: tuple[int, int, int] | None = self.counted_loop(header, back, writes)
+            if found is None:
+                continue
+            test, step, body_start = found
+            compare: Opcode = UNFUSED_OPCODES[self.code[test][0]] # type: ignore
+            stepping: Instruction = self.code[step] # type: ignore
+            delta: int = self.constants[stepping[2]] if stepping[0] == Opcode.INC else -self.constants[stepping[2]]
+            # the counter has to go towards the bound, otherwise the loop only ends by leaving 64 bits
+            if compare not in COUNT_OPCODES or (delta > 0) != (compare in (Opcode.LT, Opcode.LE)):
+                continue
+
+            counter, bound = self.code[test][1], self.code[test][2] # type: ignore
+            line: int = self.code[test][4] # type: ignore
+            body: list[int] = [pc for pc in range(header, back) if self.code[pc] is not None and pc not in (test, step)]
+            if not body:
+                # the loop is run at once: the step of a loop, that tests after it, is kept in front
+                self.code[test] = [COUNT_OPCODES[compare], counter, bound, self.constant_slot(delta), line]
+                if test < step:
+                    self.code[step] = None
+                self.count("loop counted at once")
+            elif abs(delta) == 1:
+                self.code[step] = [NEXT_OPCODES[compare], counter, bound, body_start, stepping[4]]
+                if test > step:
+                    self.code[test] = None
+                self.count("counted loop")
+            else:
+                continue
+            self.code[back] = None
+            changed = True
+        return changed
+
+    def compact(self) -> None:
+        """Drops removed instructions and moves every offset to its new place"""
+        new_offsets: list[int] = []
+        alive: int = 0
+        for instruction in self.code:
+            new_offsets.append(alive)
+            if instruction is not None:
+                alive += 1
+        new_offsets.append(alive)
+
+        program: Program = self.program
+        program.space_entries = [new_offsets[entry] for entry in program.space_entries]
+        for array_name in ("ops", "arg_a", "arg_b", "arg_c", "lines"):
+            del getattr(program, array_name)[:]
+        for instruction in self.code:
+            if instruction is None:
+                continue
+            index: int | None = jump_target_index(instruction[0])
+            if index is not None:
+                instruction[index] = new_offsets[instruction[index]]
+            elif instruction[0] == Opcode.CALL:
+                # the entry is taken from the index of the space, so no pass can leave a call at an old offset
+                instruction[1] = program.space_entries[instruction[2]]
+            program.ops.append(instruction[0])
+            program.arg_a.append(instruction[1])
+            program.arg_b.append(instruction[2])
+            program.arg_c.append(instruction[3])
+            program.lines.append(instruction[4])
+        program.links = {link: new_offsets[offset] for link, offset in program.links.items()}
+        self.code = [instruction for instruction in self.code if instruction is not None]
+
+    def run(self, level: int) -> dict[str, int]:
+        if level <= 0:
+            return self.fired
+        if level >= 2:
+            # bodies of inlined calls are optimized together with the code around them
+            while self.inline_calls():
+                pass
+            self.drop_uncalled_spaces()
+        changed: bool = True
+        while changed:
+            changed = self.fold_compares()
+            changed = self.merge_increments() or changed
+            changed = self.thread_jumps() or changed
+        if level >= 2:
+            self.fuse_compares()
+            self.thread_jumps()
+            # loops are found on the compacted code, tests of their ifs are fused by now
+            self.compact()
+            self.lower_counted_loops()
+        self.compact()
+        return self.fired
+
+
+def optimize(program: Program, level: int = DEFAULT_OPTIMIZATION_LEVEL, inline_threshold: int = INLINE_THRESHOLD) -> dict[str, int]:
+    """Optimizes the program in place, returns how many times each rewrite fired"""
+    return Optimizer(program, inline_threshold).run(level)
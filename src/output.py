@@ -0,0 +1,87 @@
+"""Contains the output of the virtual machine
+
+Everything stdout and desc write is collected as bytes in one reusable buffer,
+which goes to the sink only when it fills up, before std input is read, at the end of the program and on errors
+"""
+
+import os, sys
+from typing import BinaryIO
+
+
+__all__ = [
+    'OutputBuffer',
+    'MemorySink',
+    'DEFAULT_BUFFER_SIZE',
+    'MEMORY_SINK',
+    'open_sink',
+]
+
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+# the name of the in-memory sink, when it is given instead of a file name
+MEMORY_SINK = ":memory:"
+
+
+class MemorySink:
+    """Sink, that keeps nothing but the amount of bytes written, for benchmarking without any I/O"""
+    def __init__(self) -> None:
+        self.written: int = 0
+
+    def write(self, data: bytes | bytearray | memoryview) -> int:
+        self.written += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class OutputBuffer:
+    """Preallocated buffer of `size` bytes, which is reused for the whole run"""
+    def __init__(self, sink: BinaryIO | MemorySink, size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.sink: BinaryIO | MemorySink = sink
+        self.size: int = size
+        self.buffer: bytearray = bytearray(size)
+        self.view: memoryview = memoryview(self.buffer)
+        self.position: int = 0
+
+    def write(self, data: bytes) -> None:
+        end: int = self.position + len(data)
+        if end > self.size:
+            self.__drain()
+            # too large to be buffered at all
+            if len(data) >= self.size:
+                self.sink.write(data)
+                return
+            end = len(data)
+        self.buffer[self.position:end] = data
+        self.position = end
+
+    def __drain(self) -> None:
+        if self.position:
+            self.sink.write(self.view[:self.position])
+            self.position = 0
+
+    def flush(self) -> None:
+        """Writes out the buffer and flushes the sink"""
+        self.__drain()
+        self.sink.flush()
+
+
+def open_sink(target: str | None) -> BinaryIO | MemorySink:
+    """Binary stdout for None, `MemorySink` for `MEMORY_SINK` or the file with the given name
+
+    Raises
+        `OSError`
+        * If the file cannot be opened for writing
+    """
+    if target is None:
+        # text written before must not end up after the buffered bytes
+        sys.stdout.flush()
+        return sys.stdout.buffer
+    if target == MEMORY_SINK:
+        return MemorySink()
+    return open(os.path.expanduser(target), "wb")
@@ -0,0 +1,190 @@
+"""Contains the profile of a run of the dispatch loop and its reports
+
+The virtual machine fills a `Profile` only in its profiling loop, the usual loop does not know about it.
+Every executed instruction adds 1 to its count and the nanoseconds it took to its time,
+calls add the time until their return to the inclusive time of the called space.
+A link owns the instructions from its offset to the next link or space, that is how time is summed per link.
+Stacks of spaces are interned, a call of a space, that is on the stack already, goes back to its frame,
+so recursion neither grows the profile nor the collapsed stacks.
+Reports map offsets back to the code lines, that the instructions come from
+"""
+
+import json
+from array import array
+
+from src.compiler import Opcode, Program
+
+
+__all__ = [
+    'Profile',
+    'PROFILE_FORMATS',
+    'PROFILE_OPTIMIZATION_LEVEL',
+    'profile_report',
+    'profile_json',
+    'collapsed_stacks',
+]
+
+
+# text is the default, collapsed is the input of flamegraph tools
+PROFILE_FORMATS = ("text", "json", "collapsed")
+# inlining moves instructions of small spaces into their callers, so a profile is taken without it, unless -O2 is asked for
+PROFILE_OPTIMIZATION_LEVEL = 1
+# rows of every table of the text report
+REPORT_ROWS = 20
+# joins frames of a collapsed stack, so it cannot be a part of one
+STACK_SEPARATOR = ";"
+
+
+class Profile:
+    """Counts and nanoseconds by offset and by space, and nanoseconds by stack of spaces and code line"""
+    __slots__ = ('counts', 'times', 'calls', 'inclusive', 'stacks', 'frames', 'frame_ids', 'total')
+
+    def __init__(self, program: Program) -> None:
+        self.counts: array[int] = array('q', bytes(8 * len(program)))
+        self.times: array[int] = array('q', bytes(8 * len(program)))
+        # by the index of the space, recursive calls are counted in the time of every call they are inside of
+        self.calls: list[int] = [0] * len(program.space_entries)
+        self.inclusive: list[int] = [0] * len(program.space_entries)
+        # id of a stack and a line index -> nanoseconds
+        self.stacks: dict[tuple[int, int], int] = {}
+        # id of a stack -> id of the stack of its caller and the index of its space, 0 is _main
+        self.frames: list[tuple[int, int]] = [(-1, 0)]
+        self.frame_ids: dict[tuple[int, int], int] = {}
+        self.total: int = 0
+
+    def enter(self, stack: int, space: int) -> int:
+        """Id of the stack, that a call of the space from the stack makes"""
+        found: int | None = self.frame_ids.get((stack, space))
+        if found is None:
+            found = stack
+            while found != -1 and self.frames[found][1] != space:
+                found = self.frames[found][0]
+            if found == -1:
+                found = len(self.frames)
+                self.frames.append((stack, space))
+            self.frame_ids[(stack, space)] = found
+        return found
+
+    def stack_names(self, program: Program, stack: int) -> list[str]:
+        names: list[str] = []
+        while stack != -1:
+            names.append(program.spaces[self.frames[stack][1]])
+            stack = self.frames[stack][0]
+        return names[::-1]
+
+
+def owners(program: Program) -> list[int]:
+    """The index of the space of every offset"""
+    found: list[int] = [0] * len(program)
+    entries: list[int] = program.space_entries + [len(program)]
+    for index in range(len(program.space_entries)):
+        found[entries[index]:entries[index + 1]] = [index] * (entries[index + 1] - entries[index])
+    return found
+
+def link_regions(program: Program) -> dict[str, tuple[int, int]]:
+    """Link -> [start, end) of the instructions it owns"""
+    bounds: list[int] = sorted(set(program.space_entries) | set(program.links.values()) | {len(program)})
+    regions: dict[str, tuple[int, int]] = {}
+    for link, offset in program.links.items():
+        regions[link] = (offset, next(bound for bound in bounds if bound > offset))
+    return regions
+
+def source_of(program: Program, pc: int) -> str:
+    return program.sources.get(program.lines[pc], "").strip()
+
+def instruction_rows(program: Program, profile: Profile) -> list[dict[str, object]]:
+    """Executed instructions, hottest first"""
+    spaces: list[int] = owners(program)
+    rows: list[dict[str, object]] = [
+        {
+            'pc': pc,
+            'opcode': Opcode(program.ops[pc]).name,
+            'space': program.spaces[spaces[pc]],
+            'count': profile.counts[pc],
+            'time_ns': profile.times[pc],
+            'line_index': program.lines[pc],
+            'line': source_of(program, pc),
+        }
+        for pc in range(len(program)) if profile.counts[pc]
+    ]
+    rows.sort(key=lambda row: (row['time_ns'], row['count']), reverse=True)
+    return rows
+
+def space_rows(program: Program, profile: Profile) -> list[dict[str, object]]:
+    """Called spaces with their inclusive time and the time of their own instructions, hottest first"""
+    spaces: list[int] = owners(program)
+    own: list[int] = [0] * len(program.space_entries)
+    for pc in range(len(program)):
+        own[spaces[pc]] += profile.times[pc]
+    rows: list[dict[str, object]] = [
+        {
+            'space': name,
+            'calls': profile.calls[index],
+            'inclusive_ns': profile.inclusive[index],
+            'self_ns': own[index],
+            'line_index': program.lines[program.space_entries[index]],
+        }
+        for index, name in enumerate(program.spaces) if profile.calls[index]
+    ]
+    rows.sort(key=lambda row: (row['inclusive_ns'], row['calls']), reverse=True)
+    return rows
+
+def link_rows(program: Program, profile: Profile) -> list[dict[str, object]]:
+    """Reached links: how many times control passed them and the time of the instructions they own, hottest first"""
+    rows: list[dict[str, object]] = []
+    for link, (start, end) in link_regions(program).items():
+        if start < len(program) and profile.counts[start]:
+            rows.append({
+                'link': link,
+                'count': profile.counts[start],
+                'time_ns': sum(profile.times[start:end]),
+                'line_index': program.lines[start],
+                'line': source_of(program, start),
+            })
+    rows.sort(key=lambda row: (row['time_ns'], row['count']), reverse=True)
+    return rows
+
+def share(time: int, total: int) -> str:
+    return f"{100 * time / total:5.1f}%" if total else "    -%"
+
+def profile_report(program: Program, profile: Profile, rows: int = REPORT_ROWS) -> list[str]:
+    """Lines of the text report: the hottest instructions, spaces and links"""
+    total: int = profile.total
+    lines: list[str] = [f"Total: {total / 1e6:.3f} ms, {sum(profile.counts)} instructions", "", "Instructions:"]
+    for row in instruction_rows(program, profile)[:rows]:
+        lines.append(
+            f"{row['time_ns'] / 1e6:10.3f} ms {share(row['time_ns'], total)} {row['count']:>12}  " # type: ignore
+            f"{row['pc']:6} {row['opcode']:<15} {row['space']:<12} ; {row['line_index']}| {row['line']}"
+        )
+    lines.extend(("", "Spaces (inclusive, self):"))
+    for row in space_rows(program, profile)[:rows]:
+        lines.append(
+            f"{row['inclusive_ns'] / 1e6:10.3f} ms {share(row['inclusive_ns'], total)} " # type: ignore
+            f"{row['self_ns'] / 1e6:10.3f} ms {row['calls']:>12}  {row['space']} ; {row['line_index']}" # type: ignore
+        )
+    lines.extend(("", "Links:"))
+    for row in link_rows(program, profile)[:rows]:
+        lines.append(
+            f"{row['time_ns'] / 1e6:10.3f} ms {share(row['time_ns'], total)} {row['count']:>12}  " # type: ignore
+            f"<{row['link']}> ; {row['line_index']}| {row['line']}"
+        )
+    return lines
+
+def profile_json(program: Program, profile: Profile) -> str:
+    return json.dumps({
+        'total_ns': profile.total,
+        'instructions': instruction_rows(program, profile),
+        'spaces': space_rows(program, profile),
+        'links': link_rows(program, profile),
+    }, indent=2)
+
+def collapsed_stacks(program: Program, profile: Profile) -> list[str]:
+    """"_main;_space;12| line nanoseconds" per stack and code line, the format of flamegraph.pl and speedscope"""
+    names: dict[int, str] = {}
+    lines: list[str] = []
+    for (stack, line_index), time in sorted(profile.stacks.items(), key=lambda item: item[1], reverse=True):
+        if stack not in names:
+            names[stack] = STACK_SEPARATOR.join(profile.stack_names(program, stack))
+        source: str = program.sources.get(line_index, "").strip().replace(STACK_SEPARATOR, ",")
+        lines.append(f"{names[stack]}{STACK_SEPARATOR}{line_index}| {source} {time}")
+    return lines
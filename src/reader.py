@@ -0,0 +1,37 @@
+"""Reads .usl sources line by line, without loading the whole file as one string
+
+Regular files are memory-mapped, so the lines are only decoded, when the pointer gets to them
+"""
+
+import os, mmap
+from collections.abc import Iterator
+
+
+__all__ = [
+    'read_source_lines',
+]
+
+
+def read_source_lines(file_name: str) -> Iterator[str]:
+    """Lazily yields lines of the file without the trailing newline\n
+    Falls back to plain line iteration for anything, that cannot be mapped (pipes, empty files)
+
+    Raises
+        `FileNotFoundError`
+        * On the first iteration, if the file does not exist
+    """
+    with open(file_name, "rb") as file:
+        size: int = os.fstat(file.fileno()).st_size
+        if size == 0:
+            for raw_line in file:
+                yield raw_line.rstrip(b"\r\n").decode("utf-8")
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start: int = 0
+            while start < size:
+                end: int = mapped.find(b"\n", start)
+                if end == -1:
+                    end = size
+                yield mapped[start:end].rstrip(b"\r").decode("utf-8")
+                start = end + 1
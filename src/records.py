@@ -0,0 +1,81 @@
+"""Contains readers of input records, which a compiled program is run over one by one
+
+A record gives values to the std input variables, that _main takes with % (&N, ...),
+as text fields in the same order. Records are read lazily, so a pipe of any length works
+"""
+
+import csv, json
+from collections.abc import Iterator
+from typing import TextIO
+
+
+__all__ = [
+    'RECORD_FORMATS',
+    'iter_records',
+]
+
+
+RECORD_FORMATS: tuple[str, ...] = ("lines", "csv", "ndjson")
+
+
+def json_to_field(value: object) -> str:
+    """Turns a JSON value into the text std input would have"""
+    if isinstance(value, bool):
+        return "True" if value else "False"
+    if value is None:
+        return "Null"
+    if isinstance(value, list):
+        return ",".join(json_to_field(item) for item in value)
+    return str(value)
+
+def iter_lines(stream: TextIO) -> Iterator[list[str]]:
+    """A record per non-empty line, fields are separated by whitespaces"""
+    for line in stream:
+        fields: list[str] = line.split()
+        if fields:
+            yield fields
+
+def iter_csv(stream: TextIO) -> Iterator[list[str]]:
+    for row in csv.reader(stream):
+        if row:
+            yield row
+
+def iter_ndjson(stream: TextIO, refs: list[int]) -> Iterator[list[str]]:
+    """A record per line, either an array of values in the order of refs,
+    or an object keyed by references ("3" or "&3")
+
+    Raises
+        `ValueError`
+        * If a line is not JSON, or an object misses a reference
+    """
+    for line in stream:
+        if line.strip() == "":
+            continue
+        record: object = json.loads(line)
+        if isinstance(record, dict):
+            try:
+                yield [json_to_field(record[str(ref)] if str(ref) in record else record[f"&{ref}"]) for ref in refs]
+            except KeyError as exc:
+                raise ValueError(f"No value for {exc.args[0]} in {line.strip()}") from None
+        elif isinstance(record, list):
+            yield [json_to_field(item) for item in record]
+        else:
+            yield [json_to_field(record)]
+
+def iter_records(stream: TextIO, record_format: str, refs: list[int]) -> Iterator[list[str]]:
+    """Yields text fields of every record in the stream\n
+    `refs` are the references of std input variables, that _main takes, in order
+
+    Raises
+        `ValueError`
+        * If the format is unknown
+    """
+    match record_format:
+        case "lines":
+            return iter_lines(stream)
+        case "csv":
+            return iter_csv(stream)
+        case "ndjson":
+            return iter_ndjson(stream, refs)
+        case _:
+            raise ValueError(f"Unknown record format: {record_format}, expected one of {', '.join(RECORD_FORMATS)}")
@@ -0,0 +1,190 @@
+"""Contains resolution passes, which run over the whole program before any code is emitted
+
+A definition of _consts or _pre refers to at most one other definition (~N),
+so references form chains, which are followed once and remembered,
+keeping the pass linear in the number of definitions.
+Links are resolved into a jump table of instruction offsets, so goto never searches for a name.
+Spaces, that no call reaches from _main, and variables, that no reached instruction uses, are left out
+"""
+
+from collections.abc import Iterable, Iterator
+
+from src.rules import Keyword, ReservedSpace, Type, get_str_from_space
+from src.errors import (
+    SyntaxException, SYNTAX_ERR,
+    RulesBreak, RULES_BREAK,
+    DuplicationException, DUPLICATION_ERR,
+    UNUSED_WARN,
+)
+from src.errorutils import put_errored_code_line, format_code_line
+from src.tokens.tokenclass import Token
+
+
+__all__ = [
+    'Definition',
+    'resolve_references',
+    'LinkUse',
+    'resolve_links',
+    'iter_instructions',
+    'reachable_spaces',
+    'used_references',
+]
+
+
+# arguments (keyword, N), through which an instruction uses ~N
+REFERENCE_KEYWORDS: tuple[Keyword, ...] = (Keyword.Refer, Keyword.VarSet, Keyword.ReferStdinVar)
+
+
+class Definition:
+    """A variable as it is written in _consts, _pre or _stdin"""
+    __slots__ = ('ref', 'type', 'space', 'token', 'value')
+
+    def __init__(self, ref: int, var_type: Type, space: ReservedSpace, token: Token, value: str | tuple | None) -> None:
+        self.ref: int = ref
+        self.type: Type = var_type
+        self.space: ReservedSpace = space
+        self.token: Token = token
+        # a literal, (Keyword.Refer, N) or None for _stdin variables
+        self.value: str | tuple | None = value
+
+    @property
+    def refers_to(self) -> int | None:
+        if isinstance(self.value, tuple) and self.value[0] == Keyword.Refer:
+            return self.value[1]
+        return None
+
+
+def resolve_references(definitions: dict[int, Definition]) -> dict[int, Definition]:
+    """Maps every definition to the one, that holds the literal at the end of its chain\n
+    Chains are walked in dependency order, every definition is visited once
+
+    Raises
+        `SYNTAX_ERR`
+        * Reference is not defined
+        * References form a cycle
+        * Reference is a std input variable, which has no value before the program runs
+        `RULES_BREAK`
+        * Types of the definition and the referenced one differ
+    """
+    roots: dict[int, Definition] = {}
+    for definition in definitions.values():
+        path: list[Definition] = []
+        on_path: set[int] = set()
+        current: Definition = definition
+        while current.ref not in roots:
+            if current.ref in on_path:
+                cycle: list[Definition] = path[path.index(current):] + [current]
+                chain: str = " -> ".join(f"~{item.ref}" for item in cycle)
+                token: Token = cycle[0].token
+                raise SyntaxException(SYNTAX_ERR, f"References form a cycle: {chain}", *put_errored_code_line(token.line, token.line_index, f"~{cycle[1].ref}", 0))
+            path.append(current)
+            on_path.add(current.ref)
+
+            target: int | None = current.refers_to
+            if target is None:
+                roots[current.ref] = current
+                break
+            token = current.token
+            if target not in definitions:
+                raise SyntaxException(SYNTAX_ERR, f"Reference ~{target} is not defined", *put_errored_code_line(token.line, token.line_index, f"~{target}", 0))
+            referenced: Definition = definitions[target]
+            if referenced.space == ReservedSpace.Stdin:
+                raise SyntaxException(SYNTAX_ERR, f"~{target} is read from std input, it has no value to refer to", *put_errored_code_line(token.line, token.line_index, f"~{target}", 0))
+            if referenced.type != current.type:
+                raise RulesBreak(RULES_BREAK, f"Cannot set {referenced.type.name} to {current.type.name}", *put_errored_code_line(token.line, token.line_index, f"~{target}", 0))
+            current = referenced
+
+        root: Definition = roots[current.ref]
+        for item in path:
+            roots[item.ref] = root
+    return roots
+
+
+class LinkUse:
+    """Either a link placed before an instruction, or a goto to it"""
+    __slots__ = ('name', 'offset', 'space', 'token')
+
+    def __init__(self, name: str, offset: int, space: str | ReservedSpace, token: Token) -> None:
+        self.name: str = name
+        # offset of the instruction the link is placed before, or of the goto
+        self.offset: int = offset
+        self.space: str | ReservedSpace = space
+        self.token: Token = token
+
+
+def resolve_links(declared: list[Token], placements: list[LinkUse], gotos: list[LinkUse]) -> tuple[dict[str, int], list[tuple[str, ...]]]:
+    """Builds the jump table: name of every placed link -> offset of its instruction\n
+    Also returns warnings about links, that are declared but never placed, or placed but never gone to
+
+    Raises
+        `SYNTAX_ERR`
+        * Link is placed or gone to without being declared in _links
+        * Goto to a link, that is not placed, or is placed in another space
+        `DUPLICATION_ERR`
+        * Link is placed twice
+    """
+    declared_names: set[str] = {token.arguments[0] for token in declared} # type: ignore
+    table: dict[str, int] = {}
+    placed: dict[str, LinkUse] = {}
+    for placement in placements:
+        token: Token = placement.token
+        if placement.name not in declared_names:
+            raise SyntaxException(SYNTAX_ERR, f"Link is not declared in _links: {placement.name}", *put_errored_code_line(token.line, token.line_index, f"<{placement.name}>", 0))
+        if placement.name in placed:
+            raise DuplicationException(DUPLICATION_ERR, f"Link <{placement.name}> is already placed at {placed[placement.name].token.line_index}", *put_errored_code_line(token.line, token.line_index, f"<{placement.name}>", 0))
+        placed[placement.name] = placement
+        table[placement.name] = placement.offset
+
+    gone_to: set[str] = set()
+    for goto in gotos:
+        token = goto.token
+        if goto.name not in declared_names:
+            raise SyntaxException(SYNTAX_ERR, f"Link is not declared in _links: {goto.name}", *put_errored_code_line(token.line, token.line_index, f"<{goto.name}>", 0))
+        if goto.name not in placed:
+            raise SyntaxException(SYNTAX_ERR, f"Link <{goto.name}> is not placed before any instruction", *put_errored_code_line(token.line, token.line_index, f"<{goto.name}>", 0))
+        if placed[goto.name].space != goto.space:
+            raise SyntaxException(SYNTAX_ERR, f"Cannot go to <{goto.name}> of {get_str_from_space(placed[goto.name].space)}", *put_errored_code_line(token.line, token.line_index, f"<{goto.name}>", 0))
+        gone_to.add(goto.name)
+
+    warnings: list[tuple[str, ...]] = []
+    for token in declared:
+        name: str = token.arguments[0] # type: ignore
+        if name not in placed:
+            warnings.append((UNUSED_WARN, f"Link <{name}> is declared, but never placed", format_code_line(token.line, token.line_index)))
+        elif name not in gone_to:
+            token = placed[name].token
+            warnings.append((UNUSED_WARN, f"Link <{name}> is placed, but never gone to", *put_errored_code_line(token.line, token.line_index, f"<{name}>", 0)))
+    return (table, warnings)
+
+
+def iter_instructions(tokens: Iterable[Token]) -> Iterator[Token]:
+    """Instructions together with the ones in bodies of ifs, in the order they are written"""
+    for token in tokens:
+        yield token
+        if token.keyword == Keyword.IfStatement:
+            yield from iter_instructions(token.subtokens)
+
+def reachable_spaces(spaces: dict[str | ReservedSpace, Token]) -> set[str | ReservedSpace]:
+    """_main and every custom space, that a chain of calls from _main reaches"""
+    reached: set[str | ReservedSpace] = {ReservedSpace.Main}
+    stack: list[str | ReservedSpace] = [ReservedSpace.Main]
+    while stack:
+        name: str | ReservedSpace = stack.pop()
+        if name not in spaces:
+            continue
+        for token in iter_instructions(spaces[name].subtokens):
+            if token.keyword == Keyword.Call and token.arguments[0] not in reached:
+                reached.add(token.arguments[0]) # type: ignore
+                stack.append(token.arguments[0]) # type: ignore
+    return reached
+
+def used_references(tokens: Iterable[Token]) -> set[int]:
+    """References, that the instructions read, write or take from std input\n
+    Chains of _consts and _pre are folded into values, so what they refer to needs no slot
+    """
+    used: set[int] = set()
+    for token in iter_instructions(tokens):
+        for argument in token.arguments:
+            if isinstance(argument, tuple) and len(argument) == 2 and argument[0] in REFERENCE_KEYWORDS:
+                used.add(argument[1]) # type: ignore
+    return used
@@ -7,10 +7,10 @@ from src.errors import RulesBreak, RULES_BREAK
 __all__ = [
     'ALLOWED_CHARS', 'MAX_VAR', 'ALLOWED_LINK_CHARS', 'ALLOWED_RS_CHARS', 'ALLOWED_CUSTOM_SPACE_CHARS', 'LINK_CHAR_LEN', 
     'GLOBAL_OWNER', 'ALL_RESERVED_SPACES_AS_STR', 'ALLOWED_INDENTATIONS', 'DEFAULT_INDENTATION', 'THREE_LETTER_KEYWORDS',
-    'ALLOWED_SUBTOKEN_INSTRUCTIONS', 
+    'ALLOWED_SUBTOKEN_INSTRUCTIONS', 'COMPARISON_OPERATORS', 'CHAR_ESCAPES',
     'Type', 'ReservedSpace', 'Keyword', 'Action',
     'get_type_from_str', 'get_reserved_space_from_str', 'get_str_from_reserved_space', 'get_keyword_from_str',
-    'get_str_from_keyword',
+    'get_str_from_keyword', 'get_str_from_space',
 ]
 
 
@@ -91,6 +91,10 @@ def get_str_from_reserved_space(rs: ReservedSpace) -> str:
     }
     return pairs[rs]
 
+def get_str_from_space(space: str | ReservedSpace) -> str:
+    """Name of either a reserved or a custom space"""
+    return get_str_from_reserved_space(space) if isinstance(space, ReservedSpace) else space
+
 class Action(Enum):
     Spacing = auto()
     Defining = auto()
@@ -132,6 +136,20 @@ ALLOWED_SUBTOKEN_INSTRUCTIONS: list[Keyword] = [
     Keyword.IfStatement,
 ]
 
+COMPARISON_OPERATORS: list[str] = [
+    "<", ">", "<=", ">=", "==", "!="
+]
+
+# char after the backslash -> char the escape stands for
+CHAR_ESCAPES: dict[str, str] = {
+    "n": "\n",
+    "t": "\t",
+    "0": "\0",
+    "\\": "\\",
+    "\"": "\"",
+    "'": "'",
+}
+
 def get_keyword_from_str(kw: str) -> Keyword:
     pairs: dict[str, Keyword] = {
         'stdout': Keyword.PrintOut,
@@ -0,0 +1,129 @@
+"""Contains an on-disk cache of tokenized sources, the same idea as __pycache__ for .py files
+
+An entry is keyed by the hash of the source together with the fingerprint of the tokenizer,
+so editing src/rules.py or anything in src/tokens/ invalidates every entry at once
+"""
+
+import os, pickle, hashlib, tempfile
+from functools import cache
+from typing import Any, BinaryIO
+
+
+__all__ = [
+    'TokenCache',
+    'CACHE_DIR_NAME',
+    'TOKENIZER_VERSION',
+    'default_cache_dir',
+]
+
+
+CACHE_DIR_NAME = "__uslcache__"
+
+# bump it when the format of cached tokens changes without touching the sources below
+TOKENIZER_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 512
+
+CACHE_ENTRY_SUFFIX = ".tokens"
+
+_SRC_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@cache
+def tokenizer_fingerprint() -> bytes:
+    """Hashes the version together with src/rules.py and every module of src/tokens/"""
+    digest = hashlib.sha256(f"{TOKENIZER_VERSION}".encode())
+    tokens_dir: str = os.path.join(_SRC_DIR, "tokens")
+    file_names: list[str] = [os.path.join(_SRC_DIR, "rules.py")] + sorted(
+        os.path.join(tokens_dir, name) for name in os.listdir(tokens_dir) if name.endswith(".py")
+    )
+    for file_name in file_names:
+        with open(file_name, "rb") as file:
+            digest.update(file.read())
+    return digest.digest()
+
+def default_cache_dir(file_name: str) -> str:
+    """Either the directory given with USL_CACHE_DIR,
+    or __uslcache__ next to the source file
+    """
+    return os.environ.get("USL_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(file_name)), CACHE_DIR_NAME)
+
+
+class TokenCache:
+    """Cache of tokens, other caches reuse it by overriding the suffix, the fingerprint and serialization"""
+    entry_suffix: str = CACHE_ENTRY_SUFFIX
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.directory: str = directory
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def key_for_file(self, file_name: str) -> str:
+        """Hashes the source file without reading it into a single string
+
+        Raises
+            `FileNotFoundError`
+            * If the file does not exist
+        """
+        with open(file_name, "rb") as file:
+            digest = hashlib.file_digest(file, "sha256")
+        digest.update(self.fingerprint())
+        return digest.hexdigest()
+
+    def fingerprint(self) -> bytes:
+        return tokenizer_fingerprint()
+
+    def serialize(self, value: Any, file: BinaryIO) -> None:
+        pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def deserialize(self, file: BinaryIO) -> Any:
+        return pickle.load(file)
+
+    def __entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.entry_suffix)
+
+    def load(self, key: str) -> Any | None:
+        """Returns the cached tokens or None, if there is no usable entry\n
+        A hit refreshes the entry's mtime, which is what eviction is ordered by
+        """
+        entry_path: str = self.__entry_path(key)
+        try:
+            with open(entry_path, "rb") as file:
+                value: Any = self.deserialize(file)
+            os.utime(entry_path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def store(self, key: str, value: Any) -> None:
+        """Atomically writes the entry: readers either see the whole entry or none of it\n
+        A cache, that cannot be written to, is silently skipped
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    self.serialize(value, file)
+                os.replace(temp_path, self.__entry_path(key))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self.__evict()
+        except OSError:
+            pass
+
+    def __evict(self) -> None:
+        """Removes least recently used entries above `max_entries`"""
+        entries: list[os.DirEntry[str]] = [entry for entry in os.scandir(self.directory) if entry.name.endswith(self.entry_suffix)]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
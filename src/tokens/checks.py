@@ -8,9 +8,10 @@ from src.errors import (
     OwnershipException, OWNERSHIP_ERR,
 )
 from src.errorutils import put_errored_code_line
+from src.tokens.lexer import Lexeme, LexemeKind
 from src.rules import (
     ALLOWED_INDENTATIONS, ALL_RESERVED_SPACES_AS_STR, ALLOWED_CUSTOM_SPACE_CHARS, ALLOWED_RS_CHARS, 
-    THREE_LETTER_KEYWORDS, ALLOWED_LINK_CHARS,
+    THREE_LETTER_KEYWORDS, ALLOWED_LINK_CHARS, COMPARISON_OPERATORS, CHAR_ESCAPES,
     ReservedSpace,
 )
 
@@ -20,15 +21,42 @@ __all__ = [
     'PartialChecks',
     'PartsChecks',
     'TokenizerChecks',
+    'InstructionsChecks',
 ]
 
 
 class UtilsChecks:
     @staticmethod
-    def allowed_rs_chars(space_name: str, char: str, line: str, line_index: int) -> None:
-        if char not in ALLOWED_RS_CHARS:
+    def allowed_rs_chars(space_name: str, line: str, line_index: int) -> None:
+        if any(char not in ALLOWED_RS_CHARS for char in space_name):
             raise SyntaxException(SYNTAX_ERR, f"Invalid space name: {space_name}", *put_errored_code_line(line, line_index, space_name, 0))
         
+    class StdinArguments:
+        @staticmethod
+        def nothing_before_colon(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if len(lexemes) != 2:
+                raise SyntaxException(SYNTAX_ERR, f"Unexpected token after {lexemes[0].text}", *put_errored_code_line(line, line_index, lexemes[1].text, 0))
+
+        @staticmethod
+        def in_parentheses(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if len(lexemes) < 5 or lexemes[2].kind != LexemeKind.ParenOpen or lexemes[-2].kind != LexemeKind.ParenClose:
+                raise SyntaxException(SYNTAX_ERR, "Std input arguments must be given in parentheses: % (&1, &2)", *put_errored_code_line(line, line_index, "%", 0))
+
+        @staticmethod
+        def is_comma(lexeme: Lexeme, line: str, line_index: int) -> None:
+            if lexeme.kind != LexemeKind.Comma:
+                raise SyntaxException(SYNTAX_ERR, f"Expected a comma between std input arguments", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+        @staticmethod
+        def is_stdin_reference(lexeme: Lexeme, line: str, line_index: int) -> None:
+            if lexeme.kind != LexemeKind.StdinReference or not lexeme.text[1:].isdigit():
+                raise SyntaxException(SYNTAX_ERR, f"Expected a std input reference (&N): {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+        @staticmethod
+        def not_ending_with_comma(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if lexemes[-3].kind == LexemeKind.Comma:
+                raise SyntaxException(SYNTAX_ERR, "Expected a std input reference after a comma", *put_errored_code_line(line, line_index, ",", -1))
+
     class LinkName:
         @staticmethod
         def first_not_digit(arg: str, next_line: str, next_line_index: int) -> None:
@@ -58,23 +86,22 @@ class UtilsChecks:
             
     class FindCsOwner:
         @staticmethod
-        def owner_not_after_colon(chars: list[str], space_name: str, line: str, line_index: int) -> None:
-            if chars[len(space_name)] == ":":
-                raise SyntaxException(SYNTAX_ERR, f"Missing owner", *put_errored_code_line(line, line_index, chars[len(space_name)], -1))
+        def owner_not_after_colon(lexemes: list[Lexeme], space_name: str, line: str, line_index: int) -> None:
+            if lexemes[1].kind == LexemeKind.Colon:
+                raise SyntaxException(SYNTAX_ERR, f"Missing owner", *put_errored_code_line(line, line_index, lexemes[1].text, -1))
             
         @staticmethod
-        def follows_with_owner(args: list[str], space_name: str, line: str, line_index: int) -> None:
-            if args[1][0] != "[" or args[1][-2:] != "]:":
-                print(args)
+        def follows_with_owner(lexemes: list[Lexeme], space_name: str, line: str, line_index: int) -> None:
+            if lexemes[1].kind != LexemeKind.Owner:
                 raise SyntaxException(SYNTAX_ERR, f"Custom space initialization must follow with an owner: {space_name}", *put_errored_code_line(line, line_index, space_name[-1], -1))
 
     class VarValue:
+        @staticmethod
+        def four_args_in_var_defining(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if len(lexemes) > 4:
+                raise TokenizerException(TOKENIZER_ERR, f"Unexpected token argument at {line_index}", *put_errored_code_line(line, line_index, lexemes[4].text, -1))
+
         class Simpletypes:
-            @staticmethod
-            def four_args_in_var_defining(args: list[str], line: str, line_index: int) -> None:
-                if len(args) > 4:
-                    raise TokenizerException(TOKENIZER_ERR, f"Unexpected token argument at {line_index}", *put_errored_code_line(line, line_index, args[4], -1))
-                
             @staticmethod
             def for_int_is_integer(arg: str, line: str, line_index: int) -> None:
                 if not arg.isdigit():
@@ -87,8 +114,10 @@ class UtilsChecks:
             
             @staticmethod
             def for_char_is_char(arg: str, line: str, line_index: int) -> None:
-                if (arg[0] != "\'" or arg[-1] != "\'") or (arg[1] != '\\' and len(arg) != 3) or (arg[1] == '\\' and len(arg) != 4):
+                if len(arg) < 3 or (arg[0] != "\'" or arg[-1] != "\'") or (arg[1] != '\\' and len(arg) != 3) or (arg[1] == '\\' and len(arg) != 4):
                     raise SyntaxException(SYNTAX_ERR, "Invalid char declaration", *put_errored_code_line(line, line_index, arg, -1))
+                if arg[1] == '\\' and arg[2] not in CHAR_ESCAPES:
+                    raise SyntaxException(SYNTAX_ERR, f"Unknown escape in char: {arg}", *put_errored_code_line(line, line_index, arg, -1))
         
         class Intarray:
             @staticmethod
@@ -104,14 +133,14 @@ class UtilsChecks:
 
         @staticmethod
         def is_valid_string_declaration(string_str: str, line: str, line_index: int) -> None:
-            if string_str[0] != '"' or string_str[-1] != '"':
+            if len(string_str) < 2 or string_str[0] != '"' or string_str[-1] != '"':
                 raise SyntaxException(SYNTAX_ERR, f"Invalid string declaration at {line_index}", *put_errored_code_line(line, line_index, string_str, -1))
 
 class PartialChecks:
     class RsIndent:
         @staticmethod
-        def indent_rs_no_colon(chars: list[str], line: str, line_index: int) -> None: 
-            if chars[len("_indent")] != ":":
+        def indent_rs_no_colon(lexemes: list[Lexeme], line: str, line_index: int) -> None: 
+            if len(lexemes) < 2 or lexemes[1].kind != LexemeKind.Colon:
                 raise SyntaxException(SYNTAX_ERR, "Expected a colon after _indent", *put_errored_code_line(line, line_index, "t", 0))     
             
         @staticmethod
@@ -129,10 +158,16 @@ class PartialChecks:
             if indent not in ALLOWED_INDENTATIONS:
                 raise SyntaxException(SYNTAX_ERR, f"Indentation must be one of {", ".join([str(x) for x in ALLOWED_INDENTATIONS])}", *put_errored_code_line(line, line_index, str(indent), -1))
             
+    class RsOther:
+        @staticmethod
+        def stdin_arguments_only_for_main(space: ReservedSpace, stdin_arguments: list, line: str, line_index: int) -> None:
+            if stdin_arguments and space != ReservedSpace.Main:
+                raise SyntaxException(SYNTAX_ERR, "Only _main can take std input variables", *put_errored_code_line(line, line_index, "%", 0))
+
     class ReferenceVar:  
         @staticmethod
-        def four_args_in_var_defining(args: list[str], line: str, line_index: int) -> None:
-            UtilsChecks.VarValue.Simpletypes.four_args_in_var_defining(args, line, line_index)
+        def four_args_in_var_defining(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            UtilsChecks.VarValue.four_args_in_var_defining(lexemes, line, line_index)
             
         @staticmethod
         def reference_is_digit(reference_value_str: str, line: str, line_index: int) -> None:
@@ -152,9 +187,9 @@ class PartsChecks:
                 raise SyntaxException(SYNTAX_ERR, f"Not a reserved space: {space_name}", *put_errored_code_line(line, line_index, space_name, 0))
         
         @staticmethod
-        def ends_with_colon(space_name: str, chars: list[str], line: str, line_index: int) -> None:
-            if chars[-1] != ":" and line[0:len("_indent")] != "_indent":
-                raise SyntaxException(SYNTAX_ERR, f"Space {space_name} must end with a colon", *put_errored_code_line(line, line_index, chars[-1], -1))
+        def ends_with_colon(space_name: str, lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if lexemes[-1].kind != LexemeKind.Colon and space_name != "_indent":
+                raise SyntaxException(SYNTAX_ERR, f"Space {space_name} must end with a colon", *put_errored_code_line(line, line_index, lexemes[-1].text, -1))
 
     class CustomSpace:
         @staticmethod
@@ -168,22 +203,22 @@ class PartsChecks:
                 raise OwnershipException(OWNERSHIP_ERR, f"Can not set a null space as owner", *put_errored_code_line(line, line_index, '[]', -1))
             
         @staticmethod
-        def ends_with_colon(chars: list[str], line: str, line_index: int) -> None:
-            if chars[-1] != ":":
-                raise SyntaxException(SYNTAX_ERR, "Expected a colon", *put_errored_code_line(line, line_index, chars[-1], -1))
+        def ends_with_colon(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if lexemes[-1].kind != LexemeKind.Colon:
+                raise SyntaxException(SYNTAX_ERR, "Expected a colon", *put_errored_code_line(line, line_index, lexemes[-1].text, -1))
             
         @staticmethod
         def for_allowed_chars(owner_name: str | Literal[ReservedSpace.Main], line: str, line_index: int) -> None:
             if owner_name != ReservedSpace.Main:
-                for char in owner_name[1:-2]:
+                for char in owner_name:
                     if char not in ALLOWED_CUSTOM_SPACE_CHARS:
                         raise SyntaxException(SYNTAX_ERR, f"Invalid char at {line_index} for owner", *put_errored_code_line(line, line_index, char, 0))
                     
     class VarSubtokens:
         @staticmethod
-        def disallowed_args(args: list[str], line: str, line_index: int) -> None:
-            if len(args) < 4: 
-                raise SyntaxException(SYNTAX_ERR, f"Expected 4 arguments to define a variable, {len(args)} were given", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
+        def disallowed_args(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if len(lexemes) < 4: 
+                raise SyntaxException(SYNTAX_ERR, f"Expected 4 arguments to define a variable, {len(lexemes)} were given", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
             
         @staticmethod
         def is_int(var_ref_str: str, line: str, line_index: int) -> None:
@@ -191,15 +226,15 @@ class PartsChecks:
                 raise SyntaxException(SYNTAX_ERR, f"Expected integer at reference", *put_errored_code_line(line, line_index, var_ref_str, 0))
             
         @staticmethod
-        def not_a_null_owner(var_owner: str, space: Literal[ReservedSpace.Pre, ReservedSpace.Consts], line: str, line_index: int) -> None:
-            if var_owner[0] != '[' or var_owner[-1] != ']':
+        def not_a_null_owner(var_owner: Lexeme, space: Literal[ReservedSpace.Pre, ReservedSpace.Consts], line: str, line_index: int) -> None:
+            if var_owner.kind != LexemeKind.Owner:
                 raise SyntaxException(SYNTAX_ERR, f"Expected owner of {"variable" if space == ReservedSpace.Pre else "const"}", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
             
     class StdinSubtokens:
         @staticmethod
-        def disallowed_args(args: list[str], line: str, line_index: int) -> None:
-            if len(args) != 3:
-                raise SyntaxException(SYNTAX_ERR, f"Expected 3 arguments to define a variable, {len(args)} were given", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
+        def disallowed_args(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if len(lexemes) != 3:
+                raise SyntaxException(SYNTAX_ERR, f"Expected 3 arguments to define a variable, {len(lexemes)} were given", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
             
         @staticmethod
         def is_int(var_ref_str: str, line: str, line_index: int) -> None:
@@ -207,8 +242,8 @@ class PartsChecks:
                 raise SyntaxException(SYNTAX_ERR, f"Expected integer at reference", *put_errored_code_line(line, line_index, var_ref_str, 0))
 
         @staticmethod
-        def not_a_null_owner(var_owner: str, line: str, line_index: int) -> None:
-            if var_owner[0] != '[' or var_owner[-1] != ']':
+        def not_a_null_owner(var_owner: Lexeme, line: str, line_index: int) -> None:
+            if var_owner.kind != LexemeKind.Owner:
                 raise SyntaxException(SYNTAX_ERR, f"Expected owner of std input var", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
 
 class TokenizerChecks:
@@ -225,4 +260,71 @@ class TokenizerChecks:
     @staticmethod
     def invalid_indentations(indentation: int, line: str, line_index: int) -> None:
         if line[0] == " ": 
-            raise SyntaxException(SYNTAX_ERR, f"Invalid indentation. Expected {indentation} indent", *put_errored_code_line(line, line_index, ' ', 0))
\ No newline at end of file
+            raise SyntaxException(SYNTAX_ERR, f"Invalid indentation. Expected {indentation} indent", *put_errored_code_line(line, line_index, ' ', 0))
+
+class InstructionsChecks:
+    @staticmethod
+    def inside_space(space: str | ReservedSpace | None, line: str, line_index: int) -> None:
+        if space is None:
+            raise SyntaxException(SYNTAX_ERR, f"Instruction outside of any space at {line_index}", *put_errored_code_line(line, line_index, line.strip(), 0))
+
+    @staticmethod
+    def not_only_link(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+        if len(lexemes) == 0:
+            raise SyntaxException(SYNTAX_ERR, "Link must be placed before an instruction", *put_errored_code_line(line, line_index, line.strip(), 0))
+
+    @staticmethod
+    def args_amount(lexemes: list[Lexeme], amount: int, keyword: str, line: str, line_index: int) -> None:
+        if len(lexemes) != amount:
+            raise SyntaxException(SYNTAX_ERR, f"Expected {amount} argument{"s" if amount != 1 else ""} for {keyword}, {len(lexemes)} were given", f"{line_index}| {line}", "^"*(len(line) + len(str(line_index)) + 2))
+
+    @staticmethod
+    def is_reference(lexeme: Lexeme, line: str, line_index: int) -> None:
+        if lexeme.kind != LexemeKind.Reference or not lexeme.text[1:].isdigit():
+            raise SyntaxException(SYNTAX_ERR, f"Expected a reference (~N): {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+    @staticmethod
+    def is_operand(lexeme: Lexeme, line: str, line_index: int) -> None:
+        if lexeme.kind not in (LexemeKind.Reference, LexemeKind.Number):
+            raise SyntaxException(SYNTAX_ERR, f"Expected a reference (~N) or an integer: {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+    @staticmethod
+    def is_var_set(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+        if len(lexemes) != 2 or lexemes[0].kind != LexemeKind.VarSet or lexemes[1].kind != LexemeKind.Number:
+            raise SyntaxException(SYNTAX_ERR, "Expected ->N at the end", *put_errored_code_line(line, line_index, lexemes[0].text if lexemes else line.strip(), -1))
+
+    @staticmethod
+    def is_space_name(lexeme: Lexeme, line: str, line_index: int) -> None:
+        if lexeme.kind != LexemeKind.Word or not lexeme.text.startswith("_") or any(char not in ALLOWED_RS_CHARS for char in lexeme.text):
+            raise SyntaxException(SYNTAX_ERR, f"Expected a custom space name: {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+    @staticmethod
+    def is_link(lexeme: Lexeme, line: str, line_index: int) -> None:
+        if lexeme.kind != LexemeKind.Link:
+            raise SyntaxException(SYNTAX_ERR, f"Expected a link (<lnk>): {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+    @staticmethod
+    def is_string(lexeme: Lexeme, line: str, line_index: int) -> None:
+        UtilsChecks.VarValue.is_valid_string_declaration(lexeme.text, line, line_index)
+
+    class If:
+        @staticmethod
+        def has_condition(lexemes: list[Lexeme], line: str, line_index: int) -> None:
+            if len(lexemes) < 6 or lexemes[1].kind != LexemeKind.ParenOpen or lexemes[5].kind != LexemeKind.ParenClose:
+                raise SyntaxException(SYNTAX_ERR, "Expected if K (A op B)", *put_errored_code_line(line, line_index, "if", 0))
+
+        @staticmethod
+        def body_size_is_int(lexeme: Lexeme, line: str, line_index: int) -> None:
+            if lexeme.kind != LexemeKind.Number:
+                raise SyntaxException(SYNTAX_ERR, f"Expected the amount of instructions under if: {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+        @staticmethod
+        def operator(lexeme: Lexeme, line: str, line_index: int) -> None:
+            if lexeme.text not in COMPARISON_OPERATORS:
+                raise SyntaxException(SYNTAX_ERR, f"Unknown comparison: {lexeme.text}", *put_errored_code_line(line, line_index, lexeme.text, 0))
+
+        @staticmethod
+        def all_bodies_complete(open_ifs: list) -> None:
+            if open_ifs:
+                token, remaining = open_ifs[-1]
+                raise SyntaxException(SYNTAX_ERR, f"{remaining} more instruction{"s" if remaining != 1 else ""} expected under if", *put_errored_code_line(token.line, token.line_index, "if", 0))
@@ -0,0 +1,178 @@
+"""Contains tokenizing of instructions inside _main and custom spaces
+
+    [<lnk>] stdout ~N
+    [<lnk>] inc ~N V            (V is either an integer or ~M)
+    [<lnk>] dec ~N V
+    [<lnk>] call _space
+    [<lnk>] goto <lnk>
+    [<lnk>] if K (A op B) [->R] (K following instructions are the body of if,
+                                 A and B are either integers or ~M, op is one of < > <= >= == !=,
+                                 the result is set to R)
+    [<lnk>] desc "text" ->N     (describes the std input variable N with text and reads it)
+"""
+
+from typing import Literal, NoReturn
+from collections.abc import Callable
+
+from src.rules import (
+    Action, Keyword, ReservedSpace,
+    COMPARISON_OPERATORS,
+    get_keyword_from_str,
+)
+from src.errors import (
+    RulesBreak, RULES_BREAK,
+    SyntaxException, SYNTAX_ERR,
+)
+from src.errorutils import put_errored_code_line
+from src.tokens.lexer import Lexeme, LexemeKind
+from src.tokens.tokenclass import Token
+from src.tokens.checks import InstructionsChecks
+
+
+__all__ = [
+    'tokenize_instruction',
+    'close_if_bodies',
+    'OpenIfs',
+]
+
+
+type CurSpace = str | ReservedSpace
+type SpacesDict = dict[CurSpace, Token]
+type Operand = tuple[Literal[Keyword.Refer], int] | str
+# if tokens, which still wait for instructions of their bodies, with the amount they wait for
+type OpenIfs = list[list[Token | int]]
+
+
+def find_reference(lexeme: Lexeme, line: str, line_index: int) -> tuple[Literal[Keyword.Refer], int]:
+    InstructionsChecks.is_reference(lexeme, line, line_index)
+    return (Keyword.Refer, int(lexeme.text[1:]))
+
+def find_operand(lexeme: Lexeme, line: str, line_index: int) -> Operand:
+    """Operand is either a reference (~N) or an integer literal, which is kept as a string"""
+    if lexeme.kind == LexemeKind.Number:
+        return lexeme.text
+    InstructionsChecks.is_operand(lexeme, line, line_index)
+    return find_reference(lexeme, line, line_index)
+
+def find_var_set(lexemes: list[Lexeme], line: str, line_index: int) -> tuple[Literal[Keyword.VarSet], int]:
+    """Finds `->N` as the last two lexemes"""
+    InstructionsChecks.is_var_set(lexemes, line, line_index)
+    return (Keyword.VarSet, int(lexemes[-1].text))
+
+def tokenize_args_stdout(lexemes: list[Lexeme], line: str, line_index: int) -> list:
+    InstructionsChecks.args_amount(lexemes, 1, "stdout", line, line_index)
+    return [find_reference(lexemes[0], line, line_index)]
+
+def tokenize_args_inc_dec(lexemes: list[Lexeme], line: str, line_index: int) -> list:
+    InstructionsChecks.args_amount(lexemes, 2, "inc/dec", line, line_index)
+    return [
+        find_reference(lexemes[0], line, line_index),
+        find_operand(lexemes[1], line, line_index),
+    ]
+
+def tokenize_args_call(lexemes: list[Lexeme], line: str, line_index: int) -> list:
+    InstructionsChecks.args_amount(lexemes, 1, "call", line, line_index)
+    InstructionsChecks.is_space_name(lexemes[0], line, line_index)
+    return [lexemes[0].text]
+
+def tokenize_args_goto(lexemes: list[Lexeme], line: str, line_index: int) -> list:
+    InstructionsChecks.args_amount(lexemes, 1, "goto", line, line_index)
+    InstructionsChecks.is_link(lexemes[0], line, line_index)
+    return [lexemes[0].text[1:-1]]
+
+def tokenize_args_if(lexemes: list[Lexeme], line: str, line_index: int) -> list:
+    """if K (A op B) [->R], K is returned first and is removed by the caller"""
+    InstructionsChecks.If.has_condition(lexemes, line, line_index)
+    InstructionsChecks.If.body_size_is_int(lexemes[0], line, line_index)
+    InstructionsChecks.If.operator(lexemes[3], line, line_index)
+
+    arguments: list = [
+        int(lexemes[0].text),
+        find_operand(lexemes[2], line, line_index),
+        lexemes[3].text,
+        find_operand(lexemes[4], line, line_index),
+    ]
+    if len(lexemes) > 6:
+        arguments.append(find_var_set(lexemes[6:], line, line_index))
+    return arguments
+
+def tokenize_args_desc(lexemes: list[Lexeme], line: str, line_index: int) -> list:
+    InstructionsChecks.args_amount(lexemes, 3, "desc", line, line_index)
+    InstructionsChecks.is_string(lexemes[0], line, line_index)
+    return [
+        lexemes[0].text[1:-1],
+        find_var_set(lexemes[1:], line, line_index),
+    ]
+
+def tokenize_instruction(
+        space: CurSpace | None, lexemes: list[Lexeme], line: str, line_index: int,
+        spaces: SpacesDict, open_ifs: OpenIfs,
+    ) -> tuple[SpacesDict, OpenIfs]:
+    """Tokenizes a single instruction of _main or a custom space\n
+    The instruction becomes a subtoken of the space, or of the innermost if, that still waits for its body
+    """
+    InstructionsChecks.inside_space(space, line, line_index)
+
+    link: str | None = None
+    if lexemes[0].kind == LexemeKind.Link:
+        link = lexemes[0].text[1:-1]
+        lexemes = lexemes[1:]
+    InstructionsChecks.not_only_link(lexemes, line, line_index)
+
+    keyword: Keyword | None = None
+    try:
+        keyword = get_keyword_from_str(lexemes[0].text)
+    except RulesBreak as exc:
+        raise RulesBreak(RULES_BREAK, f"Unknown instruction: {lexemes[0].text}", *put_errored_code_line(line, line_index, lexemes[0].text, 0)) from exc
+
+    def default_call(*args: ...) -> NoReturn:
+        raise SyntaxException(SYNTAX_ERR, f"Unknown instruction at {line_index}", *put_errored_code_line(line, line_index, line.strip(), 0))
+
+    pairs: dict[Keyword, Callable[..., list]] = {
+        Keyword.PrintOut: tokenize_args_stdout,
+        Keyword.Increase: tokenize_args_inc_dec,
+        Keyword.Decrease: tokenize_args_inc_dec,
+        Keyword.Call: tokenize_args_call,
+        Keyword.Goto: tokenize_args_goto,
+        Keyword.IfStatement: tokenize_args_if,
+        Keyword.Describe: tokenize_args_desc,
+    }
+    arguments: list = pairs.get(keyword, default_call)(lexemes[1:], line, line_index)
+
+    body_size: int = 0
+    if keyword == Keyword.IfStatement:
+        body_size = arguments.pop(0)
+
+    token: Token = Token(
+        Action.Instruction,
+        space, # type: ignore
+        keyword,
+        arguments,
+        line_index,
+        line
+    )
+    if link is not None:
+        token.set_link(link)
+
+    if open_ifs:
+        open_ifs[-1][0].add_subtokens([token]) # type: ignore
+        open_ifs[-1][1] -= 1 # type: ignore
+    else:
+        spaces[space].add_subtokens([token]) # type: ignore
+
+    if body_size > 0:
+        open_ifs.append([token, body_size])
+    # an if with a complete body is a complete instruction of the if above it
+    while open_ifs and open_ifs[-1][1] == 0:
+        open_ifs.pop()
+
+    return (spaces, open_ifs)
+
+def close_if_bodies(open_ifs: OpenIfs) -> None:
+    """Called once a space ends
+
+    Raises
+        `SYNTAX_ERR`
+        * If any if still waits for instructions of its body
+    """
+    InstructionsChecks.If.all_bodies_complete(open_ifs)
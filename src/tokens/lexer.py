@@ -0,0 +1,85 @@
+"""Contains a lexer, which splits a normalized line into typed lexemes in a single pass
+
+The scanner is one precompiled regular expression,
+so no per-character work happens in python, and every lexeme remembers its column
+"""
+
+import re
+from enum import Enum, auto
+from typing import NamedTuple
+
+
+__all__ = [
+    'LexemeKind',
+    'Lexeme',
+    'lex',
+]
+
+
+class LexemeKind(Enum):
+    String = auto() # "Hello"
+    Char = auto() # 'a'
+    Array = auto() # {1, 2, 3}
+    Owner = auto() # [_main]
+    Link = auto() # <mdi>
+    Reference = auto() # ~12
+    StdinReference = auto() # &3
+    VarSet = auto() # ->
+    Operator = auto() # <, >, ==, !=, <=, >=
+    Colon = auto() # :
+    StdinArgumentInit = auto() # %
+    Comma = auto() # ,
+    ParenOpen = auto() # (
+    ParenClose = auto() # )
+    Number = auto() # 12
+    Word = auto() # _indent, $_print_hw, int[], stdout, True
+    Unknown = auto() # anything else, e.g. a lonely !
+
+
+class Lexeme(NamedTuple):
+    kind: LexemeKind
+    text: str
+    column: int
+
+
+# chars, which end a word
+_DELIMITERS = r"""\s:%,()\[\]{}"'<>~&"""
+
+# order matters: the first alternative that matches wins
+_SCANNER: re.Pattern[str] = re.compile(
+    r"\s*(?:" + "|".join([
+        r'(?P<String>"(?:[^"\\]|\\.)*"?)',
+        r"(?P<Char>'(?:[^'\\]|\\.)*'?)",
+        r"(?P<Array>\{[^}]*\}?)",
+        r"(?P<Owner>\[[^\]\s]*\])",
+        r"(?P<Link><[^\s<>()]*>)",
+        rf"(?P<Reference>~[^{_DELIMITERS}]*)",
+        rf"(?P<StdinReference>&[^{_DELIMITERS}]*)",
+        r"(?P<VarSet>->)",
+        r"(?P<Operator><=|>=|==|!=|<|>)",
+        r"(?P<Colon>:)",
+        r"(?P<StdinArgumentInit>%)",
+        r"(?P<Comma>,)",
+        r"(?P<ParenOpen>\()",
+        r"(?P<ParenClose>\))",
+        rf"(?P<Word>[^{_DELIMITERS}]+(?:\[\])?)",
+        r"(?P<Unknown>\S)",
+    ]) + ")"
+)
+
+_KINDS: dict[str, LexemeKind] = {kind.name: kind for kind in LexemeKind}
+
+
+def lex(line: str) -> list[Lexeme]:
+    """Splits a line into lexemes, skipping whitespaces\n
+    Words consisting only of digits are given `LexemeKind.Number`
+    """
+    lexemes: list[Lexeme] = []
+    for match in _SCANNER.finditer(line):
+        group: str = match.lastgroup # type: ignore
+        text: str = match.group(group)
+        kind: LexemeKind = _KINDS[group]
+        if kind == LexemeKind.Word and text.isdigit():
+            kind = LexemeKind.Number
+        lexemes.append(Lexeme(kind, text, match.start(group)))
+    return lexemes
@@ -0,0 +1,139 @@
+"""Contains parallel tokenization of a source
+
+Every top-level space (a line starting at column 0) is independent of the others,
+except for the indentation set by _indent and duplicate custom space names.
+The source is split at such lines, blocks are tokenized in worker processes
+and merged back in order, checking duplicates and raising errors the way the sequential tokenizer would
+"""
+
+from collections.abc import Iterable
+from concurrent.futures import Executor, Future
+
+from src.rules import DEFAULT_INDENTATION, ReservedSpace
+from src.tokens.pointer import Pointer, normalize_lines
+from src.tokens.tokenizer import Tokenizer
+from src.tokens.tokenclass import Token
+from src.tokens.lexer import lex
+from src.tokens.utils import get_cs_name
+from src.tokens.checks import PartsChecks
+
+
+__all__ = [
+    'Block',
+    'split_blocks',
+    'parse_to_tokens_parallel',
+]
+
+
+# blocks are sent to workers in chunks of at least that many lines,
+# so that small spaces do not cost a round trip each
+CHUNK_LINES = 2048
+
+
+class Block:
+    """Raw lines of a single top-level space\n
+    `first_line_index` is the number of its first raw line,
+    `first_index` is the amount of non-empty lines before it
+    """
+    __slots__ = ('lines', 'first_line_index', 'first_index')
+
+    def __init__(self, first_line_index: int, first_index: int) -> None:
+        self.lines: list[str] = []
+        self.first_line_index: int = first_line_index
+        self.first_index: int = first_index
+
+    @property
+    def head(self) -> str:
+        return self.lines[0]
+
+
+# spaces of the block with the indentation at its end, or the error it raised
+type BlockResult = tuple[list[tuple[str | ReservedSpace, Token]], int] | Exception
+
+
+def split_blocks(lines: Iterable[str]) -> list[Block]:
+    """Splits raw lines at the ones, which start a space at column 0\n
+    Only comments and trailing whitespaces are looked at here, validation is left to the workers
+    """
+    blocks: list[Block] = []
+    index: int = 0
+    for line_index, line in enumerate(lines, start=1):
+        comment_start: int = line.find("//")
+        text: str = (line if comment_start == -1 else line[:comment_start]).rstrip()
+        if text == "":
+            if blocks:
+                blocks[-1].lines.append(line)
+            continue
+
+        # the very first block might have no space line in front of it
+        if not blocks or text[0] != " ":
+            blocks.append(Block(line_index, index))
+        blocks[-1].lines.append(line)
+        index += 1
+    return blocks
+
+def tokenize_block(block: Block, indentation: int) -> BlockResult:
+    """Tokenizes one block with a fresh tokenizer, returning the error instead of raising it"""
+    try:
+        tokenizer = Tokenizer(Pointer(block.lines, block.first_line_index, block.first_index), indentation)
+        tokenizer.parse_to_tokens()
+        return (list(tokenizer.spaces.items()), tokenizer.indentation)
+    except Exception as exc:
+        return exc
+
+def tokenize_chunk(chunk: list[tuple[Block, int]]) -> list[BlockResult]:
+    """Runs inside a worker process"""
+    return [tokenize_block(block, indentation) for block, indentation in chunk]
+
+def parse_to_tokens_parallel(lines: Iterable[str], executor: Executor) -> list[Token]:
+    """Same result as `Tokenizer.parse_to_tokens`, with blocks tokenized by `executor`"""
+    blocks: list[Block] = split_blocks(lines)
+
+    # _indent is a single line, so it is tokenized right here,
+    # as the blocks after it have to know the indentation in advance
+    results: dict[int, BlockResult] = {}
+    indentations: list[int] = []
+    indentation: int = DEFAULT_INDENTATION
+    for block_index, block in enumerate(blocks):
+        indentations.append(indentation)
+        if block.head.startswith("_indent"):
+            results[block_index] = tokenize_block(block, indentation)
+            indent_result: BlockResult = results[block_index]
+            if not isinstance(indent_result, Exception):
+                indentation = indent_result[1]
+
+    futures: list[tuple[list[int], Future[list[BlockResult]]]] = []
+    chunk: list[int] = []
+    chunk_lines: int = 0
+    for block_index, block in enumerate(blocks):
+        if block_index in results:
+            continue
+        chunk.append(block_index)
+        chunk_lines += len(block.lines)
+        if chunk_lines >= CHUNK_LINES:
+            futures.append((chunk, executor.submit(tokenize_chunk, [(blocks[i], indentations[i]) for i in chunk])))
+            chunk, chunk_lines = [], 0
+    if chunk:
+        futures.append((chunk, executor.submit(tokenize_chunk, [(blocks[i], indentations[i]) for i in chunk])))
+
+    spaces: dict[str | ReservedSpace, Token] = {}
+    pending: dict[int, Future[list[BlockResult]]] = {}
+    positions: dict[int, int] = {}
+    for chunk, future in futures:
+        for position, block_index in enumerate(chunk):
+            pending[block_index] = future
+            positions[block_index] = position
+
+    for block_index, block in enumerate(blocks):
+        # the sequential tokenizer validates the space line
+        # and checks for a duplicate before anything inside the space
+        head: str | None = next(normalize_lines([block.head], block.first_line_index), None)
+        if head is not None and head.startswith("$_"):
+            PartsChecks.CustomSpace.not_a_duplicate(get_cs_name(lex(head)), spaces.keys(), head, block.first_index + 1)
+
+        result: BlockResult = results[block_index] if block_index in results else pending[block_index].result()[positions[block_index]]
+        if isinstance(result, Exception):
+            raise result
+        spaces.update(result[0])
+
+    return list(spaces.values())
@@ -2,6 +2,7 @@
 /src/tokens/parts.py
 """
 
+import sys
 from typing import Literal
 
 from src.rules import (
@@ -10,12 +11,14 @@ from src.rules import (
     get_reserved_space_from_str,
 )
 from src.tokens.pointer import Pointer
+from src.tokens.lexer import Lexeme
 from src.tokens.tokenclass import Token
 from src.tokens.utils import (
     find_indent_value,
     get_link_names_inside_linkRS,
     make_link_subtokens,
     find_var_value,
+    find_stdin_arguments,
 )
 from src.tokens.checks import PartialChecks
 
@@ -36,7 +39,7 @@ type SpacesDict = dict[CurSpace, Token]
 
 
 def tokenize_rs_indent(
-        chars: list[str], line: str, line_index: int, 
+        lexemes: list[Lexeme], line: str, line_index: int, 
         indentation: int, cur_space: CurSpace | None, spaces: SpacesDict
     ) -> tuple[int, CurSpace, SpacesDict]:
     """Finds the value of indentation in _indent rs.\n
@@ -44,9 +47,9 @@ def tokenize_rs_indent(
     where writing after : is allowed and it cannot be followed with blocks under it\n
     """
     
-    PartialChecks.RsIndent.indent_rs_no_colon(chars, line, line_index)
+    PartialChecks.RsIndent.indent_rs_no_colon(lexemes, line, line_index)
 
-    indent_val: str = find_indent_value(chars)
+    indent_val: str = find_indent_value(lexemes)
     PartialChecks.RsIndent.is_value_given(indent_val, line, line_index)
     PartialChecks.RsIndent.indent_val_is_int(indent_val, line, line_index)
     
@@ -104,12 +107,17 @@ def tokenize_rs_links(
     )
 
 def tokenize_rs_other(
-        space_name: str, line: str, line_index: int,
+        space_name: str, lexemes: list[Lexeme], line: str, line_index: int,
         cur_space: CurSpace | None, spaces: SpacesDict,
     ) -> tuple[CurSpace, SpacesDict]:
+    """The rest of rs, only _main can take std input variables with %
+    """
 
     space: ReservedSpace = get_reserved_space_from_str(space_name)
 
+    stdin_arguments: list[tuple[Literal[Keyword.ReferStdinVar], int]] = find_stdin_arguments(lexemes, line, line_index)
+    PartialChecks.RsOther.stdin_arguments_only_for_main(space, stdin_arguments, line, line_index)
+
     cur_space = space
 
     spaces[space] = Token(
@@ -117,7 +125,8 @@ def tokenize_rs_other(
         GLOBAL_OWNER,
         Keyword.SpaceDefine,
         [
-            space
+            space,
+            *stdin_arguments,
         ],
         line_index,
         line
@@ -130,17 +139,17 @@ def tokenize_rs_other(
 
 def tokenize_referenced_var(
         space: Literal[ReservedSpace.Consts, ReservedSpace.Pre],
-        args: list[str], line: str, line_index: int, var_ref: int, var_type: Type, var_owner: str | Literal[ReservedSpace.Main],
+        lexemes: list[Lexeme], line: str, line_index: int, var_ref: int, var_type: Type, var_owner: str | Literal[ReservedSpace.Main],
         spaces: SpacesDict, 
     ) -> SpacesDict:
     """Tokenizes variables and puts them as subtokens to either _consts or _pre.\n
     The referenced variables are those, whose value was copied from another value with ~ (reference keyword)
     """
 
-    reference_value_str: str = args[3][1:]
+    reference_value_str: str = lexemes[3].text[1:]
     reference_value_int: int = 0
 
-    PartialChecks.ReferenceVar.four_args_in_var_defining(args, line, line_index)
+    PartialChecks.ReferenceVar.four_args_in_var_defining(lexemes, line, line_index)
     PartialChecks.ReferenceVar.reference_is_digit(reference_value_str, line, line_index)
     
     reference_value_int = int(reference_value_str)
@@ -162,13 +171,16 @@ def tokenize_referenced_var(
 
 def tokenize_literal_var(
         space: Literal[ReservedSpace.Consts, ReservedSpace.Pre],
-        args: list[str], line: str, line_index: int, var_ref: int, var_type: Type, var_owner: str | Literal[ReservedSpace.Main], 
+        lexemes: list[Lexeme], line: str, line_index: int, var_ref: int, var_type: Type, var_owner: str | Literal[ReservedSpace.Main], 
         spaces: SpacesDict,
     ) -> SpacesDict:
     """Literal values put by manually writing initial values inside _consts or _pre rs
     """
 
-    var_value: str = find_var_value(args, line, line_index, var_type)
+    var_value: str = find_var_value(lexemes, line, line_index, var_type)
+    # values of int, bool and char repeat a lot in big tables, so they share one string
+    if var_type in (Type.Int, Type.Bool, Type.Char):
+        var_value = sys.intern(var_value)
     
     spaces[space].add_subtokens([Token(
         Action.Defining,
@@ -1,59 +1,78 @@
 """Contains a pointer, which simply talking contains a line, where the code is right now to be tokenized
 
+Lines are pulled from the source lazily: normalization and validation of a line
+only happens once the tokenizer moves to it or looks ahead at it
 """
 
-from typing import Self
+import re
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
 
 from src.errors import PointerEnd, TokenizerException, TOKENIZER_ERR
 from src.rules import ALLOWED_CHARS
-from src.errorutils import put_errored_code_line
+from src.errorutils import put_errored_code_column
 
 __all__ = [
-    'Pointer'
+    'Pointer',
+    'normalize_lines',
 ]
 
+
+# how many already passed lines are kept to be able to go back
+POINTER_HISTORY = 64
+
+# matches the first char, which is not allowed, so a whole line is validated in one search
+_DISALLOWED_CHAR: re.Pattern[str] = re.compile(f"[^{re.escape(ALLOWED_CHARS)}]")
+
+
+def normalize_lines(lines: Iterable[str], first_line_index: int = 1) -> Iterator[str]:
+    """Skips empty lines, cuts off comments and trailing whitespaces\n
+    `first_line_index` is the number of the first line in the file, used in error messages
+
+    Raises
+        `TOKENIZER_ERR`
+        * Char, which is not in `rules.ALLOWED_CHARS`
+    """
+    for line_index, line in enumerate(lines, start=first_line_index):
+        comment_start: int = line.find("//")
+        formatted_line: str = (line if comment_start == -1 else line[:comment_start]).rstrip()
+        if formatted_line == "":
+            continue
+
+        disallowed: re.Match[str] | None = _DISALLOWED_CHAR.search(formatted_line)
+        if disallowed is not None:
+            raise TokenizerException(TOKENIZER_ERR, f"Unexpected char: {disallowed.group()}", *put_errored_code_column(line, line_index, disallowed.start()))
+
+        yield formatted_line
+
+
 class Pointer:
-    __instanced = False
-
-    def __new__(cls, lines: list[str]) -> Self:
-        if cls.__instanced:
-            raise TypeError("Cannot create a second pointer")
-        cls.__instanced = True
-        return super().__new__(cls)
-
-    def __init__(self, lines: list[str]) -> None:
-        formatted_lines: list[str] = []
-
-        for index, line in enumerate(lines, start=1):
-            if line.strip() == "":
-                continue
-
-            is_with_comment = False
-            chars: list[str] = list(line)
-            for index, char in enumerate(chars):
-                if not is_with_comment:
-                    if char == "/" and chars[index+1] == "/":
-                        is_with_comment = True
-                        formatted_line: str = line[0:index].rstrip()
-                        formatted_lines.append(formatted_line)
-
-                        for char in list(formatted_line):
-                            if char not in ALLOWED_CHARS:
-                                raise TokenizerException(TOKENIZER_ERR, f"Unexpected char: {char}", *put_errored_code_line(line, index, char, 0))
-           
-            if not is_with_comment:
-                formatted_line: str = line.rstrip()
-                formatted_lines.append(line.rstrip())
-
-                for char in list(formatted_line):
-                    if char not in ALLOWED_CHARS:
-                        raise TokenizerException(TOKENIZER_ERR, f"Unexpected char: {char}", *put_errored_code_line(line, index, char, 0))
-    
-
-
-        self.lines: list[str] = formatted_lines
-        self.index = 0
-        self.cur_line: str = self.lines[self.index]
+    def __init__(self, lines: Iterable[str], first_line_index: int = 1, first_index: int = 0) -> None:
+        """`first_line_index` and `first_index` are used, when the lines are only a part of a file:
+        the number of its first raw line and the amount of non-empty lines before it
+        """
+        self.__source: Iterator[str] = normalize_lines(lines, first_line_index)
+        # lines already pulled from the source, but not reached yet
+        # the list is only compacted from time to time, so peeking at any of them is O(1)
+        self.__ahead: list[str] = []
+        self.__ahead_start: int = 0
+        self.__behind: deque[str] = deque(maxlen=POINTER_HISTORY)
+        self.__marks: list[int] = []
+
+        self.index = first_index
+        self.cur_line: str = next(self.__source, "")
+        self.empty: bool = self.cur_line == ""
+
+    def __fill(self, times: int) -> int:
+        """Pulls lines from the source until `times` lines are buffered ahead\n
+        Returns how many lines are actually available
+        """
+        while len(self.__ahead) - self.__ahead_start < times:
+            next_line: str | None = next(self.__source, None)
+            if next_line is None:
+                break
+            self.__ahead.append(next_line)
+        return min(times, len(self.__ahead) - self.__ahead_start)
 
     def current(self) -> tuple[str, int]:
         return (
@@ -62,22 +81,71 @@ class Pointer:
         )
 
     def move(self) -> None:
-        if self.index == len(self.lines) - 1: 
+        if self.__fill(1) == 0:
             raise PointerEnd()
+        self.__behind.append(self.cur_line)
         self.index += 1
-        self.cur_line = self.lines[self.index]
-    
+        self.cur_line = self.__ahead[self.__ahead_start]
+        self.__ahead_start += 1
+
+        if self.__ahead_start >= POINTER_HISTORY and self.__ahead_start * 2 >= len(self.__ahead):
+            del self.__ahead[:self.__ahead_start]
+            self.__ahead_start = 0
+
     def back(self, times: int) -> None:
-        if self.index - times <= 0: 
-            self.index = 0
-        self.index -= times
-        self.cur_line = self.lines[self.index]
+        """Goes back up to `times` lines, but not further than `POINTER_HISTORY` lines,
+        unless a mark is set (see `mark`)
+        """
+        for _ in range(min(times, len(self.__behind))):
+            if self.__ahead_start > 0:
+                self.__ahead_start -= 1
+                self.__ahead[self.__ahead_start] = self.cur_line
+            else:
+                self.__ahead.insert(0, self.cur_line)
+            self.cur_line = self.__behind.pop()
+            self.index -= 1
+
+    def peek(self, times: int = 1) -> tuple[str, int] | None:
+        """Returns the line `times` lines after the current one with its index,
+        or None if the source ends earlier
+        """
+        if self.__fill(times) < times:
+            return None
+        return (
+            self.__ahead[self.__ahead_start + times - 1],
+            self.index + times + 1
+        )
+
+    def iter_while(self, predicate: Callable[[str], bool]) -> Iterator[tuple[str, int]]:
+        """Yields the following lines with their indexes while `predicate` holds for them\n
+        The pointer itself does not move
+        """
+        times: int = 1
+        while (item := self.peek(times)) is not None and predicate(item[0]):
+            yield item
+            times += 1
 
     def get_next(self, times: int) -> list[tuple[str, int]]:
-        items: list[tuple[str, int]] = []
-        for i in range(1, times+1):
-            try:
-                items.append((self.lines[self.index + i], self.index + i))
-            except KeyError:
-                pass
-        return items
\ No newline at end of file
+        """Returns up to `times` following lines with their indexes\n
+        Prefer `peek` or `iter_while` to scan blocks, as this builds a new list on every call
+        """
+        return [self.peek(i) for i in range(1, self.__fill(times) + 1)] # type: ignore
+
+    def mark(self) -> int:
+        """Remembers the current position to `reset` to it later\n
+        While any mark is held, passed lines are not dropped from the history
+        """
+        if not self.__marks:
+            self.__behind = deque(self.__behind)
+        self.__marks.append(self.index)
+        return self.index
+
+    def reset(self, mark: int) -> None:
+        """Goes back to the position remembered with `mark`"""
+        self.back(self.index - mark)
+
+    def release(self, mark: int) -> None:
+        """Forgets the mark, the history is bounded again once no marks are held"""
+        self.__marks.remove(mark)
+        if not self.__marks:
+            self.__behind = deque(self.__behind, maxlen=POINTER_HISTORY)
@@ -0,0 +1,92 @@
+"""Contains a session, which allows tokenizing any number of sources within one process
+
+Each source gets its own `Pointer` and `Tokenizer`, 
+so the state of a file (indentation, spaces, current space) never leaks into the next one
+"""
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Self
+
+from src.reader import read_source_lines
+from src.tokens.pointer import Pointer
+from src.tokens.tokenizer import Tokenizer
+from src.tokens.tokenclass import Token
+from src.tokens.cache import TokenCache
+from src.tokens.parallel import parse_to_tokens_parallel
+
+
+__all__ = [
+    'Session',
+]
+
+
+class Session:
+    def __init__(self, cache: TokenCache | None = None, jobs: int = 1) -> None:
+        """With `jobs` above 1, top-level spaces of every source are tokenized 
+        by a pool of that many worker processes, which lives as long as the session
+        """
+        # amount of sources tokenized within the session
+        self.tokenized: int = 0
+        self.cache: TokenCache | None = cache
+        self.jobs: int = jobs
+        self.__executor: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts the worker processes down, if there are any"""
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def tokenize(self, lines: Iterable[str]) -> list[Token]:
+        """Tokenizes already read lines of a single source"""
+        tokens: list[Token] = []
+        if self.jobs > 1:
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(self.jobs)
+            tokens = parse_to_tokens_parallel(lines, self.__executor)
+        else:
+            tokens = Tokenizer(Pointer(lines)).parse_to_tokens()
+        self.tokenized += 1
+        return tokens
+
+    def iter_spaces(self, lines: Iterable[str]) -> Iterator[Token]:
+        """Yields top-level spaces of a single source one by one, as soon as each of them is tokenized\n
+        Always tokenizes sequentially, as only that lets the first space out before the last one is read.
+        Instructions of a yielded space are not kept, so memory is bounded by what the consumer holds
+        """
+        yield from Tokenizer(Pointer(lines)).iter_spaces(keep=False)
+        self.tokenized += 1
+
+    def iter_file(self, file_name: str) -> Iterator[Token]:
+        """Streaming version of `tokenize_file`, the cache is not used
+
+        Raises
+            `FileNotFoundError`
+            * If the file does not exist
+        """
+        return self.iter_spaces(read_source_lines(file_name))
+
+    def tokenize_file(self, file_name: str) -> list[Token]:
+        """Reads and tokenizes a single .usl file\n
+        With a cache, unchanged sources are loaded straight from it, skipping the pointer and all checks
+
+        Raises
+            `FileNotFoundError`
+            * If the file does not exist
+        """
+        if self.cache is None:
+            return self.tokenize(read_source_lines(file_name))
+
+        key: str = self.cache.key_for_file(file_name)
+        tokens: list[Token] | None = self.cache.load(key)
+        if tokens is None:
+            tokens = self.tokenize(read_source_lines(file_name))
+            self.cache.store(key, tokens)
+        return tokens
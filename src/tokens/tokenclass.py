@@ -1,6 +1,7 @@
 """Simply contains Token class
 """
 
+import sys
 from typing import Self, Literal
 
 from src.errors import TOKENIZER_ERR, TokenizerException
@@ -21,31 +22,50 @@ type StdinArg = tuple[ReferenceValue, Type]
 type VarArg = tuple[ReferenceValue, Type, VarValue]
 type ReferencedValue = tuple[Literal[Keyword.Refer], ReferenceValue]
 type ReferencedValueArg = tuple[ReferenceValue, Type, ReferencedValue]
+type StdinReferencedValue = tuple[Literal[Keyword.ReferStdinVar], ReferenceValue]
+type VarSetArg = tuple[Literal[Keyword.VarSet], ReferenceValue]
 
-type TokenArguments = list[StdinArg | VarArg | OtherArg | Keyword | ReservedSpace | ReferencedValueArg]
+type TokenArguments = list[StdinArg | VarArg | OtherArg | Keyword | ReservedSpace | ReferencedValueArg | ReferencedValue | StdinReferencedValue | VarSetArg]
 
 
 class Token:
+    # no per-instance __dict__: _consts and _pre can hold hundreds of thousands of tokens
+    __slots__ = ('line_index', 'line', 'action', 'owner', 'keyword', 'link', 'arguments', '_subtokens')
+
     def __init__(self, action: Action, owner: str | ReservedSpace, keyword: Keyword, arguments: TokenArguments, line_index: int, line: str) -> None:
         self.line_index: int = line_index
+        # the very same string object, that the pointer holds, no copy is made
         self.line: str = line
             
         self.action: Action = action
-        self.owner: str | ReservedSpace = owner
+        # owners repeat across thousands of tokens, so a single copy of each name is kept
+        self.owner: str | ReservedSpace = sys.intern(owner) if isinstance(owner, str) else owner
         self.keyword: Keyword = keyword
         self.link: str | None = None
         self.arguments: TokenArguments = arguments
-        self.subtokens: list[Self] = []
+        # most tokens never get subtokens, so the list is only made when it is asked for
+        self._subtokens: list[Self] | None = None
 
         # for self.arguments:
         # tuple[Type, str] -> variable type with its string annotation
-        # tuple[Keyword, int] -> when referencing variable with reference key (~)
+        # tuple[Keyword, int] -> when referencing variable with reference key (~), 
+        #                        std input variable (&) or setting a variable (->)
         # Keyword -> additional operations
         # ReservedSpace -> when defining spaces
         # str -> for other cases
 
+    @property
+    def subtokens(self) -> list[Self]:
+        if self._subtokens is None:
+            self._subtokens = []
+        return self._subtokens
+
+    @subtokens.setter
+    def subtokens(self, subtokens: list[Self]) -> None:
+        self._subtokens = subtokens
+
     def __repr__(self) -> str:
-        return f"line_index={self.line_index}, line={self.line}\naction={self.action}, owner={self.owner}, keyword={self.keyword}, link={self.link}, arguments={self.arguments}, {len(self.subtokens)} subtokens\n"
+        return f"line_index={self.line_index}, line={self.line}\naction={self.action}, owner={self.owner}, keyword={self.keyword}, link={self.link}, arguments={self.arguments}, {len(self._subtokens or ())} subtokens\n"
     
     def set_link(self, link: str) -> Self:
         if self.action != Action.Instruction:
@@ -1,5 +1,5 @@
 import pprint, re # type: ignore
-from typing import Self
+from collections.abc import Iterator
 
 from src.rules import *
 from src.errors import (
@@ -8,9 +8,11 @@ from src.errors import (
 )
 from src.errorutils import put_errored_code_line
 from src.tokens.pointer import Pointer
+from src.tokens.lexer import Lexeme, lex
 from src.tokens.utils import *
 from src.tokens.tokenclass import Token
 from src.tokens.parts import *
+from src.tokens.instructions import tokenize_instruction, close_if_bodies, OpenIfs
 from src.tokens.checks import TokenizerChecks
         
 
@@ -20,29 +22,38 @@ __all__ = [
 
 
 class Tokenizer:
-    __instanced = False         
-
-    def __new__(cls, pointer: Pointer) -> Self:
-        if cls.__instanced:
-            raise TypeError("Cannot create a second lexer")
-        cls.__instanced = True
-        return super().__new__(cls)
-    
-    def __init__(self, pointer: Pointer) -> None:
+    def __init__(self, pointer: Pointer, indentation: int = DEFAULT_INDENTATION) -> None:
         self.pointer: Pointer = pointer
 
         self.line_index: int = 0
         self.line: str = ""
 
         self.line, self.line_index = self.pointer.current()
-        self.args: list[str] = self.line.strip().split(' ')
-        self.chars: list[str] = [x for x in list(self.line) if x != " "]
+        self.lexemes: list[Lexeme] = lex(self.line)
 
-        self.indentation: int = DEFAULT_INDENTATION
+        self.indentation: int = indentation
         self.spaces: dict[str | ReservedSpace, Token] = {}
         self.cur_space: str | ReservedSpace | None = None
+        self.open_ifs: OpenIfs = []
 
     def parse_to_tokens(self) -> list[Token]:
+        for _ in self.iter_spaces():
+            pass
+
+        return list(self.spaces.values())
+
+    def iter_spaces(self, keep: bool = True) -> Iterator[Token]:
+        """Yields every top-level space as soon as its block is complete,
+        that is once the next space starts or the source ends\n
+        Without `keep` a yielded space is replaced in `self.spaces` by a token with its name and owner only,
+        duplicates are still found, but instructions are held by the consumer alone, so memory stays bounded by it
+        """
+        if self.pointer.empty:
+            return
+
+        # the space, which the lines are being added to
+        space: Token | None = None
+
         while True:
             try:
                 # any line containing space 
@@ -51,15 +62,25 @@ class Tokenizer:
                 # cannot be anything else than space defining
                 TokenizerChecks.is_valid_space_indentation(self.line, self.line_index)
 
+                # a new space means the previous one is complete
+                if space is not None and self.line.startswith(("_", "$_")):
+                    close_if_bodies(self.open_ifs)
+                    yield space
+                    if not keep:
+                        self.__forget(space)
+                    space = None
+
                 # reserved spaces
                 # all of them are specified in src/rules.py
                 # also, they are stored in ALL_RESERVED_SPACES_AS_STR and in ReservedSpace enum
                 if self.line.startswith("_"):
-                    self.indentation, self.cur_space, self.spaces = tokenize_reserved_spaces(self.chars, self.line, self.line_index, self.pointer, self.indentation, self.cur_space, self.spaces)
+                    self.indentation, self.cur_space, self.spaces = tokenize_reserved_spaces(self.lexemes, self.line, self.line_index, self.pointer, self.indentation, self.cur_space, self.spaces)
+                    space = self.spaces[self.cur_space]
 
                 # handling custom spaces
                 elif self.line.startswith('$_'):
-                    self.cur_space, self.spaces = tokenize_custom_spaces(self.chars, self.args, self.line, self.line_index, self.cur_space, self.spaces)
+                    self.cur_space, self.spaces = tokenize_custom_spaces(self.lexemes, self.line, self.line_index, self.cur_space, self.spaces)
+                    space = self.spaces[self.cur_space]
 
                 # handling definitions and instructions
                 elif self.line.startswith(' '*self.indentation):
@@ -71,20 +92,16 @@ class Tokenizer:
                     # handling _consts rs
                     match self.cur_space:
                         case ReservedSpace.Consts | ReservedSpace.Pre:
-                            self.spaces = tokenize_subtokens_var(self.cur_space, self.args, self.line, self.line_index, self.spaces)
+                            self.spaces = tokenize_subtokens_var(self.cur_space, self.lexemes, self.line, self.line_index, self.spaces)
                         case ReservedSpace.Pre:
-                            self.spaces = tokenize_subtokens_var(self.cur_space, self.args, self.line, self.line_index, self.spaces)
+                            self.spaces = tokenize_subtokens_var(self.cur_space, self.lexemes, self.line, self.line_index, self.spaces)
                         case ReservedSpace.Stdin:
-                            self.spaces = tokenize_subtokens_stdin(self.args, self.line, self.line_index, self.spaces)
+                            self.spaces = tokenize_subtokens_stdin(self.lexemes, self.line, self.line_index, self.spaces)
                         case ReservedSpace.Links | ReservedSpace.Indent:
                             pass # it is already handled above with src.tokens.partial.tokenize_reserved_spaces()
-                        case ReservedSpace.Main:
-                            # TODO: to implement
-                            pass 
                         case _:
-                            # custom spaces
-                            # TODO: to implement
-                            pass
+                            # _main and custom spaces
+                            self.spaces, self.open_ifs = tokenize_instruction(self.cur_space, self.lexemes, self.line, self.line_index, self.spaces, self.open_ifs)
 
                 else:
                     TokenizerChecks.invalid_indentations(self.indentation, self.line, self.line_index)
@@ -93,11 +110,15 @@ class Tokenizer:
 
                 self.pointer.move()
                 self.line, self.line_index = self.pointer.current()
-                self.args: list[str] = self.line.strip().split(' ')
-                self.chars: list[str] = [x for x in list(self.line) if x != " "]
+                self.lexemes = lex(self.line)
 
             except PointerEnd:   
                 break
 
-        return list(self.spaces.values())
+        close_if_bodies(self.open_ifs)
+        if space is not None:
+            yield space
 
+    def __forget(self, space: Token) -> None:
+        """Keeps only what duplicate and ownership checks need of a space, that is yielded already"""
+        self.spaces[self.cur_space] = Token(space.action, space.owner, space.keyword, space.arguments, space.line_index, space.line) # type: ignore
@@ -12,6 +12,7 @@ from src.rules import (
     Action, Keyword, ReservedSpace, Type
 )
 from src.tokens.pointer import Pointer
+from src.tokens.lexer import Lexeme, LexemeKind, lex
 from src.errorutils import put_errored_code_line
 from src.tokens.tokenclass import Token
 from src.tokens.checks import UtilsChecks
@@ -19,41 +20,64 @@ from src.tokens.checks import UtilsChecks
 
 __all__ = [
     'get_rs_name',
+    'find_stdin_arguments',
     'find_indent_value',
     'get_link_names_inside_linkRS',
     'make_link_subtokens',
 ]
 
 
-def get_rs_name(chars: list[str], line: str, line_index: int) -> str:
+def get_rs_name(lexemes: list[Lexeme], line: str, line_index: int) -> str:
     """Finds space name of Reserved space given as string\n
-    : or % breaks search as it is encountered, the name is actually finished
+    It is the first lexeme, as : or % cannot be a part of a word
 
     Raises
         `SYNTAX_ERR`
         * Not allowed char (see `rules.ALLOWED_RS_CHARS`)
     """
-    space_name = str()
-    for char in chars:
-        if char in (":", "%"): break
-        UtilsChecks.allowed_rs_chars(space_name, char, line, line_index)
-        space_name += char
+    space_name: str = lexemes[0].text
+    UtilsChecks.allowed_rs_chars(space_name, line, line_index)
     return space_name
 
-def get_cs_name(args: list[str]) -> str:
+def find_stdin_arguments(lexemes: list[Lexeme], line: str, line_index: int) -> list[tuple[Literal[Keyword.ReferStdinVar], int]]:
+    """Finds std input variables, that a space takes, e.g. _main % (&3, &4):\n
+    A space without % takes nothing
+
+    Raises
+        `SYNTAX_ERR`
+        * No parentheses after %
+        * Anything but &N separated with commas inside them
+    """
+    if len(lexemes) < 2 or lexemes[1].kind != LexemeKind.StdinArgumentInit:
+        UtilsChecks.StdinArguments.nothing_before_colon(lexemes, line, line_index)
+        return []
+
+    UtilsChecks.StdinArguments.in_parentheses(lexemes, line, line_index)
+
+    arguments: list[tuple[Literal[Keyword.ReferStdinVar], int]] = []
+    # between ( and ):
+    for position, lexeme in enumerate(lexemes[3:-2]):
+        if position % 2 == 1:
+            UtilsChecks.StdinArguments.is_comma(lexeme, line, line_index)
+            continue
+        UtilsChecks.StdinArguments.is_stdin_reference(lexeme, line, line_index)
+        arguments.append((Keyword.ReferStdinVar, int(lexeme.text[1:])))
+    UtilsChecks.StdinArguments.not_ending_with_comma(lexemes, line, line_index)
+
+    return arguments
+
+def get_cs_name(lexemes: list[Lexeme]) -> str:
     """Finds the name of custom space, 
-    as it starts with $, the first symbol is removed until it encounters '[',
-    which signals that it is time for mentioning owner of the function
+    as it starts with $, the first symbol is removed from the first lexeme,
+    the owner ('[...]') is always a separate lexeme
     """
-    return args[0][1:]
+    return lexemes[0].text[1:]
 
-def find_indent_value(chars: list[str]) -> str:
+def find_indent_value(lexemes: list[Lexeme]) -> str:
     """Finds the value of indentation in the code\n
-    In a list of chars\n
-    Chars should not include any spaces\n
-    The value will be at the index of len("_indent")
+    It is everything after the colon, which follows _indent
     """
-    return "".join(chars[len("_indent")+1:])
+    return "".join(lexeme.text for lexeme in lexemes[2:])
 
 def get_link_names_inside_linkRS(pointer: Pointer, indentation: int) -> list[str]:
     """Finds all links written inside _links Reserved space
@@ -68,12 +92,10 @@ def get_link_names_inside_linkRS(pointer: Pointer, indentation: int) -> list[str
         * Two similar links
     """
     links: list[str] = []
-    index: int = 1
-    next_line, next_line_index = pointer.get_next(index)[index-1]
 
-    while next_line.startswith(' '*indentation): # type: ignore
+    for next_line, next_line_index in pointer.iter_while(lambda line: line.startswith(' '*indentation)):
 
-        line_args: list[str] = [x.strip() for x in next_line.split(',')]
+        line_args: list[str] = [lexeme.text for lexeme in lex(next_line) if lexeme.kind != LexemeKind.Comma]
 
         for arg in line_args:
 
@@ -84,8 +106,6 @@ def get_link_names_inside_linkRS(pointer: Pointer, indentation: int) -> list[str
             UtilsChecks.LinkName.not_a_duplicate(arg, links, next_line, next_line_index)
 
         links.extend(line_args)
-        index += 1
-        next_line, next_line_index = pointer.get_next(index)[index-1]
 
     return links
 
@@ -106,7 +126,7 @@ def make_link_subtokens(links: list[str], line: str, line_index: int)-> list[Tok
     ]
 
 def find_cs_owner(
-        chars: list[str], args: list[str], line: str, line_index: int, space_name: str
+        lexemes: list[Lexeme], line: str, line_index: int, space_name: str
     ) -> str | Literal[ReservedSpace.Main]:
     """Tries to find owner of the custom space (which are defined by initial $ symbol)
     
@@ -115,18 +135,17 @@ def find_cs_owner(
         * No owner found
     """
 
-    # removing from args[1] (which is supposed to be just owner)
     try:
-        UtilsChecks.FindCsOwner.owner_not_after_colon(chars, space_name, line, line_index)
-        UtilsChecks.FindCsOwner.follows_with_owner(args, space_name, line, line_index)        
-        
-        args[1] = args[1][1:-1]
+        UtilsChecks.FindCsOwner.owner_not_after_colon(lexemes, space_name, line, line_index)
+        UtilsChecks.FindCsOwner.follows_with_owner(lexemes, space_name, line, line_index)        
     except IndexError:
-        raise SyntaxException(SYNTAX_ERR, f"Missing owner", *put_errored_code_line(line, line_index, chars[len(space_name)], -1))
+        raise SyntaxException(SYNTAX_ERR, f"Missing owner", *put_errored_code_line(line, line_index, lexemes[0].text, -1))
     
-    return args[1] if args[1] != "_main" else ReservedSpace.Main
+    # removing [ and ] around the owner
+    owner_name: str = lexemes[1].text[1:-1]
+    return owner_name if owner_name != "_main" else ReservedSpace.Main
 
-def find_var_value_simpletypes(args: list[str], line: str, line_index: int, var_type: Literal[Type.Int, Type.Bool, Type.Char]) -> str:
+def find_var_value_simpletypes(lexemes: list[Lexeme], line: str, line_index: int, var_type: Literal[Type.Int, Type.Bool, Type.Char]) -> str:
     """Finds a value of variable inside _consts or _pre for bool, int, char
 
     Raises 
@@ -136,44 +155,51 @@ def find_var_value_simpletypes(args: list[str], line: str, line_index: int, var_
         * Invalid char declaration (must be with singular apostrophe, from both sides)
     """
     
-    UtilsChecks.VarValue.Simpletypes.four_args_in_var_defining(args, line, line_index)
+    UtilsChecks.VarValue.four_args_in_var_defining(lexemes, line, line_index)
+
+    value: str = lexemes[3].text
     
     match var_type:
         case Type.Int:
-            UtilsChecks.VarValue.Simpletypes.for_int_is_integer(args[3], line, line_index)
+            UtilsChecks.VarValue.Simpletypes.for_int_is_integer(value, line, line_index)
         case Type.Bool:
-            UtilsChecks.VarValue.Simpletypes.for_bool_is_bool(args[3], line, line_index)
+            UtilsChecks.VarValue.Simpletypes.for_bool_is_bool(value, line, line_index)
         case Type.Char:
-            UtilsChecks.VarValue.Simpletypes.for_char_is_char(args[3], line, line_index)
+            UtilsChecks.VarValue.Simpletypes.for_char_is_char(value, line, line_index)
             
-    return args[3]
+    return value
 
-def find_var_value_intarray(args: list[str], line: str, line_index: int, *argc: ...) -> str:
-    """Finds a value of variable inside _consts or _pre for int[]
+def find_var_value_intarray(lexemes: list[Lexeme], line: str, line_index: int, *argc: ...) -> str:
+    """Finds a value of variable inside _consts or _pre for int[]\n
+    Spaces inside braces are removed from the value
 
     Raises
         `SYNTAX_ERR`
         * Not declared with braces "{}"
         * A non-digit included inside braces
     """
-    arr_value_str: str = "".join(args[3:]).strip()
+    UtilsChecks.VarValue.four_args_in_var_defining(lexemes, line, line_index)
+
+    arr_value_str: str = lexemes[3].text.replace(" ", "")
     UtilsChecks.VarValue.Intarray.is_valid_declaration(arr_value_str, line, line_index)
     arr_values: list[str] = arr_value_str[1:-1].split(',')
     UtilsChecks.VarValue.Intarray.all_values_int(arr_values, line, line_index)
     return arr_value_str
 
-def find_var_value_string(args: list[str], line: str, line_index: int, *argc: ...) -> str:
+def find_var_value_string(lexemes: list[Lexeme], line: str, line_index: int, *argc: ...) -> str:
     """Finds a value of variable inside _consts or _pre for char[] (which is string)
 
     Raises
         `SYNTAX_ERR`
         * String not declared with double-apostrophe, from both sides
     """
-    string_str: str = " ".join(args[3:]).strip()
+    UtilsChecks.VarValue.four_args_in_var_defining(lexemes, line, line_index)
+
+    string_str: str = lexemes[3].text
     UtilsChecks.VarValue.is_valid_string_declaration(string_str, line, line_index)
     return string_str[1:-1]
 
-def find_var_value(args: list[str], line: str, line_index: int, var_type: Type) -> str:
+def find_var_value(lexemes: list[Lexeme], line: str, line_index: int, var_type: Type) -> str:
     def default_call(*args: ...) -> NoReturn:
         raise TokenizerException(TOKENIZER_ERR, f"Unknown type at {line_index}", *put_errored_code_line(line, line_index, line, 0))
 
@@ -185,4 +211,4 @@ def find_var_value(args: list[str], line: str, line_index: int, var_type: Type)
         Type.String: find_var_value_string,
     }
 
-    return pairs.get(var_type, default_call)(args, line, line_index, var_type) 
\ No newline at end of file
+    return pairs.get(var_type, default_call)(lexemes, line, line_index, var_type) 
\ No newline at end of file
@@ -0,0 +1,400 @@
+"""Contains a transpiler of compiled programs into python source, which is compiled into a code object
+
+Every space becomes a python function, int, bool and char registers become its local variables,
+and registers, that are never written, become constants.
+Locals are python ints, so every one is checked to fit into 64 bits as soon as it changes, as a register would be.
+A goto back to an earlier link becomes a `while True` loop with `continue`, ifs become ifs.
+Spaces, where gotos cannot be expressed with loops (e.g. gotos forward), fall back to a loop over basic blocks.
+
+Code objects are cached with marshal in __uslcache__ next to token entries
+"""
+
+import os, marshal, hashlib
+from importlib.util import MAGIC_NUMBER
+from types import CodeType
+
+from src.rules import Type
+from src.compiler import Opcode, Program, BOOL_NAMES, SCALAR_TYPE_VALUES, INT_MIN, INT_MAX, FUSED_OPCODES, COUNT_OPCODES, NEXT_OPCODES
+from src.memo import find_pure_spaces
+from src.tokens.cache import TokenCache, tokenizer_fingerprint
+
+
+__all__ = [
+    'transpile',
+    'compile_program',
+    'CodeCache',
+    'ENTRY_NAME',
+    'TRANSPILER_VERSION',
+    'space_function',
+]
+
+
+# bump it when the generated code changes without touching the modules below
+TRANSPILER_VERSION = 1
+
+CODE_ENTRY_SUFFIX = ".code"
+
+# names, that the generated code expects in its globals, are given by `VirtualMachine.use_code`:
+#   R - int, bool and char registers, S - encoded char[] values, A - int[] values,
+#   write - writes bytes to the output, describe(pc) - runs desc at pc,
+#   BOOL_BYTES - encoded names of bools, format_array - encodes an int[],
+#   memo_get(index) - key of a call of a pure space, None after a hit, memo_put(index, key) - caches its results
+ENTRY_NAME = "space_0"
+
+COMPARISON_SYMBOLS: dict[Opcode, str] = {
+    Opcode.LT: "<",
+    Opcode.GT: ">",
+    Opcode.LE: "<=",
+    Opcode.GE: ">=",
+    Opcode.EQ: "==",
+    Opcode.NE: "!=",
+}
+FUSED_SYMBOLS: dict[Opcode, str] = {FUSED_OPCODES[op]: symbol for op, symbol in COMPARISON_SYMBOLS.items()}
+COUNT_SYMBOLS: dict[Opcode, str] = {COUNT_OPCODES[op]: COMPARISON_SYMBOLS[op] for op in COUNT_OPCODES}
+NEXT_SYMBOLS: dict[Opcode, str] = {NEXT_OPCODES[op]: COMPARISON_SYMBOLS[op] for op in NEXT_OPCODES}
+
+_SRC_DIR: str = os.path.dirname(os.path.abspath(__file__))
+
+
+def space_function(index: int) -> str:
+    return f"space_{index}"
+
+
+class SpaceTranspiler:
+    """Transpiles instructions of a single space, which occupies [start, end) of the program"""
+    def __init__(
+        self, program: Program, index: int, start: int, end: int, constants: dict[int, int], written: set[int], scratch: set[int], pure: set[int]
+    ) -> None:
+        self.program: Program = program
+        self.index: int = index
+        self.start: int = start
+        self.end: int = end
+        # scalar slots, that are never written, with their values
+        self.constants: dict[int, int] = constants
+        # scalar slots, that are written anywhere in the program
+        self.written: set[int] = written
+        # slots, that only hold results of ifs for the jump right after them
+        self.scratch: set[int] = scratch
+        # spaces, whose calls go through their caches
+        self.pure: set[int] = pure
+        self.lines: list[str] = []
+
+        self.used: set[int] = set()
+        self.dirty: set[int] = set()
+        for pc in range(start, end):
+            op: int = program.ops[pc]
+            if op in (Opcode.INC, Opcode.DEC):
+                self.used.update((program.arg_a[pc], program.arg_b[pc]))
+                self.dirty.add(program.arg_a[pc])
+            elif op in COMPARISON_SYMBOLS:
+                self.used.update((program.arg_b[pc], program.arg_c[pc]))
+                if program.arg_a[pc] not in scratch:
+                    self.used.add(program.arg_a[pc])
+                    self.dirty.add(program.arg_a[pc])
+            elif op in FUSED_SYMBOLS:
+                self.used.update((program.arg_a[pc], program.arg_b[pc]))
+            elif op in COUNT_SYMBOLS or op in NEXT_SYMBOLS:
+                self.used.update((program.arg_a[pc], program.arg_b[pc]))
+                self.dirty.add(program.arg_a[pc])
+            elif op == Opcode.STDOUT and program.arg_b[pc] in SCALAR_TYPE_VALUES:
+                self.used.add(program.arg_a[pc])
+            elif op == Opcode.DESC and program.arg_c[pc] in SCALAR_TYPE_VALUES:
+                self.used.add(program.arg_a[pc])
+        self.used -= constants.keys()
+        self.dirty -= constants.keys()
+
+    # expressions
+
+    def operand(self, slot: int) -> str:
+        return str(self.constants[slot]) if slot in self.constants else f"r{slot}"
+
+    def comparison(self, pc: int) -> str:
+        program: Program = self.program
+        op: int = program.ops[pc]
+        if op in FUSED_SYMBOLS or op in COUNT_SYMBOLS or op in NEXT_SYMBOLS:
+            symbol: str = (FUSED_SYMBOLS | COUNT_SYMBOLS | NEXT_SYMBOLS)[op] # type: ignore
+            return f"{self.operand(program.arg_a[pc])} {symbol} {self.operand(program.arg_b[pc])}"
+        return f"{self.operand(program.arg_b[pc])} {COMPARISON_SYMBOLS[program.ops[pc]]} {self.operand(program.arg_c[pc])}" # type: ignore
+
+    # statements
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append("    " * depth + line)
+
+    def store(self, depth: int) -> None:
+        """Writes changed locals back, before the registers are seen by anyone else"""
+        for slot in sorted(self.dirty):
+            self.emit(depth, f"R[{slot}] = r{slot}")
+
+    def reload(self, depth: int, slots: set[int]) -> None:
+        for slot in sorted(slots):
+            self.emit(depth, f"r{slot} = R[{slot}]")
+
+    def checked(self, depth: int, slot: int) -> None:
+        """Raises OverflowError, as storing to the registers would, when the local leaves 64 bits"""
+        self.emit(depth, f"if not {INT_MIN} <= r{slot} <= {INT_MAX}: raise OverflowError")
+
+    def simple(self, pc: int, depth: int) -> None:
+        """Instructions, that do not change the control flow (and calls, which return)"""
+        program: Program = self.program
+        op: int = program.ops[pc]
+        a: int = program.arg_a[pc]
+        b: int = program.arg_b[pc]
+        match op:
+            case Opcode.INC:
+                self.emit(depth, f"r{a} += {self.operand(b)}")
+                self.checked(depth, a)
+            case Opcode.DEC:
+                self.emit(depth, f"r{a} -= {self.operand(b)}")
+                self.checked(depth, a)
+            case Opcode.LT | Opcode.GT | Opcode.LE | Opcode.GE | Opcode.EQ | Opcode.NE:
+                self.emit(depth, f"r{a} = {self.comparison(pc)}")
+            case Opcode.STDOUT:
+                self.emit(depth, self.stdout(a, b))
+            case Opcode.DESC:
+                self.emit(depth, f"describe({pc})")
+                if program.arg_c[pc] in SCALAR_TYPE_VALUES:
+                    self.emit(depth, f"r{a} = R[{a}]")
+            case Opcode.CALL:
+                self.store(depth)
+                if b in self.pure:
+                    # looked up here, not in a wrapper, so a call is still a single python frame
+                    self.emit(depth, f"memo_key = memo_get({b})")
+                    self.emit(depth, "if memo_key is not None:")
+                    self.emit(depth + 1, f"{space_function(b)}()")
+                    self.emit(depth + 1, f"memo_put({b}, memo_key)")
+                else:
+                    self.emit(depth, f"{space_function(b)}()")
+                # the called space might have changed any register
+                self.reload(depth, self.used & self.written)
+            case Opcode.HALT | Opcode.RET:
+                self.store(depth)
+                self.emit(depth, "return")
+            case _ if op in COUNT_SYMBOLS:
+                self.count(pc, depth)
+
+    def count(self, pc: int, depth: int) -> None:
+        """The whole counted loop in a single step, as `src.vm.count_to`"""
+        program: Program = self.program
+        op: int = program.ops[pc]
+        counter: str = f"r{program.arg_a[pc]}"
+        bound: str = self.operand(program.arg_b[pc])
+        step: int = abs(self.constants[program.arg_c[pc]])
+        self.emit(depth, f"if {self.comparison(pc)}:")
+        match op:
+            case Opcode.COUNT_LT:
+                self.emit(depth + 1, f"{counter} = {bound}" if step == 1 else f"{counter} += -(({counter} - {bound}) // {step}) * {step}")
+            case Opcode.COUNT_LE:
+                self.emit(depth + 1, f"{counter} = {bound} + 1" if step == 1 else f"{counter} += (({bound} - {counter}) // {step} + 1) * {step}")
+            case Opcode.COUNT_GT:
+                self.emit(depth + 1, f"{counter} = {bound}" if step == 1 else f"{counter} -= -(({bound} - {counter}) // {step}) * {step}")
+            case Opcode.COUNT_GE:
+                self.emit(depth + 1, f"{counter} = {bound} - 1" if step == 1 else f"{counter} -= (({counter} - {bound}) // {step} + 1) * {step}")
+        self.checked(depth + 1, program.arg_a[pc])
+
+    def next(self, pc: int, depth: int) -> str:
+        """Steps the counter of NEXT_* at pc, returns the condition of going back"""
+        program: Program = self.program
+        self.emit(depth, f"r{program.arg_a[pc]} {'+' if program.ops[pc] in (Opcode.NEXT_LT, Opcode.NEXT_LE) else '-'}= 1")
+        self.checked(depth, program.arg_a[pc])
+        return self.comparison(pc)
+
+    def stdout(self, slot: int, type_value: int) -> str:
+        program: Program = self.program
+        if type_value == Type.String.value:
+            # char[] values are only changed by std input
+            if all(slot != stdin_slot or stdin_type != Type.String for stdin_slot, stdin_type in program.stdin):
+                return f"write({program.char_arrays[slot].encode()!r})"
+            return f"write(S[{slot}])"
+        if type_value == Type.IntArray.value:
+            return f"write(format_array(A[{slot}]))"
+        if slot in self.constants:
+            value: int = self.constants[slot]
+            text: str = str(value) if type_value == Type.Int.value else chr(value) if type_value == Type.Char.value else BOOL_NAMES[value]
+            return f"write({text.encode()!r})"
+        if type_value == Type.Int.value:
+            return f"write(b'%d' % r{slot})"
+        if type_value == Type.Char.value:
+            return f"write(chr(r{slot}).encode())"
+        return f"write(BOOL_BYTES[r{slot}])"
+
+    # control flow
+
+    def structure(self) -> tuple[dict[int, int], dict[int, int]] | None:
+        """Loops (header -> end) and ifs (start of the compare -> end of the body) of the space,
+        None if they do not nest, or a goto cannot become `continue` of its innermost loop
+        """
+        program: Program = self.program
+        loops: dict[int, int] = {}
+        ifs: dict[int, int] = {}
+        back_edges: list[tuple[int, int]] = []
+        for pc in range(self.start, self.end):
+            op: int = program.ops[pc]
+            if op == Opcode.JUMP_IF_FALSE:
+                if pc == self.start or program.ops[pc - 1] not in COMPARISON_SYMBOLS or program.arg_b[pc] <= pc:
+                    return None
+                ifs[pc - 1] = program.arg_b[pc]
+            elif op in FUSED_SYMBOLS:
+                if program.arg_c[pc] <= pc:
+                    return None
+                ifs[pc] = program.arg_c[pc]
+            elif op == Opcode.JUMP or op in NEXT_SYMBOLS:
+                target: int = program.arg_a[pc] if op == Opcode.JUMP else program.arg_c[pc]
+                if target > pc or target < self.start:
+                    return None
+                loops[target] = max(loops.get(target, 0), pc + 1)
+                back_edges.append((pc, target))
+
+        # a goto back to the compare of an if, from inside its body, is not a loop inside or around the if
+        if any(start in ifs and ifs[start] > end for start, end in loops.items()):
+            return None
+
+        regions: list[tuple[int, int]] = sorted(
+            [(start, end) for start, end in loops.items()] + [(start, end) for start, end in ifs.items()],
+            key=lambda region: (region[0], -region[1])
+        )
+        stack: list[tuple[int, int]] = []
+        for start, end in regions:
+            while stack and stack[-1][1] <= start:
+                stack.pop()
+            if stack and end > stack[-1][1]:
+                return None
+            stack.append((start, end))
+
+        for pc, target in back_edges:
+            innermost: int = max((header for header, end in loops.items() if header <= pc < end), default=-1)
+            if innermost != target:
+                return None
+        return (loops, ifs)
+
+    def structured(self, lo: int, hi: int, depth: int, loops: dict[int, int], ifs: dict[int, int], inside_loop: int | None = None) -> None:
+        pc: int = lo
+        while pc < hi:
+            if pc in loops and not (pc == lo and inside_loop == pc):
+                self.emit(depth, "while True:")
+                self.structured(pc, loops[pc], depth + 1, loops, ifs, inside_loop=pc)
+                self.emit(depth + 1, "break")
+                pc = loops[pc]
+                continue
+
+            if pc in ifs:
+                # a fused compare is its own jump
+                body: int = pc + 1
+                if self.program.ops[pc] in FUSED_SYMBOLS:
+                    self.emit(depth, f"if {self.comparison(pc)}:")
+                elif self.program.arg_a[pc] in self.scratch:
+                    self.emit(depth, f"if {self.comparison(pc)}:")
+                    body += 1
+                else:
+                    self.emit(depth, f"r{self.program.arg_a[pc]} = {self.comparison(pc)}")
+                    self.emit(depth, f"if r{self.program.arg_a[pc]}:")
+                    body += 1
+                body_start: int = len(self.lines)
+                self.structured(body, ifs[pc], depth + 1, loops, ifs)
+                if len(self.lines) == body_start:
+                    self.emit(depth + 1, "pass")
+                pc = ifs[pc]
+                continue
+
+            if self.program.ops[pc] == Opcode.JUMP:
+                self.emit(depth, "continue")
+            elif self.program.ops[pc] in NEXT_SYMBOLS:
+                self.emit(depth, f"if {self.next(pc, depth)}:")
+                self.emit(depth + 1, "continue")
+            else:
+                self.simple(pc, depth)
+            pc += 1
+
+    def blocks(self, depth: int) -> None:
+        """Fallback for any control flow: a loop, which picks the basic block to run by its offset"""
+        program: Program = self.program
+        leaders: set[int] = {self.start}
+        for pc in range(self.start, self.end):
+            if program.ops[pc] == Opcode.JUMP:
+                leaders.update((program.arg_a[pc], pc + 1))
+            elif program.ops[pc] == Opcode.JUMP_IF_FALSE:
+                leaders.update((program.arg_b[pc], pc + 1))
+            elif program.ops[pc] in FUSED_SYMBOLS or program.ops[pc] in NEXT_SYMBOLS:
+                leaders.update((program.arg_c[pc], pc + 1))
+        starts: list[int] = sorted(leader for leader in leaders if self.start <= leader < self.end)
+
+        self.emit(depth, f"block = {self.start}")
+        self.emit(depth, "while True:")
+        for position, start in enumerate(starts):
+            end: int = starts[position + 1] if position + 1 < len(starts) else self.end
+            self.emit(depth + 1, f"{'if' if position == 0 else 'elif'} block == {start}:")
+            for pc in range(start, end):
+                op: int = program.ops[pc]
+                if op == Opcode.JUMP:
+                    self.emit(depth + 2, f"block = {program.arg_a[pc]}")
+                    self.emit(depth + 2, "continue")
+                elif op == Opcode.JUMP_IF_FALSE:
+                    self.emit(depth + 2, f"if r{program.arg_a[pc]} != 1:")
+                    self.emit(depth + 3, f"block = {program.arg_b[pc]}")
+                    self.emit(depth + 3, "continue")
+                elif op in FUSED_SYMBOLS:
+                    self.emit(depth + 2, f"if not ({self.comparison(pc)}):")
+                    self.emit(depth + 3, f"block = {program.arg_c[pc]}")
+                    self.emit(depth + 3, "continue")
+                elif op in NEXT_SYMBOLS:
+                    self.emit(depth + 2, f"if {self.next(pc, depth + 2)}:")
+                    self.emit(depth + 3, f"block = {program.arg_c[pc]}")
+                    self.emit(depth + 3, "continue")
+                else:
+                    self.simple(pc, depth + 2)
+            if program.ops[end - 1] not in (Opcode.JUMP, Opcode.HALT, Opcode.RET):
+                self.emit(depth + 2, f"block = {end}")
+
+    def transpile(self) -> list[str]:
+        self.emit(0, f"def {space_function(self.index)}():")
+        self.reload(1, self.used)
+        structure: tuple[dict[int, int], dict[int, int]] | None = self.structure()
+        if structure is not None:
+            self.structured(self.start, self.end, 1, *structure)
+        else:
+            # the block loop needs results of ifs in registers
+            self.scratch = set()
+            self.blocks(1)
+        return self.lines
+
+
+def transpile(program: Program) -> str:
+    """Python source, that defines a function for every space, _main is `ENTRY_NAME`"""
+    written, scratch = program.scalar_usage()
+    constants: dict[int, int] = {slot: value for slot, value in enumerate(program.scalars) if slot not in written}
+    pure: set[int] = set(find_pure_spaces(program))
+    lines: list[str] = []
+    entries: list[int] = list(program.space_entries) + [len(program)]
+    for index in range(len(program.space_entries)):
+        lines.extend(SpaceTranspiler(program, index, entries[index], entries[index + 1], constants, written, scratch, pure).transpile())
+        lines.append("")
+    return "\n".join(lines)
+
+def compile_program(program: Program, file_name: str = "<usl>") -> CodeType:
+    return compile(transpile(program), file_name, "exec")
+
+
+class CodeCache(TokenCache):
+    """Marshalled code objects, keyed by the source hash, the compiler, the optimization level and the version of python\n
+    `level` is None for artifacts, which are optimized already
+    """
+    entry_suffix: str = CODE_ENTRY_SUFFIX
+
+    def __init__(self, directory: str, level: int | None = None) -> None:
+        super().__init__(directory)
+        self.level: int | None = level
+
+    def fingerprint(self) -> bytes:
+        digest = hashlib.sha256(tokenizer_fingerprint())
+        digest.update(f"{TRANSPILER_VERSION} {self.level}".encode())
+        digest.update(MAGIC_NUMBER)
+        for name in ("compiler.py", "resolution.py", "optimizer.py", "memo.py", "transpiler.py"):
+            with open(os.path.join(_SRC_DIR, name), "rb") as file:
+                digest.update(file.read())
+        return digest.digest()
+
+    def serialize(self, value: CodeType, file) -> None: # type: ignore
+        marshal.dump(value, file)
+
+    def deserialize(self, file) -> CodeType: # type: ignore
+        return marshal.load(file)
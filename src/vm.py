@@ -0,0 +1,583 @@
+"""Contains the virtual machine, which executes a compiled program
+
+The dispatch loop reads instructions straight from the parallel arrays of the program,
+so no objects are created per executed instruction.
+Int, bool and char registers are a single array('q'), which int[] and char[] side tables accompany.
+Output goes through `src.output.OutputBuffer`, char[] values are encoded once, when they are set.
+Calls push a frame (return offset, index of the called space) onto a preallocated array('q'),
+so a USL call costs no python frame and the depth is only limited by `max_depth`.
+Calls of pure spaces go through their caches (`src.memo`), a hit skips the call.
+A profiled run goes through a copy of the loop, that times every instruction, so a usual run does not pay for it
+"""
+
+import sys
+from time import perf_counter_ns
+from array import array
+from collections.abc import Callable, Iterable
+from types import CodeType
+from typing import TextIO
+
+from src.rules import Type
+from src.errors import ExecutionException, EXECUTION_ERR
+from src.errorutils import format_code_line
+from src.compiler import Opcode, Program, BOOL_VALUES, BOOL_NAMES
+from src.output import OutputBuffer, open_sink
+from src.memo import MemoSpace, DEFAULT_MEMO_SIZE, find_pure_spaces
+from src.profiler import Profile
+from src.transpiler import ENTRY_NAME
+
+
+__all__ = [
+    'VirtualMachine',
+    'RECORD_DELIMITER',
+    'format_value',
+    'parse_value',
+    'count_to',
+    'DEFAULT_MAX_DEPTH',
+    'MAX_DEPTH',
+]
+
+
+# written after the output of every record
+RECORD_DELIMITER = b"\n"
+
+DEFAULT_MAX_DEPTH = 100_000
+# frames are allocated up front, this many take 160 MB
+MAX_DEPTH = 10_000_000
+# return offset and index of the called space
+FRAME_SIZE = 2
+# python frames below the transpiled _main, allowed on top of `max_depth`
+NATIVE_FRAME_MARGIN = 100
+
+
+def format_value(value: int | str | list[int], value_type: Type) -> str:
+    match value_type:
+        case Type.Int:
+            return str(value)
+        case Type.Char:
+            return chr(value) # type: ignore
+        case Type.Bool:
+            return BOOL_NAMES[value] # type: ignore
+        case Type.String:
+            return value # type: ignore
+        case Type.IntArray:
+            return "{" + ", ".join(str(item) for item in value) + "}" # type: ignore
+
+def parse_value(text: str, value_type: Type) -> int | str | list[int]:
+    """Parses a line of std input
+
+    Raises
+        `ValueError`
+        * If the text is not a value of the type
+    """
+    match value_type:
+        case Type.Int:
+            return int(text)
+        case Type.Char:
+            if len(text) != 1:
+                raise ValueError(text)
+            return ord(text)
+        case Type.Bool:
+            if text not in BOOL_VALUES:
+                raise ValueError(text)
+            return BOOL_VALUES[text]
+        case Type.String:
+            return text
+        case Type.IntArray:
+            return [int(item) for item in text.strip("{}").split(",")]
+
+
+def count_to(op: int, value: int, bound: int, step: int) -> int:
+    """The value of the counter after the whole COUNT_* loop, the step goes towards the bound"""
+    match op:
+        case Opcode.COUNT_LT:
+            return value + -(-(bound - value) // step) * step if value < bound else value
+        case Opcode.COUNT_LE:
+            return value + ((bound - value) // step + 1) * step if value <= bound else value
+        case Opcode.COUNT_GT:
+            return value - -(-(value - bound) // -step) * -step if value > bound else value
+        case Opcode.COUNT_GE:
+            return value - ((value - bound) // -step + 1) * -step if value >= bound else value
+    raise ValueError(op)
+
+
+class VirtualMachine:
+    def __init__(
+        self, program: Program, stdin: TextIO | None = None, output: OutputBuffer | None = None,
+        max_depth: int = DEFAULT_MAX_DEPTH, memo_size: int = DEFAULT_MEMO_SIZE
+    ) -> None:
+        self.program: Program = program
+        self.stdin: TextIO = stdin if stdin is not None else sys.stdin
+        self.output: OutputBuffer = output if output is not None else OutputBuffer(open_sink(None))
+        self.registers: array[int] = array('q', program.scalars)
+        self.int_arrays: list[array[int]] = [array('q', values) for values in program.int_arrays]
+        self.char_arrays: list[str] = list(program.char_arrays)
+        self.encoded_char_arrays: list[bytes] = [value.encode() for value in program.char_arrays]
+        # tables by the value of the type, STDOUT and DESC carry it as an operand
+        self.tables: dict[int, array[int] | list] = {
+            Type.Int.value: self.registers,
+            Type.Char.value: self.registers,
+            Type.Bool.value: self.registers,
+            Type.IntArray.value: self.int_arrays,
+            Type.String.value: self.char_arrays,
+        }
+        # set by `bind`, std input is not read then
+        self.bound: bool = False
+        self.prompts: list[bytes] = [string.encode() for string in program.strings]
+        # entry of the transpiled program, set by `use_code`
+        self.native: Callable[[], None] | None = None
+        # frames of calls, FRAME_SIZE slots each, allocated once
+        self.max_depth: int = max_depth
+        self.frames: array[int] = array('q', bytes(8 * FRAME_SIZE * max_depth))
+        # by the index of the space, None for spaces, that are not pure, every one is None with memo_size 0
+        self.memos: list[MemoSpace | None] = [None] * len(program.space_entries)
+        if memo_size > 0:
+            for index, (inputs, outputs) in find_pure_spaces(program).items():
+                self.memos[index] = MemoSpace(program.spaces[index], inputs, outputs, memo_size)
+        # set by `use_profile`, runs go through the profiling loop then
+        self.profile: Profile | None = None
+
+    def __error(self, pc: int, message: str) -> ExecutionException:
+        line_index: int = self.program.lines[pc]
+        return ExecutionException(EXECUTION_ERR, message, format_code_line(self.program.sources.get(line_index, ""), line_index))
+
+    def __read(self, pc: int, slot: int, value_type: Type) -> None:
+        """Raises
+            `EXECUTION_ERR`
+            * If std input has ended or is not a value of the type
+        """
+        text: str = self.stdin.readline()
+        if text == "":
+            raise self.__error(pc, "No std input left")
+        try:
+            value: int | str | list[int] = parse_value(text.rstrip("\r\n"), value_type)
+            self.tables[value_type.value][slot] = array('q', value) if value_type == Type.IntArray else value # type: ignore
+            if value_type == Type.String:
+                self.encoded_char_arrays[slot] = value.encode() # type: ignore
+        except (ValueError, OverflowError):
+            raise self.__error(pc, f"Expected {value_type.name}, got {text.strip()!r}") from None
+
+    def __describe(self, pc: int) -> None:
+        """Runs desc at pc: writes the prompt and reads the variable, unless std input is bound to a record"""
+        if self.bound:
+            return
+        self.output.write(self.prompts[self.program.arg_b[pc]])
+        # the prompt has to be seen before the program waits for input
+        self.output.flush()
+        self.__read(pc, self.program.arg_a[pc], Type(self.program.arg_c[pc]))
+
+    def use_code(self, code: CodeType) -> None:
+        """Runs the code, made by `src.transpiler`, instead of the dispatch loop"""
+        namespace: dict[str, object] = {
+            'R': self.registers,
+            'S': self.encoded_char_arrays,
+            'A': self.int_arrays,
+            'write': self.output.write,
+            'describe': self.__describe,
+            'BOOL_BYTES': [name.encode() for name in BOOL_NAMES],
+            'format_array': lambda values: format_value(values, Type.IntArray).encode(),
+            'memo_get': self.__memo_get,
+            'memo_put': self.__memo_put,
+        }
+        exec(code, namespace)
+        self.native = namespace[ENTRY_NAME] # type: ignore
+
+    def use_profile(self, profile: Profile) -> None:
+        """Runs the profiling dispatch loop, that fills the profile, instead of the usual one or the transpiled code"""
+        self.profile = profile
+
+    def __memo_get(self, index: int) -> tuple[int, ...] | None:
+        """Key of a call of the space from the transpiled code, None after a hit, whose results are in the registers then"""
+        memo: MemoSpace | None = self.memos[index]
+        if memo is None:
+            return ()
+        registers: array[int] = self.registers
+        key: tuple[int, ...] = tuple([registers[slot] for slot in memo.inputs])
+        found: tuple[int, ...] | None = memo.cache.get(key)
+        if found is None:
+            return key
+        for slot, value in zip(memo.outputs, found):
+            registers[slot] = value
+        return None
+
+    def __memo_put(self, index: int, key: tuple[int, ...]) -> None:
+        memo: MemoSpace | None = self.memos[index]
+        if memo is not None:
+            memo.cache.put(key, tuple([self.registers[slot] for slot in memo.outputs]))
+
+    def reset(self) -> None:
+        """Brings int, bool and char registers back to their initial values, in place\n
+        int[] and char[] values are never changed by instructions, std input variables are bound again anyway
+        """
+        self.registers[:] = self.program.scalars
+
+    def bind(self, fields: list[str], record_index: int) -> None:
+        """Sets std input variables, that _main takes, to the fields of a record
+
+        Raises
+            `EXECUTION_ERR`
+            * If the amount of fields is wrong, or a field is not a value of its type
+        """
+        if len(fields) != len(self.program.stdin):
+            raise ExecutionException(EXECUTION_ERR, f"Record {record_index} has {len(fields)} fields, _main takes {len(self.program.stdin)}", "")
+        for field, (slot, value_type), ref in zip(fields, self.program.stdin, self.program.stdin_refs):
+            try:
+                value: int | str | list[int] = parse_value(field, value_type)
+                self.tables[value_type.value][slot] = array('q', value) if value_type == Type.IntArray else value # type: ignore
+            except (ValueError, OverflowError):
+                raise ExecutionException(EXECUTION_ERR, f"Record {record_index}: expected {value_type.name} for &{ref}, got {field!r}", "") from None
+            if value_type == Type.String:
+                self.encoded_char_arrays[slot] = field.encode()
+        self.bound = True
+
+    def run(self) -> None:
+        """Runs the program once, flushing the output at the end
+
+        Raises
+            `EXECUTION_ERR`
+            * If an int leaves 64 bits or std input is wrong
+            * If calls are nested deeper than `max_depth`
+        """
+        try:
+            self.__execute()
+        finally:
+            self.output.flush()
+
+    def run_records(self, records: Iterable[list[str]], delimiter: bytes = RECORD_DELIMITER) -> int:
+        """Runs the program over every record without compiling it again, returns the amount of records\n
+        Before each record _pre is reset and std input is bound to its fields, desc does not prompt then.
+        Output of every record ends with the delimiter
+
+        Raises
+            `EXECUTION_ERR`
+            * Same as `run` and `bind`
+        """
+        record_index: int = 0
+        try:
+            for record_index, fields in enumerate(records, start=1):
+                self.reset()
+                self.bind(fields, record_index)
+                self.__execute()
+                self.output.write(delimiter)
+        finally:
+            self.output.flush()
+        return record_index
+
+    def __execute(self) -> None:
+        if self.profile is not None:
+            self.__execute_profiled(self.profile)
+            return
+        if self.native is not None:
+            # spaces are python functions there, the limit is about `max_depth` calls as well
+            recursion_limit: int = sys.getrecursionlimit()
+            sys.setrecursionlimit(max(recursion_limit, self.max_depth + NATIVE_FRAME_MARGIN))
+            try:
+                self.native()
+            except OverflowError:
+                raise ExecutionException(EXECUTION_ERR, "Int does not fit into 64 bits", "") from None
+            except ValueError:
+                raise ExecutionException(EXECUTION_ERR, "Char is not a unicode scalar value, it cannot be written", "") from None
+            except RecursionError:
+                raise ExecutionException(EXECUTION_ERR, f"Calls are nested deeper than {self.max_depth}", "") from None
+            finally:
+                sys.setrecursionlimit(recursion_limit)
+            return
+
+        program: Program = self.program
+        ops, arg_a, arg_b, arg_c = program.ops, program.arg_a, program.arg_b, program.arg_c
+        registers: array[int] = self.registers
+        tables: dict[int, array[int] | list] = self.tables
+        encoded_char_arrays: list[bytes] = self.encoded_char_arrays
+        types: dict[int, Type] = {value_type.value: value_type for value_type in Type}
+        STRING: int = Type.String.value
+        output: OutputBuffer = self.output
+        write = output.write
+        frames: array[int] = self.frames
+        frames_end: int = len(frames)
+        sp: int = 0
+        memos: list[MemoSpace | None] = self.memos
+        # keys of calls of pure spaces, that missed their caches, until they return
+        memo_keys: list[tuple[int, ...]] = []
+
+        HALT, JUMP, JUMP_IF_FALSE = Opcode.HALT, Opcode.JUMP, Opcode.JUMP_IF_FALSE
+        INC, DEC, LT, GT, LE, GE, EQ, NE = Opcode.INC, Opcode.DEC, Opcode.LT, Opcode.GT, Opcode.LE, Opcode.GE, Opcode.EQ, Opcode.NE
+        STDOUT, DESC, CALL, RET = Opcode.STDOUT, Opcode.DESC, Opcode.CALL, Opcode.RET
+        JUMP_UNLESS_LT, JUMP_UNLESS_GT, JUMP_UNLESS_LE = Opcode.JUMP_UNLESS_LT, Opcode.JUMP_UNLESS_GT, Opcode.JUMP_UNLESS_LE
+        JUMP_UNLESS_GE, JUMP_UNLESS_EQ, JUMP_UNLESS_NE = Opcode.JUMP_UNLESS_GE, Opcode.JUMP_UNLESS_EQ, Opcode.JUMP_UNLESS_NE
+        NEXT_LT, NEXT_GT, NEXT_LE, NEXT_GE = Opcode.NEXT_LT, Opcode.NEXT_GT, Opcode.NEXT_LE, Opcode.NEXT_GE
+        COUNT_LT, COUNT_GE = Opcode.COUNT_LT, Opcode.COUNT_GE
+
+        pc: int = 0
+        try:
+            while True:
+                op = ops[pc]
+                a = arg_a[pc]
+                # superinstructions of the optimizer go first, they are what loops are made of
+                if op == NEXT_LT:
+                    registers[a] += 1
+                    pc = arg_c[pc] if registers[a] < registers[arg_b[pc]] else pc + 1
+                elif op == NEXT_GT:
+                    registers[a] -= 1
+                    pc = arg_c[pc] if registers[a] > registers[arg_b[pc]] else pc + 1
+                elif op == NEXT_LE:
+                    registers[a] += 1
+                    pc = arg_c[pc] if registers[a] <= registers[arg_b[pc]] else pc + 1
+                elif op == NEXT_GE:
+                    registers[a] -= 1
+                    pc = arg_c[pc] if registers[a] >= registers[arg_b[pc]] else pc + 1
+                elif op == JUMP_UNLESS_LT:
+                    pc = pc + 1 if registers[a] < registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_GT:
+                    pc = pc + 1 if registers[a] > registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_NE:
+                    pc = pc + 1 if registers[a] != registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_EQ:
+                    pc = pc + 1 if registers[a] == registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_LE:
+                    pc = pc + 1 if registers[a] <= registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_GE:
+                    pc = pc + 1 if registers[a] >= registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_IF_FALSE:
+                    pc = pc + 1 if registers[a] == 1 else arg_b[pc]
+                elif op == INC:
+                    registers[a] += registers[arg_b[pc]]
+                    pc += 1
+                elif op == DEC:
+                    registers[a] -= registers[arg_b[pc]]
+                    pc += 1
+                elif op == JUMP:
+                    pc = a
+                elif op == LT:
+                    registers[a] = registers[arg_b[pc]] < registers[arg_c[pc]]
+                    pc += 1
+                elif op == GT:
+                    registers[a] = registers[arg_b[pc]] > registers[arg_c[pc]]
+                    pc += 1
+                elif op == LE:
+                    registers[a] = registers[arg_b[pc]] <= registers[arg_c[pc]]
+                    pc += 1
+                elif op == GE:
+                    registers[a] = registers[arg_b[pc]] >= registers[arg_c[pc]]
+                    pc += 1
+                elif op == EQ:
+                    registers[a] = registers[arg_b[pc]] == registers[arg_c[pc]]
+                    pc += 1
+                elif op == NE:
+                    registers[a] = registers[arg_b[pc]] != registers[arg_c[pc]]
+                    pc += 1
+                elif op == STDOUT:
+                    value_type = arg_b[pc]
+                    if value_type == STRING:
+                        write(encoded_char_arrays[a])
+                    else:
+                        write(format_value(tables[value_type][a], types[value_type]).encode())
+                    pc += 1
+                elif op == CALL:
+                    memo = memos[arg_b[pc]]
+                    if memo is not None:
+                        key = tuple([registers[slot] for slot in memo.inputs])
+                        found = memo.cache.get(key)
+                        if found is not None:
+                            for slot, value in zip(memo.outputs, found):
+                                registers[slot] = value
+                            pc += 1
+                            continue
+                        memo_keys.append(key)
+                    if sp == frames_end:
+                        raise self.__error(pc, f"Calls are nested deeper than {self.max_depth}")
+                    frames[sp] = pc + 1
+                    frames[sp + 1] = arg_b[pc]
+                    sp += FRAME_SIZE
+                    pc = a
+                elif op == RET:
+                    sp -= FRAME_SIZE
+                    pc = frames[sp]
+                    memo = memos[frames[sp + 1]]
+                    if memo is not None:
+                        memo.cache.put(memo_keys.pop(), tuple([registers[slot] for slot in memo.outputs]))
+                elif op == DESC:
+                    self.__describe(pc)
+                    pc += 1
+                elif COUNT_LT <= op <= COUNT_GE:
+                    registers[a] = count_to(op, registers[a], registers[arg_b[pc]], registers[arg_c[pc]])
+                    pc += 1
+                elif op == HALT:
+                    break
+                else:
+                    raise self.__error(pc, f"Unknown opcode: {op}")
+        except OverflowError:
+            raise self.__error(pc, "Int does not fit into 64 bits") from None
+        except ValueError:
+            # chr() or encoding of a char, that dec or inc took out of unicode
+            raise self.__error(pc, f"Char is not a unicode scalar value, it cannot be written: {registers[arg_a[pc]]}") from None
+
+    def __execute_profiled(self, profile: Profile) -> None:
+        """Same as the dispatch loop of `__execute`, but every instruction is counted and timed\n
+        The time of an instruction lasts until the next one starts, a call lasts until its return
+        """
+        program: Program = self.program
+        ops, arg_a, arg_b, arg_c, lines = program.ops, program.arg_a, program.arg_b, program.arg_c, program.lines
+        registers: array[int] = self.registers
+        tables: dict[int, array[int] | list] = self.tables
+        encoded_char_arrays: list[bytes] = self.encoded_char_arrays
+        types: dict[int, Type] = {value_type.value: value_type for value_type in Type}
+        STRING: int = Type.String.value
+        write = self.output.write
+        frames: array[int] = self.frames
+        frames_end: int = len(frames)
+        sp: int = 0
+        memos: list[MemoSpace | None] = self.memos
+        memo_keys: list[tuple[int, ...]] = []
+
+        counts, times, calls, inclusive, stacks = profile.counts, profile.times, profile.calls, profile.inclusive, profile.stacks
+        clock = perf_counter_ns
+        enter = profile.enter
+        # id of the stack of spaces (see `Profile.enter`) and the time its call started, of every frame
+        stack: int = 0
+        callers: list[int] = []
+        call_starts: list[int] = []
+
+        HALT, JUMP, JUMP_IF_FALSE = Opcode.HALT, Opcode.JUMP, Opcode.JUMP_IF_FALSE
+        INC, DEC, LT, GT, LE, GE, EQ, NE = Opcode.INC, Opcode.DEC, Opcode.LT, Opcode.GT, Opcode.LE, Opcode.GE, Opcode.EQ, Opcode.NE
+        STDOUT, DESC, CALL, RET = Opcode.STDOUT, Opcode.DESC, Opcode.CALL, Opcode.RET
+        JUMP_UNLESS_LT, JUMP_UNLESS_GT, JUMP_UNLESS_LE = Opcode.JUMP_UNLESS_LT, Opcode.JUMP_UNLESS_GT, Opcode.JUMP_UNLESS_LE
+        JUMP_UNLESS_GE, JUMP_UNLESS_EQ, JUMP_UNLESS_NE = Opcode.JUMP_UNLESS_GE, Opcode.JUMP_UNLESS_EQ, Opcode.JUMP_UNLESS_NE
+        NEXT_LT, NEXT_GT, NEXT_LE, NEXT_GE = Opcode.NEXT_LT, Opcode.NEXT_GT, Opcode.NEXT_LE, Opcode.NEXT_GE
+        COUNT_LT, COUNT_GE = Opcode.COUNT_LT, Opcode.COUNT_GE
+
+        pc: int = 0
+        current: int = 0
+        where: tuple[int, int] = (stack, lines[0])
+        began: int = clock()
+        start: int = began
+        try:
+            while True:
+                current = pc
+                where = (stack, lines[pc])
+                op = ops[pc]
+                a = arg_a[pc]
+                if op == NEXT_LT:
+                    registers[a] += 1
+                    pc = arg_c[pc] if registers[a] < registers[arg_b[pc]] else pc + 1
+                elif op == NEXT_GT:
+                    registers[a] -= 1
+                    pc = arg_c[pc] if registers[a] > registers[arg_b[pc]] else pc + 1
+                elif op == NEXT_LE:
+                    registers[a] += 1
+                    pc = arg_c[pc] if registers[a] <= registers[arg_b[pc]] else pc + 1
+                elif op == NEXT_GE:
+                    registers[a] -= 1
+                    pc = arg_c[pc] if registers[a] >= registers[arg_b[pc]] else pc + 1
+                elif op == JUMP_UNLESS_LT:
+                    pc = pc + 1 if registers[a] < registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_GT:
+                    pc = pc + 1 if registers[a] > registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_NE:
+                    pc = pc + 1 if registers[a] != registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_EQ:
+                    pc = pc + 1 if registers[a] == registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_LE:
+                    pc = pc + 1 if registers[a] <= registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_UNLESS_GE:
+                    pc = pc + 1 if registers[a] >= registers[arg_b[pc]] else arg_c[pc]
+                elif op == JUMP_IF_FALSE:
+                    pc = pc + 1 if registers[a] == 1 else arg_b[pc]
+                elif op == INC:
+                    registers[a] += registers[arg_b[pc]]
+                    pc += 1
+                elif op == DEC:
+                    registers[a] -= registers[arg_b[pc]]
+                    pc += 1
+                elif op == JUMP:
+                    pc = a
+                elif op == LT:
+                    registers[a] = registers[arg_b[pc]] < registers[arg_c[pc]]
+                    pc += 1
+                elif op == GT:
+                    registers[a] = registers[arg_b[pc]] > registers[arg_c[pc]]
+                    pc += 1
+                elif op == LE:
+                    registers[a] = registers[arg_b[pc]] <= registers[arg_c[pc]]
+                    pc += 1
+                elif op == GE:
+                    registers[a] = registers[arg_b[pc]] >= registers[arg_c[pc]]
+                    pc += 1
+                elif op == EQ:
+                    registers[a] = registers[arg_b[pc]] == registers[arg_c[pc]]
+                    pc += 1
+                elif op == NE:
+                    registers[a] = registers[arg_b[pc]] != registers[arg_c[pc]]
+                    pc += 1
+                elif op == STDOUT:
+                    value_type = arg_b[pc]
+                    if value_type == STRING:
+                        write(encoded_char_arrays[a])
+                    else:
+                        write(format_value(tables[value_type][a], types[value_type]).encode())
+                    pc += 1
+                elif op == CALL:
+                    space = arg_b[pc]
+                    memo = memos[space]
+                    found = None
+                    if memo is not None:
+                        key = tuple([registers[slot] for slot in memo.inputs])
+                        found = memo.cache.get(key)
+                        if found is not None:
+                            for slot, value in zip(memo.outputs, found):
+                                registers[slot] = value
+                            # a hit is a call, that returns right away
+                            calls[space] += 1
+                            inclusive[space] += clock() - start
+                            pc += 1
+                        else:
+                            memo_keys.append(key)
+                    if found is None:
+                        if sp == frames_end:
+                            raise self.__error(pc, f"Calls are nested deeper than {self.max_depth}")
+                        frames[sp] = pc + 1
+                        frames[sp + 1] = space
+                        sp += FRAME_SIZE
+                        pc = a
+                        callers.append(stack)
+                        stack = enter(stack, space)
+                        call_starts.append(start)
+                elif op == RET:
+                    sp -= FRAME_SIZE
+                    pc = frames[sp]
+                    space = frames[sp + 1]
+                    memo = memos[space]
+                    if memo is not None:
+                        memo.cache.put(memo_keys.pop(), tuple([registers[slot] for slot in memo.outputs]))
+                    calls[space] += 1
+                    inclusive[space] += clock() - call_starts.pop()
+                    stack = callers.pop()
+                elif op == DESC:
+                    self.__describe(pc)
+                    pc += 1
+                elif COUNT_LT <= op <= COUNT_GE:
+                    registers[a] = count_to(op, registers[a], registers[arg_b[pc]], registers[arg_c[pc]])
+                    pc += 1
+                elif op == HALT:
+                    break
+                else:
+                    raise self.__error(pc, f"Unknown opcode: {op}")
+
+                now = clock()
+                counts[current] += 1
+                times[current] += now - start
+                stacks[where] = stacks.get(where, 0) + now - start
+                start = now
+        except OverflowError:
+            raise self.__error(pc, "Int does not fit into 64 bits") from None
+        except ValueError:
+            # chr() or encoding of a char, that dec or inc took out of unicode
+            raise self.__error(pc, f"Char is not a unicode scalar value, it cannot be written: {registers[arg_a[pc]]}") from None
+        finally:
+            # HALT, or the instruction, that failed
+            now = clock()
+            counts[current] += 1
+            times[current] += now - start
+            stacks[where] = stacks.get(where, 0) + now - start
+            calls[0] += 1
+            inclusive[0] += now - began
+            profile.total += now - began
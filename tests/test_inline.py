@@ -0,0 +1,101 @@
+"""Programs, whose output must not depend on the optimization level
+
+Calls are what inlining moves around, so every shape of calls between small, big and recursive spaces is here
+"""
+
+import io
+import unittest
+
+from src.tokens.session import Session
+from src.compiler import Program, compile_tokens
+from src.optimizer import OPTIMIZATION_LEVELS, optimize
+from src.output import OutputBuffer
+from src.vm import VirtualMachine
+
+
+SMALL_CALLS_BIG = """
+_consts:
+    1 [std] char[] "small\\n"
+    2 [std] char[] "big\\n"
+_main:
+    call _small
+    call _small
+    call _big
+    call _small
+$_big [std]:
+    stdout ~2
+    stdout ~2
+    stdout ~2
+    stdout ~2
+    stdout ~2
+    stdout ~2
+    stdout ~2
+    stdout ~2
+    stdout ~2
+$_small [std]:
+    stdout ~1
+    call _big
+"""
+
+SMALL_CALLS_RECURSIVE = """
+_consts:
+    1 [std] char[] "!"
+_pre:
+    2 [std] int 0
+_main:
+    call _s
+$_r [std]:
+    inc ~2 1
+    if 1 (~2 < 50)
+    call _r
+$_s [std]:
+    call _r
+    stdout ~1
+    stdout ~2
+"""
+
+SMALL_CALLS_SMALL = """
+_consts:
+    1 [std] char 'a'
+    2 [std] char 'b'
+_main:
+    call _outer
+    call _inner
+$_inner [std]:
+    stdout ~2
+$_outer [std]:
+    stdout ~1
+    call _inner
+    stdout ~1
+"""
+
+
+def run(source: str, level: int) -> bytes:
+    program: Program = compile_tokens(Session().tokenize(source.strip("\n").split("\n")))
+    optimize(program, level)
+    sink = io.BytesIO()
+    VirtualMachine(program, output=OutputBuffer(sink)).run() # type: ignore
+    return sink.getvalue()
+
+
+class InlineTest(unittest.TestCase):
+    def assert_same_at_every_level(self, source: str) -> None:
+        expected: bytes = run(source, 0)
+        for level in OPTIMIZATION_LEVELS[1:]:
+            with self.subTest(level=level):
+                self.assertEqual(run(source, level), expected)
+
+    def test_small_calls_big(self) -> None:
+        self.assertEqual(run(SMALL_CALLS_BIG, 0), b"small\n" + b"big\n" * 9 + b"small\n" + b"big\n" * 18 + b"small\n" + b"big\n" * 9)
+        self.assert_same_at_every_level(SMALL_CALLS_BIG)
+
+    def test_small_calls_recursive(self) -> None:
+        self.assertEqual(run(SMALL_CALLS_RECURSIVE, 0), b"!50")
+        self.assert_same_at_every_level(SMALL_CALLS_RECURSIVE)
+
+    def test_small_calls_small(self) -> None:
+        self.assert_same_at_every_level(SMALL_CALLS_SMALL)
+
+
+if __name__ == "__main__":
+    unittest.main()
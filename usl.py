@@ -1,74 +1,305 @@
 #!/usr/bin/python3.13
 
-import sys, pprint
+import os, sys, pprint
+from collections.abc import Iterable
+from contextlib import nullcontext
+from types import CodeType
 from termcolor import colored
 
 from src.rules import RulesBreak
 from src.errors import *
-from src.tokens.tokenizer import Tokenizer
 from src.tokens.tokenclass import Token
-from src.tokens.pointer import Pointer
+from src.tokens.cache import TokenCache, default_cache_dir
+from src.compiler import Program, compile_tokens
+from src.optimizer import OPTIMIZATION_LEVELS, DEFAULT_OPTIMIZATION_LEVEL, optimize
+from src.vm import VirtualMachine, DEFAULT_MAX_DEPTH, MAX_DEPTH
+from src.memo import DEFAULT_MEMO_SIZE
+from src.profiler import Profile, PROFILE_FORMATS, PROFILE_OPTIMIZATION_LEVEL, profile_report, profile_json, collapsed_stacks
+from src.output import OutputBuffer, MemorySink, open_sink
+from src.records import iter_records
+from src.transpiler import CodeCache, compile_program
+from src.artifact import ARTIFACT_SUFFIX, stamp_source, write_artifact, read_artifact
 
 
-def output(lines: list[str]) -> None:
-    tokenizer: Tokenizer = Tokenizer(Pointer(lines))
-    tokens: list[Token] = tokenizer.parse_to_tokens()
-    pprint.pprint(tokens)
+def print_error(args: tuple[object, ...]) -> None:
+    """Prints args of a language exception: kind, message, code line and its highlight"""
+    kind, message, code_line, highlight = (tuple(str(arg) for arg in args) + ("", "", "", ""))[:4]
+    print(
+        '\n' +
+        colored(kind, "red", attrs=["bold"]) + ': ' + colored(message, "red") + "\n\n" +
+        colored(code_line, "white") + '\n' +
+        colored(highlight, "magenta", attrs=["bold"])
+    )
+
+def print_warning(args: tuple[object, ...]) -> None:
+    """Same as `print_error`, but yellow and to stderr, so it does not mix with the output of the program"""
+    kind, message, code_line, highlight = (tuple(str(arg) for arg in args) + ("", "", "", ""))[:4]
+    print(
+        colored(kind, "yellow", attrs=["bold"]) + ': ' + colored(message, "yellow") + "\n" +
+        colored(code_line, "white") + '\n' +
+        colored(highlight, "magenta", attrs=["bold"]),
+        file=sys.stderr
+    )
+
+def output(tokens: Iterable[Token]) -> None:
+    for token in tokens:
+        pprint.pprint(token)
 
 def debug(file_name: str) -> None:
-    lines: list[str] = []
     if not file_name.endswith(".usl"):
         print("Not a .usl file")
         return
+    from src.tokens.session import Session
     try:
-        with open(file_name, "r+") as file:
-            lines = file.read().split('\n')
-        output(lines)
+        output(Session().iter_file(file_name))
     except FileNotFoundError as exc:
         print(exc.args[1] + ": " + file_name)
         return
 
-def compile() -> None:
-    pass
+def dump(title: str, program: Program) -> None:
+    print(colored(title, "cyan", attrs=["bold"]), file=sys.stderr)
+    print("\n".join(program.disassemble()), file=sys.stderr)
+
+def compile_source(file_name: str, level: int = DEFAULT_OPTIMIZATION_LEVEL, dump_code: bool = False) -> Program:
+    """Compiles and optimizes the file, with `dump_code` its bytecode before and after the optimizer goes to stderr
+
+    Raises
+        `FileNotFoundError`
+        * If the file does not exist
+        Any of `LANGUAGE_EXCEPTIONS`
+    """
+    # the tokenizer is imported only when a source is tokenized, running a .uslc does not need it
+    from src.tokens.session import Session
+    session: Session = Session(TokenCache(default_cache_dir(file_name)))
+    program: Program = compile_tokens(session.tokenize_file(file_name))
+    for warning in program.warnings:
+        print_warning(warning)
+    if dump_code:
+        dump("Compiled:", program)
+    fired: dict[str, int] = optimize(program, level)
+    if dump_code:
+        dump(f"Optimized (-O{level}):", program)
+        for name, times in fired.items():
+            print(f"{name}: {times}", file=sys.stderr)
+    return program
 
-def interpret(file_name: str) -> None:
-    lines: list[str] = []
+def compile(file_name: str, output_name: str | None = None, level: int = DEFAULT_OPTIMIZATION_LEVEL, dump_code: bool = False) -> int:
+    """Writes the .uslc artifact of the file, next to it by default, returns the exit code"""
     if not file_name.endswith(".usl"):
         print("Not a .usl file")
+        return 2
+    try:
+        program: Program = compile_source(file_name, level, dump_code)
+    except LANGUAGE_EXCEPTIONS as exc:
+        print_error(exc.args)
+        return 1
+    except FileNotFoundError as exc:
+        print(exc.args[1] + ": " + file_name)
+        return 2
+    write_artifact(program, output_name or file_name.removesuffix(".usl") + ARTIFACT_SUFFIX, stamp_source(file_name))
+    return 0
+
+def interpret(
+    file_name: str, output_target: str | None = None, record_format: str | None = None, input_name: str | None = None, native: bool = False,
+    level: int = DEFAULT_OPTIMIZATION_LEVEL, dump_code: bool = False, max_depth: int = DEFAULT_MAX_DEPTH,
+    memo_size: int = DEFAULT_MEMO_SIZE, memo_stats: bool = False, profile_format: str | None = None, profile_output: str | None = None
+) -> None:
+    """Compiles and runs the file, writing its output to stdout, a file or `MEMORY_SINK`\n
+    With `record_format` the program is run once per record of the input file (stdin by default),
+    with `native` it is transpiled to python instead of being run by the dispatch loop.
+    Calls can be nested up to `max_depth` deep, results of pure spaces are cached up to `memo_size` per space.
+    With `profile_format` the run goes through the profiling loop, even with `native`,
+    and its profile is written to stderr or `profile_output`, spaces are not inlined then, unless -O2 is given.
+    An artifact is run as it was optimized, when it was compiled
+    """
+    if not file_name.endswith((".usl", ARTIFACT_SUFFIX)):
+        print("Not a .usl or " + ARTIFACT_SUFFIX + " file")
         return
     try:
-        with open(file_name, "r+") as file:
-            lines = file.read().split('\n')
         try:
-            output(lines)
-        except (
-            SyntaxException,
-            OwnershipException,
-            DuplicationException,
-            TokenizerException,
-            RulesBreak,
-        ) as exc:
-            print(
-                '\n' +
-                colored(exc.args[0], "red", attrs=["bold"]) + ': ' + colored(exc.args[1], "red") + "\n\n" +
-                colored(exc.args[2], "white") + '\n' +
-                colored(exc.args[3], "magenta", attrs=["bold"])
-            )
+            # an artifact is run as it is, without tokenizing anything
+            program: Program = read_artifact(file_name) if file_name.endswith(ARTIFACT_SUFFIX) else compile_source(file_name, level, dump_code)
+        except (*LANGUAGE_EXCEPTIONS, ArtifactException) as exc:
+            print_error(exc.args)
             return
     except FileNotFoundError as exc:
         print(exc.args[1] + ": " + file_name)
         return
 
-def main() -> None:
-    match sys.argv[1]:
-        case "--debug" | "-d":
-            debug(sys.argv[2])
-        case "--compile" | "-c":
-            pass
-        case "--interpret" | "-i":
-            interpret(sys.argv[2])
+    sink = open_sink(output_target)
+    machine: VirtualMachine | None = None
+    profile: Profile | None = Profile(program) if profile_format is not None else None
+    try:
+        machine = VirtualMachine(program, output=OutputBuffer(sink), max_depth=max_depth, memo_size=memo_size)
+        if profile is not None:
+            machine.use_profile(profile)
+        elif native:
+            machine.use_code(load_code(file_name, program, level))
+        if record_format is None:
+            machine.run()
+        else:
+            with (open(input_name) if input_name is not None else nullcontext(sys.stdin)) as stream:
+                machine.run_records(iter_records(stream, record_format, program.stdin_refs))
+    except LANGUAGE_EXCEPTIONS as exc:
+        print_error(exc.args)
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+    finally:
+        if output_target is not None:
+            sink.close()
+    if isinstance(sink, MemorySink):
+        print(f"{sink.written} bytes written", file=sys.stderr)
+    if memo_stats and machine is not None:
+        print_memo_stats(machine)
+    if profile is not None:
+        write_profile(program, profile, profile_format, profile_output) # type: ignore
+
+def print_memo_stats(machine: VirtualMachine) -> None:
+    for memo in machine.memos:
+        if memo is not None:
+            cache = memo.cache
+            print(f"{memo.name}: {cache.hits} hits, {cache.misses} misses, {cache.evictions} evicted, {len(cache.entries)} cached", file=sys.stderr)
+
+def write_profile(program: Program, profile: Profile, profile_format: str, profile_output: str | None = None) -> None:
+    match profile_format:
+        case "json":
+            text: str = profile_json(program, profile)
+        case "collapsed":
+            text = "\n".join(collapsed_stacks(program, profile))
         case _:
-            interpret(sys.argv[1])
+            text = "\n".join(profile_report(program, profile))
+    if profile_output is None:
+        print(text, file=sys.stderr)
+        return
+    try:
+        with open(profile_output, "w") as file:
+            file.write(text + "\n")
+    except OSError as exc:
+        print(exc, file=sys.stderr)
+
+def load_code(file_name: str, program: Program, level: int = DEFAULT_OPTIMIZATION_LEVEL) -> CodeType:
+    """Transpiled program from __uslcache__, or transpiled right now and cached"""
+    # an artifact is already optimized, its bytes are the key
+    cache: CodeCache = CodeCache(default_cache_dir(file_name), level if file_name.endswith(".usl") else None)
+    key: str = cache.key_for_file(file_name)
+    code: CodeType | None = cache.load(key)
+    if code is None:
+        code = compile_program(program, file_name)
+        cache.store(key, code)
+    return code
+
+def check(root: str, jobs: int) -> int:
+    """Tokenizes every .usl file under `root`, returns the exit code"""
+    if not os.path.isdir(root):
+        print("Not a directory: " + root)
+        return 2
+
+    from src.batch import BatchReport, check_directory
+    report: BatchReport = check_directory(root, jobs)
+    for file_report in report.failed:
+        print(colored(file_report.file_name, "white", attrs=["bold"]), end="")
+        print_error(file_report.error) # type: ignore
+        print()
+
+    print(
+        f"Checked {len(report.reports)} files in {report.seconds:.2f}s "
+        f"({report.cpu_seconds:.2f}s in workers, {jobs} job{"s" if jobs != 1 else ""}): "
+        + (colored(f"{len(report.failed)} failed", "red", attrs=["bold"]) if report.failed else colored("all passed", "green"))
+    )
+    return 1 if report.failed else 0
+
+def parse_jobs(args: list[str]) -> int:
+    """Finds -j N / --jobs N among the arguments, defaults to a single job"""
+    for index, arg in enumerate(args):
+        if arg in ("-j", "--jobs") and index + 1 < len(args) and args[index + 1].isdigit():
+            return max(1, int(args[index + 1]))
+    return 1
+
+def parse_option(args: list[str], *names: str) -> str | None:
+    """Finds the value of an option given by any of its names, e.g. -o PATH / --output PATH"""
+    for index, arg in enumerate(args):
+        if arg in names and index + 1 < len(args):
+            return args[index + 1]
+    return None
+
+def parse_level(args: list[str]) -> int:
+    """Finds -O0, -O1 or -O2 among the arguments, the last one wins
+
+    Raises
+        `ValueError`
+        * If the level is unknown
+    """
+    level: int = DEFAULT_OPTIMIZATION_LEVEL
+    for arg in args:
+        if arg.startswith("-O"):
+            if not arg[2:].isdigit() or int(arg[2:]) not in OPTIMIZATION_LEVELS:
+                raise ValueError(f"Unknown optimization level: {arg}, expected one of {', '.join(f'-O{known}' for known in OPTIMIZATION_LEVELS)}")
+            level = int(arg[2:])
+    return level
+
+def compile_options(args: list[str]) -> tuple[int, bool]:
+    """Optimization level (-O) and --dump"""
+    return (parse_level(args), "--dump" in args)
+
+def parse_count(args: list[str], name: str, default: int, minimum: int = 1, maximum: int | None = None) -> int:
+    """Finds a number option, e.g. --max-depth N
+
+    Raises
+        `ValueError`
+        * If N is not a number, or is out of [minimum, maximum]
+    """
+    value: str | None = parse_option(args, name)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) < minimum or (maximum is not None and int(value) > maximum):
+        raise ValueError(f"Expected a number from {minimum}{f' to {maximum}' if maximum is not None else ''} after {name}, got {value}")
+    return int(value)
+
+def parse_profile(args: list[str]) -> str | None:
+    """Format of --profile, given by --profile-format (text by default), None without --profile
+
+    Raises
+        `ValueError`
+        * If the format is unknown
+    """
+    if "--profile" not in args:
+        return None
+    profile_format: str = parse_option(args, "--profile-format") or PROFILE_FORMATS[0]
+    if profile_format not in PROFILE_FORMATS:
+        raise ValueError(f"Unknown profile format: {profile_format}, expected one of {', '.join(PROFILE_FORMATS)}")
+    return profile_format
+
+def run_options(args: list[str]) -> tuple[str | None, str | None, str | None, bool, int, bool, int, int, bool, str | None, str | None]:
+    """Output (-o), record format (--records), input (--input), --native, -O, --dump,
+    --max-depth, --memo-size (0 turns memoization off), --memo-stats, --profile and --profile-output of a run
+    """
+    level, dump_code = compile_options(args)
+    profile_format: str | None = parse_profile(args)
+    if profile_format is not None and not any(arg.startswith("-O") for arg in args):
+        level = min(level, PROFILE_OPTIMIZATION_LEVEL)
+    return (
+        parse_option(args, "-o", "--output"), parse_option(args, "--records"), parse_option(args, "--input"), "--native" in args,
+        level, dump_code,
+        parse_count(args, "--max-depth", DEFAULT_MAX_DEPTH, maximum=MAX_DEPTH), parse_count(args, "--memo-size", DEFAULT_MEMO_SIZE, minimum=0), "--memo-stats" in args,
+        profile_format, parse_option(args, "--profile-output"),
+    )
+
+def main() -> None:
+    try:
+        match sys.argv[1]:
+            case "--check":
+                sys.exit(check(sys.argv[2], parse_jobs(sys.argv[3:])))
+            case "--debug" | "-d":
+                debug(sys.argv[2])
+            case "--compile" | "-c":
+                sys.exit(compile(sys.argv[2], parse_option(sys.argv[3:], "-o", "--output"), *compile_options(sys.argv[3:])))
+            case "--interpret" | "-i":
+                interpret(sys.argv[2], *run_options(sys.argv[3:]))
+            case _:
+                interpret(sys.argv[1], *run_options(sys.argv[2:]))
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(2)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file